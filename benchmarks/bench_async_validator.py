@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+# coding=utf-8
+"""
+Concurrency benchmark for ss_checks_async. Runs 100 simultaneous validations on one event
+loop, alongside a heartbeat task that measures how long the loop is blocked for, and
+compares against running SamplesheetCheck.ss_checks() sequentially on the loop.
+
+Usage (from the repository root):
+    python3 -m benchmarks.bench_async_validator [-n 100]
+"""
+import os
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+from samplesheet_validator.samplesheet_validator import SamplesheetCheck
+from samplesheet_validator.async_validator import ss_checks_async
+
+SOURCE_SAMPLESHEET = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "test",
+    "data",
+    "samplesheets",
+    "valid",
+    "210917_NB551068_0409_AH3YNFAFX3_SampleSheet.csv",
+)
+VALIDATOR_ARGS = {
+    "sequencer_ids": ["NB551068"],
+    "panels": ["Pan4822", "Pan4119", "Pan4126", "Pan4125", "Pan4816"],
+    "tso_panels": ["Pan5085"],
+    "okd_panels": ["Pan5226"],
+    "dev_pannos": ["Pan5180"],
+}
+
+
+def make_samplesheets(dirpath: str, count: int) -> list:
+    """
+    Copy the source samplesheet to count uniquely named runfolders, so each validation
+    has its own logger and logfile
+        :param dirpath (str):   Directory to write samplesheets to
+        :param count (int):     Number of samplesheets
+        :return (list):         Samplesheet paths
+    """
+    samplesheets = []
+    for i in range(count):
+        path = os.path.join(dirpath, f"210917_NB551068_{i:04d}_AH3YNFAFX3_SampleSheet.csv")
+        shutil.copyfile(SOURCE_SAMPLESHEET, path)
+        samplesheets.append(path)
+    return samplesheets
+
+
+async def heartbeat(stop: asyncio.Event, lags: list) -> None:
+    """
+    Record how late the loop wakes a 1 ms sleep, i.e. how long the loop is blocked for
+    """
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+async def run_async(samplesheets: list, logdir: str) -> tuple:
+    """
+    Run all validations concurrently with ss_checks_async
+    """
+    stop, lags = asyncio.Event(), []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            ss_checks_async(path, **VALIDATOR_ARGS, logdir=logdir, illumina=True, runname="")
+            for path in samplesheets
+        )
+    )
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return elapsed, max(lags)
+
+
+async def run_blocking(samplesheets: list, logdir: str) -> tuple:
+    """
+    Run all validations with the blocking ss_checks() called directly on the loop
+    """
+    stop, lags = asyncio.Event(), []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    for path in samplesheets:
+        SamplesheetCheck(path, **VALIDATOR_ARGS, logdir=logdir, illumina=True, runname="").ss_checks()
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return elapsed, max(lags)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--count", type=int, default=100, help="Number of validations")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tempdir:
+        samplesheets = make_samplesheets(tempdir, args.count)
+        for name, func in (("blocking ss_checks", run_blocking), ("ss_checks_async", run_async)):
+            elapsed, max_lag = asyncio.run(func(samplesheets, tempdir))
+            print(
+                f"{name:<20} {args.count} validations: {elapsed * 1000:8.1f} ms total, "
+                f"max event loop stall {max_lag * 1000:8.1f} ms"
+            )
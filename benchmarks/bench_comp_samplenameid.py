@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+# coding=utf-8
+"""
+Benchmark of the Sample_ID vs Sample_Name comparison. The columns are compared once for each
+row, as the [Data] section is parsed. This times the parse (including the comparison), then the
+row-wise comparison on its own to show its share of the parse, alongside the set difference
+previously computed after the parse.
+
+Usage (from the repository root):
+    python3 -m benchmarks.bench_comp_samplenameid [-n 10000] [-r 5]
+"""
+import time
+import argparse
+import tempfile
+from samplesheet_validator.samplesheet_validator import Validator, ValidationResult
+from .samplesheets import (
+    BENCHMARK_VALIDATOR_ARGS,
+    valid_sample_names,
+    write_illumina_samplesheet,
+)
+
+
+def time_comparison(validator: Validator, samplesheet: str) -> tuple:
+    """
+    Time parsing the data section (which compares the columns of each row), then the row-wise
+    comparison and the set difference of the parsed columns on their own
+    """
+    result = ValidationResult(validator, samplesheet, True, "")
+    result.reader.read_samplesheet()
+    start = time.perf_counter()
+    result.get_data_section()
+    parse = time.perf_counter() - start
+    start = time.perf_counter()
+    [
+        (line_index, sample_row["Sample_ID"], sample_row["Sample_Name"])
+        for line_index, sample_row in result.sample_rows
+        if sample_row["Sample_ID"] != sample_row["Sample_Name"]
+    ]
+    row_wise = time.perf_counter() - start
+    start = time.perf_counter()
+    set(result.samples["Sample_ID"]) - set(result.samples["Sample_Name"])
+    set_difference = time.perf_counter() - start
+    result.close_logger()
+    return parse, row_wise, set_difference
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--rows", type=int, default=10000, help="Number of [Data] rows")
+    parser.add_argument("-r", "--repeats", type=int, default=5, help="Number of repeats")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tempdir:
+        samplesheet = write_illumina_samplesheet(tempdir, valid_sample_names(args.rows))
+        validator = Validator(**BENCHMARK_VALIDATOR_ARGS, logdir=tempdir)
+        parse, row_wise, set_difference = map(
+            min, zip(*(time_comparison(validator, samplesheet) for _ in range(args.repeats)))
+        )
+        print(f"{args.rows} rows, parse with comparison:   {parse * 1000:8.2f} ms")
+        print(f"{args.rows} rows, row-wise comparison:     {row_wise * 1000:8.2f} ms")
+        print(f"{args.rows} rows, previous set difference: {set_difference * 1000:8.2f} ms")
+        print(f"Comparison share of the parse: {row_wise / parse * 100:.1f}%")
@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+# coding=utf-8
+"""
+Benchmark of parsing the [Data] section with the csv reader, at the column positions taken from
+the data section headers, against the previous str.split of each line at fixed column positions.
+The tokenising of the lines is also timed on its own, as the parse time includes the per-row
+sample handling and logging shared by both.
+
+Usage (from the repository root):
+    python3 -m benchmarks.bench_csv_parse [-n 100000] [-r 5]
+"""
+import csv
+import time
+import argparse
+import tempfile
+from samplesheet_validator.samplesheet_validator import Validator, ValidationResult
+from .samplesheets import (
+    BENCHMARK_VALIDATOR_ARGS,
+    valid_sample_names,
+    write_illumina_samplesheet,
+)
+
+
+class SplitValidationResult(ValidationResult):
+    """
+    ValidationResult parsing the data section by splitting each line on commas
+    """
+
+    def get_listed_data_section(self) -> None:
+        samplesheet_contents = self.reader.ss_contents
+        header_index = next(
+            (
+                i
+                for i in range(len(samplesheet_contents) - 1, -1, -1)
+                if samplesheet_contents[i].startswith(self.expected_data_headers[0])
+            ),
+            -1,
+        )
+        if header_index >= 0:
+            self.extract_headers(samplesheet_contents[header_index], header_index)
+        for line_index in range(header_index + 1, len(samplesheet_contents)):
+            line = samplesheet_contents[line_index]
+            fields = line.split(",")
+            if len(fields[0]) < 2:
+                self.logger.info(self.logger.log_msgs["found_empty_line"], line_index)
+            else:
+                self.extract_sample_fields(fields, line_index, line)
+
+
+def time_parse(result_class: type, validator: Validator, samplesheet: str) -> tuple:
+    """
+    Time parsing the data section of the samplesheet, returning the time taken and the
+    parsed sample rows
+    """
+    result = result_class(validator, samplesheet, True, "")
+    result.reader.read_samplesheet()
+    start = time.perf_counter()
+    result.get_data_section()
+    elapsed = time.perf_counter() - start
+    result.close_logger()
+    return elapsed, result.sample_rows
+
+
+def time_tokenise(samplesheet: str) -> tuple:
+    """
+    Time splitting the samplesheet lines into fields with str.split and with the csv reader
+    """
+    with open(samplesheet, "r") as samplesheet_stream:
+        lines = samplesheet_stream.readlines()
+    start = time.perf_counter()
+    [line.split(",") for line in lines]
+    split_time = time.perf_counter() - start
+    start = time.perf_counter()
+    list(csv.reader(lines))
+    csv_time = time.perf_counter() - start
+    return split_time, csv_time
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--rows", type=int, default=100000, help="Number of [Data] rows")
+    parser.add_argument("-r", "--repeats", type=int, default=5, help="Number of repeats")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tempdir:
+        samplesheet = write_illumina_samplesheet(tempdir, valid_sample_names(args.rows))
+        validator = Validator(**BENCHMARK_VALIDATOR_ARGS, logdir=tempdir)
+        split_time, split_rows = min(
+            time_parse(SplitValidationResult, validator, samplesheet)
+            for _ in range(args.repeats)
+        )
+        csv_time, csv_rows = min(
+            time_parse(ValidationResult, validator, samplesheet)
+            for _ in range(args.repeats)
+        )
+        assert csv_rows == split_rows
+        split_tokenise, csv_tokenise = map(
+            min, zip(*(time_tokenise(samplesheet) for _ in range(args.repeats)))
+        )
+        print(f"{args.rows} rows, str.split tokenise: {split_tokenise * 1000:8.1f} ms")
+        print(f"{args.rows} rows, csv tokenise:       {csv_tokenise * 1000:8.1f} ms")
+        print(f"{args.rows} rows, str.split parse:    {split_time * 1000:8.1f} ms")
+        print(f"{args.rows} rows, csv reader parse:   {csv_time * 1000:8.1f} ms")
+        print(f"Parse time, csv / split: {csv_time / split_time:.2f}x")
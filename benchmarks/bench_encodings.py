@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+# coding=utf-8
+"""
+Benchmark of reading large samplesheets exported with Windows line endings, a UTF-8 byte order
+mark or Latin-1 characters, against the same samplesheet with Unix line endings. Line endings,
+byte order marks and encodings are normalised in the same pass that reads the lines, so the
+exports should read and parse in about the same time. Times are the fastest of three runs.
+
+Usage (from the repository root):
+    python3 -m benchmarks.bench_encodings [-n 100000]
+"""
+import time
+import argparse
+import tempfile
+from typing import Callable
+from samplesheet_validator.samplesheet_validator import Validator, ValidationResult
+from .samplesheets import (
+    BENCHMARK_VALIDATOR_ARGS,
+    valid_sample_names,
+    write_illumina_samplesheet,
+)
+
+EXPORTS = {
+    "LF, UTF-8": lambda contents: contents,
+    "CRLF, UTF-8 BOM": lambda contents: b"\xef\xbb\xbf" + contents.replace(b"\n", b"\r\n"),
+    "CRLF, Latin-1": lambda contents: contents.replace(b"NGS432,", b"NGS432 \xa3,", 1).replace(
+        b"\n", b"\r\n"
+    ),
+}
+
+
+def time_stage(validator: Validator, samplesheet: str, stage: Callable) -> float:
+    """
+    Time a stage of validation (reading or parsing the samplesheet), fastest of three runs
+    """
+    times = []
+    for _ in range(3):
+        result = ValidationResult(validator, samplesheet, True, "")
+        start = time.perf_counter()
+        stage(result)
+        times.append(time.perf_counter() - start)
+        result.close_logger()
+    return min(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--rows", type=int, default=100000, help="Number of [Data] rows")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tempdir:
+        samplesheet = write_illumina_samplesheet(tempdir, valid_sample_names(args.rows))
+        with open(samplesheet, "rb") as samplesheet_stream:
+            contents = samplesheet_stream.read()
+        validator = Validator(**BENCHMARK_VALIDATOR_ARGS, logdir=tempdir)
+        for label, export in EXPORTS.items():
+            with open(samplesheet, "wb") as samplesheet_stream:
+                samplesheet_stream.write(export(contents))
+            read_time = time_stage(
+                validator, samplesheet, lambda result: result.reader.read_samplesheet()
+            )
+            parse_time = time_stage(validator, samplesheet, ValidationResult.get_data_section)
+            print(
+                f"{args.rows} rows, {label:16} read: {read_time * 1000:7.1f} ms, "
+                f"read and parse: {parse_time * 1000:8.1f} ms"
+            )
@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+# coding=utf-8
+"""
+Benchmark of incremental re-validation. A samplesheet is validated, one sample row is edited (as
+when a row is corrected and the samplesheet re-uploaded), and the edited samplesheet is validated
+in full and incrementally, reusing the cached verdicts of the unchanged rows.
+
+Usage (from the repository root):
+    python3 -m benchmarks.bench_incremental [-n 3072]
+"""
+import time
+import argparse
+import tempfile
+from samplesheet_validator.samplesheet_validator import Validator
+from .samplesheets import (
+    BENCHMARK_VALIDATOR_ARGS,
+    valid_sample_names,
+    write_illumina_samplesheet,
+)
+
+
+def time_validation(validator: Validator, samplesheet: str, incremental: bool) -> tuple:
+    """
+    Validate the samplesheet, returning the time taken and the result
+    """
+    start = time.perf_counter()
+    result = validator.validate(samplesheet, incremental=incremental)
+    elapsed = time.perf_counter() - start
+    result.close_logger()
+    return elapsed, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--rows", type=int, default=3072, help="Number of [Data] rows")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tempdir:
+        sample_names = valid_sample_names(args.rows)
+        samplesheet = write_illumina_samplesheet(tempdir, sample_names)
+        validator = Validator(**BENCHMARK_VALIDATOR_ARGS, logdir=tempdir)
+        first_time, _ = time_validation(validator, samplesheet, True)
+        sample_names[args.rows // 2] = sample_names[args.rows // 2].replace("_", "-", 1)
+        write_illumina_samplesheet(tempdir, sample_names)  # Overwrites the samplesheet
+        full_time, full_result = time_validation(validator, samplesheet, False)
+        incremental_time, incremental_result = time_validation(validator, samplesheet, True)
+        assert incremental_result.errors_dict == full_result.errors_dict
+        assert incremental_result.verdict_cache.reused_verdicts == args.rows - 1
+        print(f"{args.rows} rows, first validation (saving verdicts): {first_time * 1000:8.1f} ms")
+        print(f"{args.rows} rows, one row edited, full validation:    {full_time * 1000:8.1f} ms")
+        print(f"{args.rows} rows, one row edited, incremental:        {incremental_time * 1000:8.1f} ms")
+        print(f"Speed-up: {full_time / incremental_time:.1f}x")
@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+# coding=utf-8
+"""
+Benchmark of the index collision check on plates of 384-3,072 samples. Compares the bit-packed,
+pigeonhole-bucketed search against comparing every pair of barcodes base by base.
+
+Usage (from the repository root):
+    python3 -m benchmarks.bench_index_collisions [-n 384 1536 3072]
+"""
+import time
+import argparse
+import itertools
+from samplesheet_validator.barcodes import find_index_collisions
+from samplesheet_validator.config import MIN_INDEX_DISTANCE
+from .samplesheets import barcodes
+
+
+def all_pairs_collisions(barcode_list: list, threshold: int) -> list:
+    """
+    Compare every pair of barcodes base by base
+    """
+    collisions = []
+    for (key_a, barcode_a), (key_b, barcode_b) in itertools.combinations(barcode_list, 2):
+        distance = sum(a != b for a, b in zip(barcode_a, barcode_b))
+        if distance < threshold:
+            collisions.append((key_a, key_b, distance))
+    return collisions
+
+
+def time_function(function, barcode_list: list) -> tuple:
+    """
+    Time a collision search, returning the time taken and the collisions found
+    """
+    start = time.perf_counter()
+    collisions = function(barcode_list, MIN_INDEX_DISTANCE)
+    return time.perf_counter() - start, collisions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-n", "--samples", type=int, nargs="+", default=[384, 1536, 3072],
+        help="Numbers of samples",
+    )
+    args = parser.parse_args()
+    for samples in args.samples:
+        # Combined index and index2, with one deliberate collision
+        barcode_list = list(
+            enumerate(map("".join, zip(barcodes(samples), barcodes(samples, seed=1))))
+        )
+        barcode_list.append((samples, barcode_list[0][1]))
+        all_pairs_time, all_pairs = time_function(all_pairs_collisions, barcode_list)
+        bucketed_time, bucketed = time_function(find_index_collisions, barcode_list)
+        assert sorted(all_pairs) == sorted(bucketed)
+        print(f"{samples} samples, all pairs: {all_pairs_time * 1000:8.1f} ms")
+        print(f"{samples} samples, bucketed:  {bucketed_time * 1000:8.1f} ms")
+        print(f"Speed-up: {all_pairs_time / bucketed_time:.1f}x")
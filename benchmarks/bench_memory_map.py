@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+# coding=utf-8
+"""
+Benchmark of parsing a very large samplesheet from a memory map, decoding only the validated
+fields, against reading it into a list of lines. Compares the time and peak Python memory
+allocated while parsing the [Data] section.
+
+Usage (from the repository root):
+    python3 -m benchmarks.bench_memory_map [-n 100000]
+"""
+import time
+import argparse
+import tempfile
+import tracemalloc
+from samplesheet_validator.samplesheet_validator import Validator, ValidationResult
+from .samplesheets import (
+    BENCHMARK_VALIDATOR_ARGS,
+    valid_sample_names,
+    write_illumina_samplesheet,
+)
+
+
+def time_parse(validator: Validator, samplesheet: str, memory_map: bool) -> tuple:
+    """
+    Parse the data section, returning the time taken and the peak memory allocated
+    """
+    result = ValidationResult(validator, samplesheet, True, "", memory_map=memory_map)
+    tracemalloc.start()
+    start = time.perf_counter()
+    result.get_data_section()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    result.close_logger()
+    return elapsed, peak
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--rows", type=int, default=100000, help="Number of [Data] rows")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tempdir:
+        samplesheet = write_illumina_samplesheet(tempdir, valid_sample_names(args.rows))
+        validator = Validator(**BENCHMARK_VALIDATOR_ARGS, logdir=tempdir)
+        for label, memory_map in [("lines", False), ("memory map", True)]:
+            elapsed, peak = time_parse(validator, samplesheet, memory_map)
+            print(
+                f"{args.rows} rows, {label:10}: {elapsed * 1000:8.1f} ms, "
+                f"peak {peak / 2**20:6.1f} MiB"
+            )
@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+# coding=utf-8
+"""
+Benchmark of recording per-sample results for a batch of samplesheets. One samplesheet is
+validated, and its sample row verdicts are recorded once per samplesheet in the batch: row by row
+(a commit per sample), in one transaction per samplesheet (batch_size=1, as by pool workers), and
+buffered across samplesheets (the default batch size).
+
+Usage (from the repository root):
+    python3 -m benchmarks.bench_results_store [-n 96] [-s 1000]
+"""
+import os
+import time
+import argparse
+import tempfile
+from samplesheet_validator.results_store import ResultsStore
+from samplesheet_validator.samplesheet_validator import Validator, ValidationResult
+from .samplesheets import (
+    BENCHMARK_VALIDATOR_ARGS,
+    valid_sample_names,
+    write_illumina_samplesheet,
+)
+
+
+def time_row_by_row(store_path: str, result, verdicts: list, samplesheets: int) -> float:
+    """
+    Record each row with its own insert and commit
+    """
+    store = ResultsStore(store_path)
+    start = time.perf_counter()
+    for _ in range(samplesheets):
+        for row in store.get_rows(result, verdicts):
+            with store.connection:
+                store.connection.execute(
+                    "INSERT INTO sample_results VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row
+                )
+    elapsed = time.perf_counter() - start
+    store.close()
+    return elapsed
+
+
+def time_store(
+    store_path: str, result, verdicts: list, samplesheets: int, batch_size: int
+) -> float:
+    """
+    Record the rows of each samplesheet with the results store
+    """
+    store = ResultsStore(store_path, batch_size)
+    start = time.perf_counter()
+    for _ in range(samplesheets):
+        store.add_result(result, verdicts)
+    store.close()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--samplesheets", type=int, default=96, help="Number of samplesheets")
+    parser.add_argument("-s", "--samples", type=int, default=1000, help="Samples per samplesheet")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tempdir:
+        samplesheet = write_illumina_samplesheet(tempdir, valid_sample_names(args.samples))
+        validator = Validator(**BENCHMARK_VALIDATOR_ARGS, logdir=tempdir)
+        result = ValidationResult(validator, samplesheet, True, "")
+        verdicts = list(result.iter_sample_verdicts())
+        result.close_logger()
+        row_time = time_row_by_row(
+            os.path.join(tempdir, "rows.db"), result, verdicts, args.samplesheets
+        )
+        samplesheet_time = time_store(
+            os.path.join(tempdir, "samplesheets.db"), result, verdicts, args.samplesheets, 1
+        )
+        buffered_time = time_store(
+            os.path.join(tempdir, "buffered.db"), result, verdicts, args.samplesheets, 5000
+        )
+        rows = args.samplesheets * len(verdicts)
+        print(f"{rows} rows, commit per row:          {row_time * 1000:8.1f} ms")
+        print(f"{rows} rows, commit per samplesheet:  {samplesheet_time * 1000:8.1f} ms")
+        print(f"{rows} rows, buffered (batch 5000):   {buffered_time * 1000:8.1f} ms")
+        print(f"Speed-up, buffered vs per row: {row_time / buffered_time:.1f}x")
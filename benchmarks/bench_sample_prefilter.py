@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+# coding=utf-8
+"""
+Benchmark of the seglh-naming structural prefilter on 100%-invalid samplesheets (as from a
+wrong-format export). The sample name check parses every name, so validation reports the same
+errors with or without the prefilter. The prefilter skips parsing names that can never be
+parsed when looking up the sample keys of reused row verdicts for the cross-run sample index,
+so this lookup is timed with the prefilter against passing every name to the seglh-naming
+parser, which raises an exception for each.
+
+Usage (from the repository root):
+    python3 -m benchmarks.bench_sample_prefilter [-n 10000]
+"""
+import re
+import time
+import argparse
+import tempfile
+from samplesheet_validator.samplesheet_validator import Validator
+from samplesheet_validator.sample_index import get_sample_key
+from .samplesheets import (
+    BENCHMARK_VALIDATOR_ARGS,
+    invalid_sample_names,
+    write_illumina_samplesheet,
+)
+
+
+def time_sample_keys(validator: Validator, samplesheet: str) -> tuple:
+    """
+    Validate the samplesheet, then time looking up the sample key of every sample name as for
+    reused row verdicts (whose sample names have not been parsed), returning the time taken
+    and the result
+    """
+    result = validator.validate(samplesheet)
+    result.close_logger()
+    result.sample_objs = {}
+    start = time.perf_counter()
+    for sample in result.samples["Sample_Name"]:
+        get_sample_key(result, sample)
+    elapsed = time.perf_counter() - start
+    return elapsed, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--rows", type=int, default=10000, help="Number of [Data] rows")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tempdir:
+        samplesheet = write_illumina_samplesheet(tempdir, invalid_sample_names(args.rows))
+        validator = Validator(**BENCHMARK_VALIDATOR_ARGS, logdir=tempdir)
+        # Equivalent Validator whose prefilter passes every name to the parser
+        no_prefilter = Validator(**BENCHMARK_VALIDATOR_ARGS, logdir=tempdir)
+        object.__setattr__(no_prefilter, "sample_name_prefilter", re.compile(""))
+        parser_time, parser_result = time_sample_keys(no_prefilter, samplesheet)
+        prefilter_time, prefilter_result = time_sample_keys(validator, samplesheet)
+        assert parser_result.errors and prefilter_result.errors
+        assert parser_result.errors_dict == prefilter_result.errors_dict
+        print(f"{args.rows} invalid rows, sample keys, parser only:     {parser_time * 1000:8.1f} ms")
+        print(f"{args.rows} invalid rows, sample keys, with prefilter:  {prefilter_time * 1000:8.1f} ms")
+        print(f"Speed-up: {parser_time / prefilter_time:.1f}x")
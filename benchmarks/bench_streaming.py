@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+# coding=utf-8
+"""
+Benchmark of validating a samplesheet as it is uploaded. The upload is simulated by feeding
+64 KiB chunks. Compares the latency after the last chunk arrives (the time the user waits once
+their upload completes) when the samplesheet is buffered and then validated, and when it is
+validated as it streams in.
+
+Usage (from the repository root):
+    python3 -m benchmarks.bench_streaming [-n 10000] [-c 65536]
+"""
+import io
+import time
+import argparse
+import tempfile
+from samplesheet_validator.samplesheet_validator import Validator
+from .samplesheets import (
+    BENCHMARK_VALIDATOR_ARGS,
+    valid_sample_names,
+    write_illumina_samplesheet,
+)
+
+
+def buffered_latency(validator: Validator, name: str, chunks: list) -> tuple:
+    """
+    Buffer the chunks, then validate the samplesheet once the last chunk has arrived
+    """
+    buffer = io.BytesIO()
+    for chunk in chunks:
+        buffer.write(chunk)
+    start = time.perf_counter()
+    buffer.seek(0)
+    result = validator.validate(buffer, samplesheet_name=name)
+    latency = time.perf_counter() - start
+    result.close_logger()
+    return latency, result
+
+
+def streamed_latency(validator: Validator, name: str, chunks: list) -> tuple:
+    """
+    Feed the chunks as they arrive, then close the validation once the last chunk has arrived,
+    returning the latency after the last chunk and the time spent validating during the upload
+    """
+    start = time.perf_counter()
+    result = validator.stream(name)
+    for chunk in chunks:
+        result.feed(chunk)
+    overlapped = time.perf_counter() - start
+    start = time.perf_counter()
+    result.close()
+    latency = time.perf_counter() - start
+    result.close_logger()
+    return latency, overlapped, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--rows", type=int, default=10000, help="Number of [Data] rows")
+    parser.add_argument("-c", "--chunk_size", type=int, default=65536, help="Chunk size (bytes)")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tempdir:
+        samplesheet = write_illumina_samplesheet(tempdir, valid_sample_names(args.rows))
+        with open(samplesheet, "rb") as samplesheet_stream:
+            contents = samplesheet_stream.read()
+        chunks = [
+            contents[start : start + args.chunk_size]
+            for start in range(0, len(contents), args.chunk_size)
+        ]
+        validator = Validator(**BENCHMARK_VALIDATOR_ARGS, logdir=tempdir)
+        buffered_time, buffered_result = buffered_latency(validator, samplesheet, chunks)
+        streamed_time, overlapped_time, streamed_result = streamed_latency(
+            validator, samplesheet, chunks
+        )
+        assert streamed_result.errors_dict == buffered_result.errors_dict
+        print(f"{args.rows} rows in {len(chunks)} chunks")
+        print(f"Buffered, latency after upload:    {buffered_time * 1000:8.1f} ms")
+        print(f"Streamed, validated during upload: {overlapped_time * 1000:8.1f} ms")
+        print(f"Streamed, latency after upload:    {streamed_time * 1000:8.1f} ms")
@@ -0,0 +1,97 @@
+""" samplesheets.py
+
+Generators of large samplesheets for the benchmark scripts
+"""
+import os
+import random
+
+ILLUMINA_PREAMBLE = [
+    "[Header],,,,,,,,,",
+    "IEMFileVersion,4,,,,,,,,",
+    "Investigator Name,NGS432,,,,,,,,",
+    "Experiment Name,NGS432,,,,,,,,",
+    "Date,17/09/2021,,,,,,,,",
+    "Workflow,GenerateFASTQ,,,,,,,,",
+    "Application,NextSeq FASTQ Only,,,,,,,,",
+    "Assay,Nextera XT,,,,,,,,",
+    "Description,NGS432,,,,,,,,",
+    "Chemistry,Amplicon,,,,,,,,",
+    ",,,,,,,,,",
+    "[Reads],,,,,,,,,",
+    "149,,,,,,,,,",
+    "149,,,,,,,,,",
+    ",,,,,,,,,",
+    "[Settings],,,,,,,,,",
+    ",,,,,,,,,",
+    "[Data],,,,,,,,,",
+    "Sample_ID,Sample_Name,Sample_Plate,Sample_Well,I7_Index_ID,index,I5_Index_ID,index2,"
+    "Sample_Project,Description",
+]
+# Illumina samplesheet name whose sequencer ID is in BENCHMARK_VALIDATOR_ARGS
+ILLUMINA_NAME = "210917_NB551068_{:04d}_AH3YNFAFX3_SampleSheet.csv"
+BENCHMARK_VALIDATOR_ARGS = {
+    "sequencer_ids": ["NB551068"],
+    "panels": ["Pan4822", "Pan4119"],
+    "tso_panels": ["Pan5085"],
+    "okd_panels": ["Pan5226"],
+    "dev_pannos": ["Pan5180"],
+}
+
+
+def valid_sample_names(count: int) -> list:
+    """
+    Valid seglh-naming sample names
+        :param count (int): Number of names
+        :return (list):     Sample names
+    """
+    return [
+        f"NGS432_{i % 100:02d}_{100000 + i}_AB_F_VCP1R134StG_Pan4822" for i in range(count)
+    ]
+
+
+def invalid_sample_names(count: int) -> list:
+    """
+    Sample names as found in a wrong-format export, which never match the seglh-naming
+    structure
+        :param count (int): Number of names
+        :return (list):     Sample names
+    """
+    return [f"Sample{i}-Pan4822" for i in range(count)]
+
+
+def barcodes(count: int, length: int = 10, seed: int = 0) -> list:
+    """
+    Distinct random barcodes of the given length. Barcodes are random (rather than sequential)
+    so that, as on real plates, they are well separated and do not collide
+        :param count (int):     Number of barcodes
+        :param length (int):    Barcode length
+        :param seed (int):      Random seed, so that runs are reproducible
+        :return (list):         Barcodes
+    """
+    rng = random.Random(seed)
+    distinct = {}
+    while len(distinct) < count:
+        distinct.setdefault("".join(rng.choices("ACGT", k=length)), None)
+    return list(distinct)
+
+
+def write_illumina_samplesheet(
+    dirpath: str, sample_names: list, number: int = 1, line_ending: str = "\n"
+) -> str:
+    """
+    Write an Illumina samplesheet with a [Data] row for each sample name
+        :param dirpath (str):       Directory to write the samplesheet to
+        :param sample_names (list): Sample names, used for both Sample_ID and Sample_Name
+        :param number (int):        Autoincrementing number used in the samplesheet name
+        :param line_ending (str):   Line ending to write
+        :return (str):              Samplesheet path
+    """
+    path = os.path.join(dirpath, ILLUMINA_NAME.format(number))
+    index_pairs = zip(barcodes(len(sample_names)), barcodes(len(sample_names), seed=1))
+    with open(path, "w", newline="") as samplesheet:
+        samplesheet.write(line_ending.join(ILLUMINA_PREAMBLE) + line_ending)
+        for sample_name, (index, index2) in zip(sample_names, index_pairs):
+            samplesheet.write(
+                f"{sample_name},{sample_name},,,,{index},,{index2},,{line_ending}"
+            )
+    return path
@@ -1,10 +1,15 @@
 import os
 import sys
+import json
 import logging
 import argparse
-from .samplesheet_validator import SamplesheetCheck
+from .samplesheet_validator import Validator
+from .profiles import ValidatorProfiles
+from .results_store import ResultsStore
+from .content_store import ContentStore
+from .sample_index import SampleIndex
 from .ss_logger import set_root_logger
-from .config import LOGGING_FORMATTER
+from .config import LOGGING_FORMATTER, CONFIG_KEYS, SAMPLE_INDEX_WINDOW_DAYS
 
 
 def get_arguments():
@@ -27,39 +32,51 @@ def get_arguments():
         required=True,
         help="Path to samplesheet requiring validation",
     )
+    parser.add_argument(
+        "-C",
+        "--config",
+        type=lambda x: is_valid_file(parser, x),
+        required=False,
+        help=(
+            "JSON configuration file containing the sequencer_ids, panels, tso_panels, okd_panels "
+            "and dev_pannos lists, or named profiles of these lists (the profile is selected from "
+            "the sequencer ID). Required if these are not all supplied as arguments, and cannot "
+            "be combined with them"
+        ),
+    )
     parser.add_argument(
         "-SI",
         "--sequencer_ids",
         type=lambda s: [i for i in s.split(',')],
-        required=True,
+        required=False,
         help="Comma separated string of allowed sequencer IDS",
     )
     parser.add_argument(
         "-P",
         "--panels",
         type=lambda s: [i for i in s.split(',')],
-        required=True,
+        required=False,
         help="Comma separated string of allowed panel numbers",
     )
     parser.add_argument(
         "-T",
         "--tso_panels",
         type=lambda s: [i for i in s.split(',')],
-        required=True,
+        required=False,
         help="Comma separated string of tso panels",
     )
     parser.add_argument(
         "-O",
         "--okd_panels",
         type=lambda s: [i for i in s.split(',')],
-        required=True,
+        required=False,
         help="Comma separated string of allowed okd numbers",
     )
     parser.add_argument(
         "-D",
         "--dev_pannos",
         type=lambda s: [i for i in s.split(',')],
-        required=True,
+        required=False,
         help="Comma separated string of development pan numbers",
     )
     parser.add_argument(
@@ -69,6 +86,27 @@ def get_arguments():
         required=True,
         help="Directory to save the output logfile to",
     )
+    parser.add_argument(
+        "-MD",
+        "--md_dir",
+        type=lambda x: is_valid_dir(parser, x),
+        required=False,
+        help=(
+            "MasterDataFile directory. If given, the run is checked for a MasterDataFile in the "
+            "directory (overrides any md_dir in the configuration file)"
+        ),
+    )
+    parser.add_argument(
+        "-RF",
+        "--check_run_files",
+        action="store_true",
+        required=False,
+        help=(
+            "Provide flag to cross-check the instrument, flowcell and read lengths of the "
+            "samplesheet against the run files (RunInfo.xml, RunParameters.xml/json) in its "
+            "runfolder"
+        ),
+    )
     parser.add_argument(
         "-NSH",
         "--no_stream_handler",
@@ -79,13 +117,76 @@ def get_arguments():
             "to terminal if using another logging instance)"
         ),
     ),
+    parser.add_argument(
+        "-M",
+        "--memory_map",
+        action="store_true",
+        required=False,
+        help=(
+            "Provide flag to parse the samplesheet from a memory map of the file, decoding only the "
+            "validated fields (for very large samplesheets or samplesheets on slow storage)"
+        ),
+    )
+    parser.add_argument(
+        "-I",
+        "--incremental",
+        action="store_true",
+        required=False,
+        help=(
+            "Provide flag to only re-validate sample rows changed since the previous validation of "
+            "the runfolder, reusing the verdicts saved in the log directory for the rest"
+        ),
+    )
+    parser.add_argument(
+        "-RS",
+        "--results_store",
+        required=False,
+        help=(
+            "sqlite file to record the per-sample results (run, line, sample, pan number, "
+            "classification and error codes) in, for analytics across runs"
+        ),
+    )
+    parser.add_argument(
+        "-CS",
+        "--content_store",
+        required=False,
+        help=(
+            "sqlite file storing the outcomes of validated samplesheet contents, so that "
+            "samplesheets with contents already validated are answered from the store"
+        ),
+    )
+    parser.add_argument(
+        "-SX",
+        "--sample_index",
+        required=False,
+        help=(
+            "sqlite file indexing the samples of recently validated runs, to report samples also "
+            "booked on another run validated within the last "
+            f"{SAMPLE_INDEX_WINDOW_DAYS} days"
+        ),
+    )
     parser.add_argument(
         "-R",
         "--runname",
         required=True,
         help="Run folder name",
     )
-    return parser.parse_args()
+    parsed_args = parser.parse_args()
+    config_key_args = [key for key in CONFIG_KEYS if getattr(parsed_args, key)]
+    if parsed_args.config and config_key_args:
+        parser.error(
+            "--config cannot be combined with "
+            + ", ".join(f"--{key}" for key in config_key_args)
+            + ", which would be ignored"
+        )
+    if not parsed_args.config and not all(
+        getattr(parsed_args, key) for key in CONFIG_KEYS
+    ):
+        parser.error(
+            "Either --config or all of --sequencer_ids, --panels, --tso_panels, "
+            "--okd_panels and --dev_pannos are required"
+        )
+    return parsed_args
 
 
 def is_valid_file(parser: argparse.ArgumentParser, file: str) -> str:
@@ -121,15 +222,46 @@ if __name__ == "__main__":
         ILLUMINA = True
     else:
         ILLUMINA = False
-    sscheck_obj = SamplesheetCheck(
+    if parsed_args.config:
+        with open(parsed_args.config, "r") as config_file:
+            validator_config = json.load(config_file)
+        if parsed_args.md_dir:
+            validator_config["md_dir"] = parsed_args.md_dir
+        if parsed_args.check_run_files:
+            validator_config["check_run_files"] = True
+        validator = ValidatorProfiles.from_config(validator_config, parsed_args.logdir)
+    else:
+        validator = Validator(
+            parsed_args.sequencer_ids,
+            parsed_args.panels,
+            parsed_args.tso_panels,
+            parsed_args.okd_panels,
+            parsed_args.dev_pannos,
+            parsed_args.logdir,
+            md_dir=parsed_args.md_dir,
+            check_run_files=parsed_args.check_run_files,
+        )
+    results_store = (
+        ResultsStore(parsed_args.results_store) if parsed_args.results_store else None
+    )
+    content_store = (
+        ContentStore(parsed_args.content_store) if parsed_args.content_store else None
+    )
+    sample_index = SampleIndex(parsed_args.sample_index) if parsed_args.sample_index else None
+    # Carry out samplesheeet validation
+    validator.validate(
         parsed_args.samplesheet_path,
-        parsed_args.sequencer_ids,
-        parsed_args.panels,
-        parsed_args.tso_panels,
-        parsed_args.okd_panels,
-        parsed_args.dev_pannos,
-        parsed_args.logdir,
         ILLUMINA,
-        parsed_args.runname
+        parsed_args.runname,
+        memory_map=parsed_args.memory_map,
+        incremental=parsed_args.incremental,
+        results_store=results_store,
+        content_store=content_store,
+        sample_index=sample_index,
     )
-    sscheck_obj.ss_checks()  # Carry out samplesheeet validation
+    if results_store is not None:
+        results_store.close()
+    if content_store is not None:
+        content_store.close()
+    if sample_index is not None:
+        sample_index.close()
@@ -0,0 +1,341 @@
+""" archive.py
+
+Resumable re-validation of archived samplesheets, e.g. to assess the impact of a change to the
+panel lists. Samplesheets are found under the archive roots as by scanner.RunScanner, and
+validated across a process pool (see pool.py) with the same checks as SamplesheetCheck:
+
+- The outcome of each samplesheet is recorded in a sqlite checkpoint as soon as it completes, so
+  a re-validation that is interrupted resumes from the samplesheets not yet validated
+- A checkpoint is tied to the configuration it was made with, and cannot be resumed with another
+- The outcomes are aggregated into a report of the samplesheets raising each error category, and
+  the samples and errors of each pan number
+
+Usage (from the repository root):
+    python3 -m samplesheet_validator.archive -d /archive/runs -C config.json -L logdir -c checkpoint.db
+"""
+import json
+import sqlite3
+import argparse
+import multiprocessing.pool
+from typing import Union
+from . import config
+from .pool import get_pool, get_worker_validator
+from .samplesheet_validator import Validator, ValidationResult
+from .profiles import ValidatorProfiles
+from .scanner import RunScanner
+
+
+def revalidate_in_worker(job: tuple) -> tuple:
+    """
+    Validate an archived samplesheet using this worker's Validator, counting the samples and
+    errors of each pan number from the sample row verdicts. Exceptions are recorded as the
+    outcome, so that one unreadable samplesheet does not stop the re-validation
+        :param job (tuple):     Samplesheet path, Illumina or not, and run name
+        :return (tuple):        Samplesheet path, and the summary of the validation outcome with
+                                the pan number counts
+    """
+    samplesheet_path, illumina, runname = job
+    try:
+        result = ValidationResult(
+            get_worker_validator(samplesheet_path, illumina),
+            samplesheet_path,
+            illumina,
+            runname,
+        )
+        try:
+            pannumber_counts = {}
+            for verdict in result.iter_sample_verdicts():
+                count_verdict(pannumber_counts, verdict)
+        finally:
+            result.close_logger()
+        return samplesheet_path, {**result.get_summary(), "pannumbers": pannumber_counts}
+    except Exception as exception:
+        return samplesheet_path, {
+            "samplesheet_path": samplesheet_path,
+            "errors": True,
+            "errors_dict": {config.ARCHIVE_EXCEPTION_ERROR: [repr(exception)]},
+            "dev_run": False,
+            "pannumbers": {},
+        }
+
+
+def count_verdict(pannumber_counts: dict, verdict: dict) -> None:
+    """
+    Add a sample row verdict to the sample and error counts of its pan number
+        :param pannumber_counts (dict): Sample and error counts of each pan number
+        :param verdict (dict):          Sample row verdict, from iter_sample_verdicts()
+        :return None:
+    """
+    counts = pannumber_counts.setdefault(
+        verdict["pannumber"] or config.ARCHIVE_UNKNOWN_PANNUMBER,
+        {"samples": 0, "samples_with_errors": 0, "errors": {}},
+    )
+    counts["samples"] += 1
+    if verdict["errors"]:
+        counts["samples_with_errors"] += 1
+        for error_type in verdict["errors"]:
+            counts["errors"][error_type] = counts["errors"].get(error_type, 0) + 1
+
+
+class ArchiveRevalidation:
+    """
+    Re-validates the samplesheets under archive roots, recording each outcome in a sqlite
+    checkpoint so that an interrupted re-validation can be resumed
+
+    Attributes:
+        validator (Validator | ValidatorProfiles):  Validator to use
+        checkpoint_path (str):                      sqlite checkpoint file
+        max_depth (int):                            Number of directory levels below each root
+                                                    searched for samplesheets
+        connection (sqlite3.Connection):            Connection to the checkpoint
+        revalidated (int):                          Number of samplesheets validated by the last
+                                                    run (excluding those already checkpointed)
+
+    Methods:
+        open_checkpoint()
+            Open the checkpoint, checking it was made with the same configuration
+        get_completed()
+            Get the samplesheets already in the checkpoint
+        run(roots, pool, processes)
+            Validate the samplesheets under the archive roots not yet in the checkpoint
+        checkpoint_outcomes(run_pool, jobs)
+            Validate samplesheets across a pool, committing each outcome as it completes
+        get_report()
+            Aggregate the outcomes in the checkpoint by error category and pan number
+        close()
+            Close the checkpoint
+    """
+
+    def __init__(
+        self,
+        validator: Union[Validator, ValidatorProfiles],
+        checkpoint_path: str,
+        max_depth: int = config.SCAN_MAX_DEPTH,
+    ):
+        """
+        Constructor for the ArchiveRevalidation class
+            :param validator (Validator | ValidatorProfiles):   Validator to use
+            :param checkpoint_path (str):                       sqlite checkpoint file, created
+                                                                if it does not exist
+            :param max_depth (int):                             Number of directory levels below
+                                                                each root searched
+        """
+        self.validator = validator
+        self.checkpoint_path = checkpoint_path
+        self.max_depth = max_depth
+        self.revalidated = 0
+        self.connection = self.open_checkpoint()
+
+    def open_checkpoint(self) -> sqlite3.Connection:
+        """
+        Open the checkpoint, creating its tables if needed. A checkpoint made with a different
+        configuration is not resumed, as its outcomes would not be comparable
+            :return connection (sqlite3.Connection):    Connection to the checkpoint
+        """
+        connection = sqlite3.connect(self.checkpoint_path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint_config (config_digest TEXT NOT NULL)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS outcomes "
+            "(samplesheet_path TEXT PRIMARY KEY, outcome TEXT NOT NULL)"
+        )
+        row = connection.execute("SELECT config_digest FROM checkpoint_config").fetchone()
+        if row is None:
+            with connection:
+                connection.execute(
+                    "INSERT INTO checkpoint_config VALUES (?)", (self.validator.config_digest,)
+                )
+        elif row[0] != self.validator.config_digest:
+            connection.close()
+            raise ValueError(
+                f"Checkpoint {self.checkpoint_path} was made with a different configuration"
+            )
+        return connection
+
+    def get_completed(self) -> set:
+        """
+        Get the samplesheets already in the checkpoint
+            :return (set):  Paths of the samplesheets already validated
+        """
+        return {
+            samplesheet_path
+            for (samplesheet_path,) in self.connection.execute(
+                "SELECT samplesheet_path FROM outcomes"
+            )
+        }
+
+    def run(
+        self,
+        roots: list,
+        pool: Union[multiprocessing.pool.Pool, None] = None,
+        processes: Union[int, None] = None,
+    ) -> dict:
+        """
+        Validate the samplesheets under the archive roots that are not yet in the checkpoint,
+        committing each outcome as it completes, then report on every outcome in the checkpoint
+            :param roots (list):            Archive roots
+            :param pool (Pool | None):      Shared pool, from pool.get_pool(self.validator). A
+                                            pool is created for the run if None
+            :param processes (int | None):  Number of worker processes of the created pool.
+                                            Defaults to the CPU count
+            :return report (dict):          Report, as from get_report()
+        """
+        scanner = RunScanner(max_depth=self.max_depth)
+        completed = self.get_completed()
+        jobs = [
+            (samplesheet_path, *scanner.get_run(samplesheet_path))
+            for samplesheet_path, _ in scanner.scan(roots)
+            if samplesheet_path not in completed
+        ]
+        self.revalidated = 0
+        if jobs:
+            if pool is None:
+                with get_pool(self.validator, processes) as run_pool:
+                    self.checkpoint_outcomes(run_pool, jobs)
+            else:
+                self.checkpoint_outcomes(pool, jobs)
+        return self.get_report()
+
+    def checkpoint_outcomes(self, run_pool: multiprocessing.pool.Pool, jobs: list) -> None:
+        """
+        Validate the samplesheets across the pool, committing each outcome to the checkpoint
+        as soon as it completes
+            :param run_pool (Pool): Process pool, from pool.get_pool(self.validator)
+            :param jobs (list):     Samplesheet path, Illumina or not, and run name of each
+                                    samplesheet
+            :return None:
+        """
+        for samplesheet_path, outcome in run_pool.imap_unordered(revalidate_in_worker, jobs):
+            with self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO outcomes VALUES (?, ?)",
+                    (samplesheet_path, json.dumps(outcome)),
+                )
+            self.revalidated += 1
+
+    def get_report(self) -> dict:
+        """
+        Aggregate the outcomes in the checkpoint into the number of samplesheets raising each
+        error category (and the number of errors), and the number of samples, samples with
+        errors and errors of each type for each pan number
+            :return report (dict):  Aggregated report
+        """
+        report = {
+            "samplesheets": 0,
+            "samplesheets_with_errors": 0,
+            "development_runs": 0,
+            "error_categories": {},
+            "pannumbers": {},
+        }
+        for (outcome,) in self.connection.execute("SELECT outcome FROM outcomes"):
+            outcome = json.loads(outcome)
+            report["samplesheets"] += 1
+            report["samplesheets_with_errors"] += bool(outcome["errors"])
+            report["development_runs"] += bool(outcome["dev_run"])
+            for error_type, messages in outcome["errors_dict"].items():
+                category = report["error_categories"].setdefault(
+                    error_type, {"samplesheets": 0, "errors": 0}
+                )
+                category["samplesheets"] += 1
+                category["errors"] += len(messages)
+            for pannumber, counts in outcome["pannumbers"].items():
+                totals = report["pannumbers"].setdefault(
+                    pannumber, {"samples": 0, "samples_with_errors": 0, "errors": {}}
+                )
+                totals["samples"] += counts["samples"]
+                totals["samples_with_errors"] += counts["samples_with_errors"]
+                for error_type, count in counts["errors"].items():
+                    totals["errors"][error_type] = totals["errors"].get(error_type, 0) + count
+        report["error_categories"] = dict(sorted(report["error_categories"].items()))
+        report["pannumbers"] = dict(sorted(report["pannumbers"].items()))
+        return report
+
+    def close(self) -> None:
+        """
+        Close the checkpoint
+            :return None:
+        """
+        self.connection.close()
+
+
+def get_arguments() -> argparse.Namespace:
+    """
+    Uses argparse module to define and handle command line input arguments and help menu
+        :return argparse.Namespace (object):    Contains the parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description=(
+            "Re-validate the archived samplesheets under archive roots, resuming from a "
+            "checkpoint, and report the errors by error category and pan number"
+        ),
+    )
+    parser.add_argument(
+        "-d",
+        "--archive_roots",
+        nargs="+",
+        required=True,
+        help="Archive roots to search for samplesheets",
+    )
+    parser.add_argument(
+        "-C",
+        "--config",
+        required=True,
+        help=(
+            "JSON configuration file containing the sequencer_ids, panels, tso_panels, okd_panels "
+            "and dev_pannos lists, or named profiles of these lists"
+        ),
+    )
+    parser.add_argument(
+        "-L",
+        "--logdir",
+        required=True,
+        help="Directory to save the output logfiles to",
+    )
+    parser.add_argument(
+        "-c",
+        "--checkpoint",
+        required=True,
+        help="sqlite checkpoint file, resumed if it exists",
+    )
+    parser.add_argument(
+        "-o",
+        "--report",
+        required=False,
+        help="JSON file to write the report to (printed if not supplied)",
+    )
+    parser.add_argument(
+        "-p",
+        "--processes",
+        type=int,
+        required=False,
+        help="Number of worker processes (defaults to the CPU count)",
+    )
+    parser.add_argument(
+        "--max_depth",
+        type=int,
+        default=config.SCAN_MAX_DEPTH,
+        help="Number of directory levels below each archive root searched for samplesheets",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    parsed_args = get_arguments()
+    revalidation = ArchiveRevalidation(
+        ValidatorProfiles.from_config_file(parsed_args.config, parsed_args.logdir),
+        parsed_args.checkpoint,
+        parsed_args.max_depth,
+    )
+    try:
+        archive_report = revalidation.run(
+            parsed_args.archive_roots, processes=parsed_args.processes
+        )
+    finally:
+        revalidation.close()
+    if parsed_args.report:
+        with open(parsed_args.report, "w") as report_file:
+            json.dump(archive_report, report_file, indent=4)
+    else:
+        print(json.dumps(archive_report, indent=4))
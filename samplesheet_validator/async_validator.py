@@ -0,0 +1,103 @@
+""" async_validator.py
+
+Asyncio entry point for samplesheet validation, for callers hosted on an event loop
+(e.g. the upload webapp). Runs the SamplesheetCheck checks without blocking the loop:
+
+- The result (whose logger opens the logfile) is built and the samplesheet is read on the
+  default (thread) executor
+- Sample parsing and validation are run on the supplied executor
+- Log records are written to the logfile by a queue listener thread rather than by the
+  thread running the checks
+"""
+import asyncio
+import functools
+import concurrent.futures
+from typing import Callable, Union
+from .samplesheet_validator import SamplesheetCheck, Validator, ValidationResult
+
+
+async def run_checks(
+    get_result: Callable[[], ValidationResult],
+    executor: Union[concurrent.futures.Executor, None] = None,
+) -> ValidationResult:
+    """
+    Build a result and carry out its checks on executor threads, keeping the running event
+    loop unblocked
+        :param get_result (Callable):       Returns the result to populate, with queue logging
+        :param executor (Executor | None):  Executor to run the checks on. Defaults to the
+                                            event loop's default executor
+        :return result (ValidationResult):  Validation outcome
+    """
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(None, get_result)
+    try:
+        await loop.run_in_executor(None, result.reader.read_samplesheet)
+        await loop.run_in_executor(executor, result.ss_checks)
+    finally:
+        # Stopping the listener joins its thread, so must also be kept off the loop
+        await loop.run_in_executor(None, result.close_logger)
+    return result
+
+
+async def validate_async(
+    validator: Validator,
+    samplesheet_path: str,
+    illumina: bool,
+    runname: str,
+    executor: Union[concurrent.futures.Executor, None] = None,
+) -> ValidationResult:
+    """
+    Validate a samplesheet against a (shared) Validator without blocking the running event
+    loop. The executor must be thread based, as the ValidationResult is populated in place
+        :param validator (Validator):       Validator holding the configuration
+        :param samplesheet_path (str):      Path to samplesheet
+        :param illumina (bool):             Illumina or not
+        :param runname (str):               Processed run folder name
+        :param executor (Executor | None):  Executor to run the checks on. Defaults to the
+                                            event loop's default executor
+        :return result (ValidationResult):  Validation outcome
+    """
+    return await run_checks(
+        functools.partial(
+            ValidationResult, validator, samplesheet_path, illumina, runname, queue_logging=True
+        ),
+        executor,
+    )
+
+
+async def ss_checks_async(
+    samplesheet_path: str,
+    sequencer_ids: list,
+    panels: list,
+    tso_panels: list,
+    okd_panels: list,
+    dev_pannos: list,
+    logdir: str,
+    illumina: bool,
+    runname: str,
+    executor: Union[concurrent.futures.Executor, None] = None,
+) -> SamplesheetCheck:
+    """
+    Validate a samplesheet without blocking the running event loop. Arguments are as for
+    SamplesheetCheck. Callers validating many samplesheets should build one Validator and
+    use validate_async()
+        :param executor (Executor | None):  Executor to run the checks on. Defaults to the
+                                            event loop's default executor
+        :return sscheck_obj (object):       SamplesheetCheck object with checks carried out
+    """
+    return await run_checks(
+        functools.partial(
+            SamplesheetCheck,
+            samplesheet_path,
+            sequencer_ids,
+            panels,
+            tso_panels,
+            okd_panels,
+            dev_pannos,
+            logdir,
+            illumina,
+            runname,
+            queue_logging=True,
+        ),
+        executor,
+    )
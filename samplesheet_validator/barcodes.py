@@ -0,0 +1,107 @@
+""" barcodes.py
+
+Index (barcode) collision detection. Barcodes are bit-packed into integers (3 bits per base), so the
+Hamming distance between two barcodes is a handful of integer operations. Rather than comparing every
+pair of samples, candidate pairs are found by pigeonhole: if two barcodes differ at fewer than
+threshold positions, then splitting them into threshold segments leaves at least one segment identical.
+Barcodes are bucketed by segment, and only barcodes sharing a bucket are compared, so a plate of
+384-3,072 samples is checked in milliseconds
+"""
+import itertools
+from collections import defaultdict
+
+BITS_PER_BASE = 3
+# Bases are packed as octal digits
+BASE_CODES = {"A": 1, "C": 2, "G": 3, "T": 4, "N": 5}
+BASES = frozenset(BASE_CODES)
+OCTAL_TABLE = str.maketrans({base: str(code) for base, code in BASE_CODES.items()})
+
+
+def is_valid_barcode(barcode: str) -> bool:
+    """
+    Check a barcode contains only the bases ACGTN (in either case)
+        :param barcode (str):   Barcode sequence
+        :return (bool):         True if the barcode contains only ACGTN
+    """
+    return set(barcode.upper()) <= BASES
+
+
+def pack_barcode(barcode: str) -> int:
+    """
+    Pack a barcode into an integer, 3 bits per base. Raises ValueError if the barcode contains
+    characters other than ACGTN
+        :param barcode (str):   Barcode sequence
+        :return (int):          Packed barcode
+    """
+    if not is_valid_barcode(barcode):
+        raise ValueError(f"Barcode contains characters other than ACGTN: {barcode!r}")
+    return int(barcode.upper().translate(OCTAL_TABLE) or "0", 8)
+
+
+def hamming_distance(packed_a: int, packed_b: int, position_mask: int) -> int:
+    """
+    Hamming distance between two packed barcodes of the same length. Any differing bit in a
+    base is folded onto the lowest bit of that base, and the folded bits are counted
+        :param packed_a (int):          Packed barcode
+        :param packed_b (int):          Packed barcode
+        :param position_mask (int):     Mask with the lowest bit of each base set
+        :return (int):                  Number of differing bases
+    """
+    difference = packed_a ^ packed_b
+    return bin((difference | difference >> 1 | difference >> 2) & position_mask).count("1")
+
+
+def find_index_collisions(barcodes: list, threshold: int) -> list:
+    """
+    Find all pairs of barcodes closer than the threshold Hamming distance. Barcodes are only
+    compared with barcodes of the same length, and barcodes containing characters other than
+    ACGTN are not compared
+        :param barcodes (list):     (key, barcode) tuples, where the barcode is the combined
+                                    index and index2 sequence
+        :param threshold (int):     Pairs with a distance below this are collisions
+        :return (list):             (key_a, key_b, distance) for each collision, ordered by
+                                    distance then by the order of the barcodes
+    """
+    collisions = []
+    if threshold <= 0:
+        return collisions
+    barcodes_by_length = defaultdict(list)
+    for order, (key, barcode) in enumerate(barcodes):
+        if barcode and is_valid_barcode(barcode):
+            barcodes_by_length[len(barcode)].append((order, key, barcode))
+    for length, same_length in barcodes_by_length.items():
+        position_mask = int("1" * length, 8)
+        packed = [pack_barcode(barcode) for _, _, barcode in same_length]
+        for i, j in get_candidate_pairs(
+            [barcode for _, _, barcode in same_length], threshold
+        ):
+            distance = hamming_distance(packed[i], packed[j], position_mask)
+            if distance < threshold:
+                collisions.append(
+                    (distance, same_length[i][0], same_length[i][1], same_length[j][1])
+                )
+    collisions.sort(key=lambda collision: collision[:2])
+    return [(key_a, key_b, distance) for distance, _, key_a, key_b in collisions]
+
+
+def get_candidate_pairs(barcodes: list, threshold: int) -> set:
+    """
+    Get the pairs of barcodes (of the same length) that share at least one of threshold
+    segments. Any pair closer than the threshold distance is guaranteed to be included
+        :param barcodes (list):     Barcodes of the same length
+        :param threshold (int):     Distance threshold
+        :return (set):              (i, j) index pairs, i < j
+    """
+    length = len(barcodes[0]) if barcodes else 0
+    if length < threshold:  # Too short to split, so every pair is a candidate
+        return set(itertools.combinations(range(len(barcodes)), 2))
+    bounds = [length * segment // threshold for segment in range(threshold + 1)]
+    buckets = defaultdict(list)
+    for i, barcode in enumerate(barcodes):
+        for segment, (start, end) in enumerate(zip(bounds, bounds[1:])):
+            buckets[(segment, barcode[start:end])].append(i)
+    candidate_pairs = set()
+    for bucket in buckets.values():
+        if len(bucket) > 1:
+            candidate_pairs.update(itertools.combinations(bucket, 2))
+    return candidate_pairs
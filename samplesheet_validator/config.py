@@ -5,6 +5,154 @@ TIMESTAMP = str(f"{datetime.datetime.now():%Y%m%d_%H%M%S}")
 # Specifies the layout of log records in the final output
 LOGGING_FORMATTER = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
+# Keys required in validator configuration files (lists of strings)
+CONFIG_KEYS = ["sequencer_ids", "panels", "tso_panels", "okd_panels", "dev_pannos"]
+
+# Sample names may only contain these characters
+VALID_SAMPLE_CHARS = "^[A-Za-z0-9_-]+$"
+
+# Structural shape of seglh-naming sample names (e.g. NGS432_01_123456_AB_U_VCP1R134StG_Pan4822):
+# identifier, sample number, at least one further field (the DNA number), a Pan number field, then
+# any suffix fields. Only what every seglh-naming sample name has is required, so names not
+# matching can never be parsed by seglh-naming. Used to skip parsing such names when looking up
+# sample keys for the cross-run sample index; the sample name check parses every name, so that
+# invalid names are always reported with the parser's exception
+SAMPLE_NAME_PREFILTER = r"^[^_]+_\d+(?:_[^_]+)+_Pan\d+(?:_[^_]+)*$"
+
+# Samples sharing a lane whose combined index and index2 barcodes differ at fewer than this many
+# positions are reported as index collisions
+MIN_INDEX_DISTANCE = 3
+# Resource limits. Samplesheets exceeding these (e.g. a wrongly selected multi-gigabyte file, or a
+# file with one enormous line) are rejected as they are read, before they are held in memory
+MAX_BYTES = 64 * 1024 * 1024
+MAX_LINES = 200000
+MAX_COLUMNS = 100
+MAX_LINE_LENGTH = 10000
+# Samplesheets are decoded as UTF-8, removing any byte order mark (e.g. from Excel). Lines that are
+# not valid UTF-8 (e.g. from Windows LIMS exports) are decoded with the fallback encoding instead
+SAMPLESHEET_ENCODING = "utf-8-sig"
+SAMPLESHEET_FALLBACK_ENCODING = "latin-1"
+# Optional validator configuration keys for the resource limits, and their defaults
+RESOURCE_LIMITS = {
+    "max_bytes": MAX_BYTES,
+    "max_lines": MAX_LINES,
+    "max_columns": MAX_COLUMNS,
+    "max_line_length": MAX_LINE_LENGTH,
+}
+# Leading section of Aviti samplesheets, and the key of the run name parameter within it
+AVITI_RUN_PARAMETERS_SECTION = "[RunParameters]"
+AVITI_RUN_NAME_KEY = "RunName"
+# Markers of the sections containing the sample lines
+DATA_SECTION_MARKER = "[Data]"
+AVITI_DATA_SECTION_MARKER = "[SAMPLES]"
+# [Data] section headers of the index, index2 and lane columns (Illumina)
+INDEX_COLUMNS = ["index", "index2", "Lane"]
+# Aviti [SAMPLES] section headers: the sample column, and the index, index2 and lane columns
+AVITI_SAMPLE_COLUMN = "SampleName"
+AVITI_INDEX_COLUMNS = {"index": "Index1", "index2": "Index2", "Lane": "Lane"}
+# Headers expected in the Aviti [SAMPLES] section
+AVITI_EXPECTED_HEADERS = ["SampleName", "Index1"]
+# Control rows in the Aviti [SAMPLES] section. These are not validated as samples, but their
+# indexes are included in the index collision check
+AVITI_CONTROL_SAMPLES = ["PhiX"]
+# Error types raised by the sample level checks of each row. These are discarded if a samplesheet
+# validated as it is streamed turns out to be from a development run
+SAMPLE_ERROR_TYPES = [
+    "Sample names do not match",
+    "Illegal characters",
+    "Sample name invalid",
+    "Pan number invalid",
+]
+# Short codes of the sample level error types, recorded for each sample row in the results store
+SAMPLE_ERROR_CODES = {
+    "Sample names do not match": "name_mismatch",
+    "Illegal characters": "illegal_chars",
+    "Sample name invalid": "sample_name_invalid",
+    "Pan number invalid": "panno_invalid",
+}
+# Number of sample rows buffered by the results store before they are written in one transaction
+RESULTS_BATCH_SIZE = 5000
+# MasterDataFiles are named with the runfolder name followed by this suffix (and an extension).
+# Checked when a MasterDataFile directory (md_dir) is configured
+MD_FILE_SUFFIX = "_MasterDataFile"
+# Run files written to the runfolder by the sequencer, cross-checked against the samplesheet when
+# check_run_files is configured. Files are read in chunks and reading stops once the instrument,
+# flowcell and reads are found, so no more than RUN_FILE_MAX_BYTES is read per run file
+ILLUMINA_RUN_FILES = ["RunInfo.xml", "RunParameters.xml"]
+AVITI_RUN_FILES = ["RunParameters.json"]
+RUN_FILE_CHUNK_SIZE = 4096
+RUN_FILE_MAX_BYTES = 65536
+# Elements holding the instrument and flowcell in RunInfo.xml and the RunParameters.xml of the
+# different Illumina instruments ("Parent/Child" for values held in a child element)
+RUN_FILE_INSTRUMENT_TAGS = [
+    "Instrument",
+    "InstrumentID",
+    "InstrumentId",
+    "InstrumentName",
+    "ScannerID",
+]
+RUN_FILE_FLOWCELL_TAGS = [
+    "Flowcell",
+    "FlowCellSerialBarcode",
+    "FlowCellSerial",
+    "FlowcellRFIDTag/SerialNumber",
+]
+# Read elements with NumCycles and IsIndexedRead attributes (RunInfo.xml, MiSeq
+# RunParameters.xml), and RunParameters.xml elements holding the cycles of read 1 and read 2
+RUN_FILE_READ_TAGS = ["Read", "RunInfoRead"]
+RUN_FILE_READ_CYCLES_TAGS = {
+    "Read1NumberOfCycles": 1,
+    "Read2NumberOfCycles": 2,
+    "Read1": 1,
+    "Read2": 2,
+}
+# Keys of the instrument, flowcell and read cycles in the Aviti RunParameters.json, and the reads
+# (other than index reads) within the cycles
+AVITI_INSTRUMENT_KEY = "InstrumentName"
+AVITI_FLOWCELL_KEY = "FlowcellID"
+AVITI_CYCLES_KEY = "Cycles"
+AVITI_READS = ["R1", "R2"]
+# Section of Illumina samplesheets listing the read lengths
+READS_SECTION_MARKER = "[Reads]"
+# Fields of the seglh-naming sample identifying a patient sample across runs (DNA number and
+# secondary identifier), and the number of days a run's samples are held in the cross-run sample
+# index. Samples also on another run validated within this window are reported
+SAMPLE_INDEX_FIELDS = ["id1", "id2"]
+SAMPLE_INDEX_WINDOW_DAYS = 14
+# Control samples (no template controls and HD200 reference standards) recur on every run of an
+# assay with the same identifiers, so samples whose names match this pattern are not indexed
+SAMPLE_INDEX_EXCLUDED_SAMPLES = r"_(?:NTC\d*|HD200\w*)_"
+# Suffix of the file (in the log directory, prefixed with the runfolder name) holding the row
+# verdicts of the previous validation of a runfolder, used for incremental re-validation
+VERDICT_CACHE_SUFFIX = "_samplesheet_verdicts.json"
+# Suffix of the samplesheets found when scanning sequencer data roots for runfolders
+SAMPLESHEET_SUFFIX = "_SampleSheet.csv"
+# Number of directory levels below a data root searched for samplesheets (e.g. root/runfolder,
+# or root/sequencer/runfolder)
+SCAN_MAX_DEPTH = 3
+# Runfolder subdirectories that never contain the samplesheet, and are not scanned. Hidden
+# directories are also skipped
+SCAN_PRUNE_DIRS = [
+    "Alignment_1",
+    "Analysis",
+    "BaseCalls",
+    "Config",
+    "Data",
+    "Images",
+    "InterOp",
+    "Logs",
+    "Recipe",
+    "Thumbnail_Images",
+]
+# Error type reported for scanned samplesheets whose validation raised an exception
+SCAN_EXCEPTION_ERROR = "Validation failed"
+# Number of samplesheets validated by a scan between saves of the scan index
+SCAN_INDEX_SAVE_INTERVAL = 100
+# Archive re-validation report keys for the sample rows whose pan number could not be parsed, and
+# for samplesheets whose validation raised an exception
+ARCHIVE_UNKNOWN_PANNUMBER = "Unknown"
+ARCHIVE_EXCEPTION_ERROR = SCAN_EXCEPTION_ERROR
+
 LOG_MSGS = {
     "ss_present": "Samplesheet with supplied name exists (%s)",
     "ss_absent": "Samplesheet with supplied name does not exist (%s)",
@@ -14,21 +162,31 @@ LOG_MSGS = {
     "sequencer_id_invalid": "Sequencer id not in allowed list (%s, %s)",
     "file_not_empty": "%s is (>10 bytes)",
     "file_empty": "%s is empty (<10 bytes)",
+    "max_bytes_exceeded": "%s is larger than the maximum samplesheet size (%s bytes)",
+    "max_lines_exceeded": "Samplesheet has more than the maximum number of lines (%s)",
+    "max_line_length_exceeded": "Line %s of samplesheet is longer than the maximum line length (%s characters)",
+    "max_columns_exceeded": "Line %s of samplesheet has more than the maximum number of columns (%s)",
     "found_header_line": "Line %s in samplesheet identified as a header line",
     "found_sample_line": "Line %s in samplesheet identified as containing a sample",
     "error_extracting_headers": "An error was encountered when extracting headers from the samplesheet, from line %s: %s",
     "found_empty_line": "Line %s in samplesheet is an empty line",
+    "found_comment_line": "Line %s in samplesheet is a comment line",
+    "found_control_line": "Line %s in samplesheet identified as containing a control (%s)",
     "col_extraction_error": "Exception raised while attempting to extract %s from sample line %s, %s: %s",
     "headers_as_expected": "Expected headers present in samplesheet",
     "headers_err": "Header(/s) missing from [Data] section: '%s'",
     "samplenames_match": "All sample names and sample IDS match",
-    "nonmatching_samplenames": "The following Sample IDs do not match the corresponding Sample Name: (%s)",
+    "nonmatching_samplenames": "The following Sample IDs do not match the corresponding Sample Name: (line %s: Sample_ID %s, Sample_Name %s)",
+    "duplicate_sample": "Duplicate %s %s on lines %s",
+    "duplicate_sample_lanes": "Duplicate %s %s on lines %s in lanes %s",
+    "duplicate_indexes": "Duplicate (index, index2, lane) %s on lines %s",
+    "no_duplicates": "No duplicate sample IDs, sample names or indexes identified",
     "no_illegal_chars": "Sample name %s contains no illegal characters in column %s",
-    "illegal_chars": "Sample name contains invalid characters (%s: %s)",
+    "illegal_chars": "Sample name contains invalid characters (%s, line %s: %s)",
     "sample_name_valid": "Sample name valid: %s (%s)",
-    "sample_name_invalid": "Sample name invalid (%s). For Aviti, sample ID/name are in one col. Exception: %s",
+    "sample_name_invalid": "Sample name invalid (%s, line %s). For Aviti, sample ID/name are in one col. Exception: %s",
     "valid_panno": "Pan no is valid: %s",
-    "invalid_panno": "Pan no is invalid: %s (%s: %s)",
+    "invalid_panno": "Pan no is invalid: %s (%s, line %s: %s)",
     "valid_library_prep_name": "Library prep name is valid: %s",
     "library_prep_name_err": "Library prep name not in allowed list (%s, %s)",
     "dev_run": "Samplesheet is from a development run: %s",
@@ -39,6 +197,37 @@ LOG_MSGS = {
     "not_okd_run": "Samplesheet is not for a OKD run",
     "sschecks_not_passed": "Samplesheet did not pass checks: %s",
     "sschecks_passed": "Samplesheet passed all checks %s",
+    "no_index_collisions": "No index collisions identified (minimum barcode distance %s)",
+    "index_collision": (
+        "Index collision in lane %s: barcodes of lines %s and %s (%s, %s) differ at %s position(s), "
+        "minimum is %s"
+    ),
+    "invalid_index": "Indexes contain characters other than ACGTN (line %s: %s, %s)",
+    "stream_dev_run": "Development pan number found on line %s, sample level checks stopped",
+    "stream_no_data_section": "No %s section found while streaming, validating the complete samplesheet",
+    "verdict_cache_loaded": "Loaded %s cached row verdicts from the previous validation (%s)",
+    "verdict_cache_not_used": "Cached row verdicts not used (%s): %s",
+    "cached_verdicts_used": "Reused cached verdicts for %s of %s sample rows, re-validated %s rows",
+    "verdict_cache_saved": "Saved %s row verdicts (%s)",
+    "verdict_cache_save_error": "Row verdicts could not be saved (%s): %s",
+    "fallback_encoding": "Line %s is not valid UTF-8, decoding it as %s",
+    "md_file_present": "MasterDataFile for run %s is present (%s)",
+    "md_file_absent": "No MasterDataFile for run %s in %s",
+    "md_dir_error": "MasterDataFile directory %s could not be read: %s",
+    "run_files_absent": "No run files (%s) in %s, the run was not cross-checked against them",
+    "run_file_error": "Run file %s could not be read: %s",
+    "run_file_mismatch": "%s in the samplesheet (%s) does not match %s in %s",
+    "run_file_match": "Samplesheet %s matches %s (%s bytes read)",
+    "sample_on_other_run": "Sample %s (line %s) is also on run %s, validated %s (within the last %s days)",
+    "no_samples_on_other_runs": "No samples are on other runs validated within the last %s days",
+    "content_outcome_reused": (
+        "Samplesheet contents match those of %s, already validated with this configuration. "
+        "Reusing the stored outcome (content key %s) rather than parsing the samplesheet"
+    ),
+    "content_outcome_saved": "Stored the outcome of the samplesheet contents (content key %s)",
+    "scan_passed": "Scanned samplesheet passed all checks: %s",
+    "scan_failed": "Scanned samplesheet did not pass checks: %s (%s)",
+    "scan_complete": "Validated %s new or changed samplesheets under %s",
     "Aviti match": "The run name from sample sheet matches Aviti run %s",
     "Aviti not match": "The run name from sample sheet does not match Aviti run %s"
 }
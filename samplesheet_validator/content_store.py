@@ -0,0 +1,219 @@
+""" content_store.py
+
+Content-addressed store of samplesheet validation outcomes, so that samplesheet contents arriving
+more than once (re-uploads, copies into a new runfolder) are validated once. Outcomes are keyed by
+a digest of the normalised samplesheet contents, in which line endings and the byte order mark
+are canonicalised, so samplesheets differing only in how they were exported share an outcome.
+Whitespace and empty fields are not normalised, as the checks treat them differently (e.g. a line
+of spaces in the data section is a sample row, whereas an empty line is skipped). The key also
+holds the validator configuration digest and the instrument type, so outcomes are not reused
+across configurations.
+
+Only the outcome of the checks on the samplesheet contents is stored. Checks on the samplesheet
+name, sequencer ID and run folder name, and the resource limits, run for every submission. The
+store is a local sqlite file, and can be shared across the threads of a process.
+"""
+import json
+import sqlite3
+import hashlib
+import datetime
+import threading
+from typing import Union
+
+
+class ContentStore:
+    """
+    Stores the outcome of the checks on samplesheet contents, keyed by a digest of the normalised
+    contents
+
+    Attributes:
+        store_path (str):               sqlite file holding the outcomes
+        connection (sqlite3.Connection):Connection to the store
+        lock (threading.Lock):          Serialises access to the connection across threads
+        hits (int):                     Number of outcomes answered from the store
+
+    Methods:
+        get_content_key(lines, config_digest, illumina)
+            Get the key identifying samplesheet contents validated with a configuration
+        normalise_line(line)
+            Canonicalise the line ending and byte order mark of a line
+        lookup(content_key)
+            Get the stored outcome for the samplesheet contents
+        save(content_key, samplesheet_path, outcome)
+            Store the outcome of the checks on the samplesheet contents
+        get_result_key(result)
+            Get the key of the samplesheet contents of a validation
+        apply_outcome(result, stored_outcome)
+            Add the stored outcome of identical samplesheet contents to a validation
+        save_result(result, errors_before)
+            Store the outcome of the checks on the samplesheet contents of a validation
+        close()
+            Close the store
+    """
+
+    def __init__(self, store_path: str):
+        """
+        Constructor for the ContentStore class
+            :param store_path (str):    sqlite file holding the outcomes, created if it does not
+                                        exist
+        """
+        self.store_path = store_path
+        self.hits = 0
+        self.lock = threading.Lock()
+        # Processes sharing the store wait for each other's transactions
+        self.connection = sqlite3.connect(store_path, timeout=60, check_same_thread=False)
+        self.connection.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS content_outcomes (
+                content_key TEXT PRIMARY KEY,
+                samplesheet TEXT NOT NULL,
+                outcome TEXT NOT NULL,
+                validated_at TEXT NOT NULL
+            );
+            """
+        )
+
+    def __enter__(self) -> "ContentStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @staticmethod
+    def normalise_line(line: str) -> str:
+        """
+        Canonicalise the line ending and byte order mark of a line. Lines are not removed, so
+        that the line numbers given in error messages are unchanged
+            :param line (str):  Samplesheet line
+            :return (str):      Normalised line
+        """
+        return line.rstrip("\r\n").lstrip("\ufeff")
+
+    @classmethod
+    def get_content_key(cls, lines: list, config_digest: str, illumina: bool) -> str:
+        """
+        Get the key identifying samplesheet contents validated with a configuration
+            :param lines (list):            Samplesheet lines
+            :param config_digest (str):     Digest of the validator configuration
+            :param illumina (bool):         Illumina or not
+            :return (str):                  Content key
+        """
+        content_hash = hashlib.sha256(f"{config_digest}\n{illumina}\n".encode())
+        for line in lines:
+            content_hash.update(cls.normalise_line(line).encode())
+            content_hash.update(b"\n")
+        return content_hash.hexdigest()
+
+    def lookup(self, content_key: str) -> Union[dict, None]:
+        """
+        Get the stored outcome for the samplesheet contents
+            :param content_key (str):   Content key, from get_content_key()
+            :return (dict | None):      Outcome, holding the samplesheet it was first validated
+                                        for, or None if the contents have not been validated
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT samplesheet, outcome FROM content_outcomes WHERE content_key = ?",
+                (content_key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self.hits += 1
+        samplesheet, outcome = row
+        return {**json.loads(outcome), "samplesheet_path": samplesheet}
+
+    def save(self, content_key: str, samplesheet_path: str, outcome: dict) -> None:
+        """
+        Store the outcome of the checks on the samplesheet contents
+            :param content_key (str):       Content key, from get_content_key()
+            :param samplesheet_path (str):  Samplesheet validated
+            :param outcome (dict):          Errors, flags, pan numbers and sample row verdicts
+                                            from the checks on the samplesheet contents
+            :return None:
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO content_outcomes VALUES (?, ?, ?, ?)",
+                (
+                    content_key,
+                    samplesheet_path,
+                    json.dumps(outcome),
+                    datetime.datetime.now().isoformat(timespec="seconds"),
+                ),
+            )
+
+    def get_result_key(self, result) -> Union[str, None]:
+        """
+        Get the key of the samplesheet contents of a validation, reading the samplesheet as lines
+            :param result (ValidationResult):   Validation outcome
+            :return (str | None):               Content key, None if the samplesheet exceeds a
+                                                resource limit
+        """
+        lines = result.reader.read_samplesheet()
+        if lines is None or result.limit_exceeded:
+            return None
+        return self.get_content_key(lines, result.validator.config_digest, result.illumina)
+
+    def apply_outcome(self, result, stored_outcome: dict) -> list:
+        """
+        Add the stored outcome of identical samplesheet contents to a validation, as if the
+        checks on the samplesheet contents had been run
+            :param result (ValidationResult):   Validation outcome
+            :param stored_outcome (dict):       Outcome, from lookup()
+            :return (list):                     Stored verdict for each sample row, in file order
+        """
+        result.logger.info(
+            result.logger.log_msgs["content_outcome_reused"],
+            stored_outcome["samplesheet_path"],
+            result.content_key,
+        )
+        for error_type, messages in stored_outcome["errors_dict"].items():
+            for message in messages:
+                result.errors = True
+                result.add_msg_to_error_dict(error_type, message)
+                result.logger.warning(message)
+        result.dev_run = stored_outcome["dev_run"]
+        result.tso = stored_outcome["tso"]
+        result.okd = stored_outcome["okd"]
+        result.pannumbers = list(stored_outcome["pannumbers"])
+        result.sample_verdicts = stored_outcome["verdicts"]
+        return result.sample_verdicts
+
+    def save_result(self, result, errors_before: dict) -> None:
+        """
+        Store the outcome of the checks on the samplesheet contents of a validation, being the
+        errors added since the checks started, the run flags, pan numbers and sample row
+        verdicts. Outcomes of samplesheets exceeding a resource limit are not stored
+            :param result (ValidationResult):   Validation outcome
+            :param errors_before (dict):        Number of messages of each error type before the
+                                                checks on the samplesheet contents
+            :return None:
+        """
+        if result.limit_exceeded:
+            return
+        content_errors = {
+            error_type: messages[errors_before.get(error_type, 0):]
+            for error_type, messages in result.errors_dict.items()
+            if len(messages) > errors_before.get(error_type, 0)
+        }
+        self.save(
+            result.content_key,
+            result.samplesheet_path,
+            {
+                "errors_dict": content_errors,
+                "dev_run": getattr(result, "dev_run", False),
+                "tso": result.tso,
+                "okd": result.okd,
+                "pannumbers": list(result.pannumbers),
+                "verdicts": result.sample_verdicts,
+            },
+        )
+        result.logger.info(result.logger.log_msgs["content_outcome_saved"], result.content_key)
+
+    def close(self) -> None:
+        """
+        Close the store
+            :return None:
+        """
+        self.connection.close()
@@ -0,0 +1,93 @@
+""" md_index.py
+
+Index of the MasterDataFiles held in the MasterDataFile directory, so that checking a run has a
+MasterDataFile does not list a large directory on every validation. A MasterDataFile is named with
+the run identifier (the runfolder name) followed by config.MD_FILE_SUFFIX, e.g.:
+
+    210917_NB551068_0409_AH3YNFAFX3_MasterDataFile.xlsx
+
+The index maps each run identifier to its MasterDataFile, and is rebuilt only when the
+modification time of the directory changes (as it does when files are added, removed or renamed).
+Indexes are held per directory for the life of the process and shared by the validations in it,
+as Validator objects are immutable and hold only the directory path.
+"""
+import os
+import threading
+from typing import Union
+from . import config
+
+_MD_INDEXES = {}  # Index of each MasterDataFile directory, shared across the process
+_MD_INDEXES_LOCK = threading.Lock()
+
+
+class MasterDataIndex:
+    """
+    Index of the MasterDataFiles in a directory by run identifier, refreshed when the directory
+    modification time changes
+
+    Attributes:
+        md_dir (str):           MasterDataFile directory
+        md_files (dict):        Run identifiers and the names of their MasterDataFiles
+        mtime_ns (None | int):  Modification time of the directory when the index was built
+        lock (threading.Lock):  Serialises refreshes across threads
+
+    Methods:
+        refresh()
+            Rebuild the index if the directory has changed since it was built
+        lookup(run_identifier)
+            Get the path of the MasterDataFile for a run
+    """
+
+    def __init__(self, md_dir: str):
+        """
+        Constructor for the MasterDataIndex class
+            :param md_dir (str):    MasterDataFile directory
+        """
+        self.md_dir = md_dir
+        self.md_files = {}
+        self.mtime_ns = None
+        self.lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """
+        Rebuild the index if the modification time of the directory has changed since it was
+        built. Raises OSError if the directory cannot be read
+            :return None:
+        """
+        mtime_ns = os.stat(self.md_dir).st_mtime_ns
+        if mtime_ns == self.mtime_ns:
+            return
+        with self.lock:
+            if mtime_ns == self.mtime_ns:  # Rebuilt by another thread
+                return
+            md_files = {}
+            with os.scandir(self.md_dir) as entries:
+                for entry in entries:
+                    run_identifier, suffix, _ = entry.name.partition(config.MD_FILE_SUFFIX)
+                    if suffix and run_identifier and entry.is_file():
+                        md_files[run_identifier] = entry.name
+            self.md_files = md_files
+            self.mtime_ns = mtime_ns
+
+    def lookup(self, run_identifier: str) -> Union[str, None]:
+        """
+        Get the path of the MasterDataFile for a run
+            :param run_identifier (str):    Run identifier (runfolder name)
+            :return (str | None):           MasterDataFile path, None if there is none
+        """
+        self.refresh()
+        md_file = self.md_files.get(run_identifier)
+        return os.path.join(self.md_dir, md_file) if md_file else None
+
+
+def get_md_index(md_dir: str) -> MasterDataIndex:
+    """
+    Get the index of a MasterDataFile directory, creating it on first use
+        :param md_dir (str):            MasterDataFile directory
+        :return (MasterDataIndex):      Index of the directory
+    """
+    md_dir = os.path.abspath(md_dir)
+    with _MD_INDEXES_LOCK:
+        if md_dir not in _MD_INDEXES:
+            _MD_INDEXES[md_dir] = MasterDataIndex(md_dir)
+        return _MD_INDEXES[md_dir]
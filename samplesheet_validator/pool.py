@@ -0,0 +1,97 @@
+""" pool.py
+
+Helpers for validating samplesheets across a multiprocessing pool. Each worker process holds a
+single Validator (or ValidatorProfiles), so the configuration lookups and patterns are built once
+in the parent and never rebuilt per task:
+
+- With the fork start method, the Validator is inherited by the workers at fork
+- Otherwise, it is passed to each worker once as a single pickled blob
+
+If a results store path is supplied, each worker opens its own ResultsStore on it, and records the
+per-sample results of each samplesheet in one transaction once it is validated.
+"""
+import pickle
+import multiprocessing
+import multiprocessing.pool
+from typing import Union
+from .samplesheet_validator import Validator
+from .profiles import ValidatorProfiles
+from .results_store import ResultsStore
+
+_WORKER_VALIDATOR = None  # Validator used by validate_in_worker() in this process
+_WORKER_RESULTS_STORE = None  # Results store used by validate_in_worker() in this process
+
+
+def init_worker(
+    validator_blob: Union[bytes, None] = None, results_path: Union[str, None] = None
+) -> None:
+    """
+    Pool initializer. Sets the Validator for this worker process from a pickled blob. If
+    no blob is supplied, the Validator inherited from the parent at fork is used
+        :param validator_blob (bytes | None):   Pickled Validator
+        :param results_path (str | None):       Results store to record the per-sample results in
+        :return None:
+    """
+    global _WORKER_VALIDATOR, _WORKER_RESULTS_STORE
+    if validator_blob is not None:
+        _WORKER_VALIDATOR = pickle.loads(validator_blob)
+    _WORKER_RESULTS_STORE = ResultsStore(results_path) if results_path else None
+
+
+def get_pool(
+    validator: Union[Validator, ValidatorProfiles],
+    processes: Union[int, None] = None,
+    results_path: Union[str, None] = None,
+) -> multiprocessing.pool.Pool:
+    """
+    Get a process pool whose workers share the supplied Validator
+        :param validator (Validator | ValidatorProfiles):   Validator to use in the workers
+        :param processes (int | None):                      Number of worker processes. Defaults
+                                                            to the CPU count
+        :param results_path (str | None):                   Results store to record the
+                                                            per-sample results in
+        :return (Pool):                                     Process pool, to be used with
+                                                            validate_in_worker()
+    """
+    global _WORKER_VALIDATOR
+    if multiprocessing.get_start_method() == "fork":
+        _WORKER_VALIDATOR = validator
+        return multiprocessing.Pool(
+            processes, initializer=init_worker, initargs=(None, results_path)
+        )
+    return multiprocessing.Pool(
+        processes, initializer=init_worker, initargs=(pickle.dumps(validator), results_path)
+    )
+
+
+def get_worker_validator(samplesheet_name: str, illumina: bool = True) -> Validator:
+    """
+    Get this worker's Validator for a samplesheet, selecting its profile if the worker holds
+    ValidatorProfiles
+        :param samplesheet_name (str):  Samplesheet path or name
+        :param illumina (bool):         Illumina or not
+        :return (Validator):            Validator for the samplesheet
+    """
+    if isinstance(_WORKER_VALIDATOR, ValidatorProfiles):
+        return _WORKER_VALIDATOR.select(samplesheet_name, illumina)
+    return _WORKER_VALIDATOR
+
+
+def validate_in_worker(samplesheet_path: str, illumina: bool = True, runname: str = "") -> dict:
+    """
+    Validate a samplesheet using this worker's Validator. The run's log handler is closed
+    once validation is complete so that handlers do not accumulate in long-lived workers, and
+    the per-sample results are written to this worker's results store (if any)
+        :param samplesheet_path (str):  Path to samplesheet
+        :param illumina (bool):         Illumina or not
+        :param runname (str):           Processed run folder name
+        :return (dict):                 Summary of the validation outcome
+    """
+    result = _WORKER_VALIDATOR.validate(
+        samplesheet_path, illumina, runname, results_store=_WORKER_RESULTS_STORE
+    )
+    result.close_logger()
+    if _WORKER_RESULTS_STORE is not None:
+        # Workers may be terminated without notice once the pool's tasks are complete
+        _WORKER_RESULTS_STORE.flush()
+    return result.get_summary()
@@ -0,0 +1,223 @@
+""" profiles.py
+
+Named validator configuration profiles (e.g. one per run type or instrument class), loaded once at
+startup. The profile used for each samplesheet is selected automatically from its sequencer ID, so
+callers validating mixed batches do not need to pass the configuration lists for each samplesheet.
+Each profile is compiled into its own Validator, so the lookups are built once and reused across
+validations.
+
+Configuration files extend the single-configuration format with a profiles dictionary. Lists given
+at the top level are used as defaults for every profile:
+
+    {
+        "logdir": "/path/to/logdir",
+        "dev_pannos": ["Pan5180", "Pan5227"],
+        "default_profile": "novaseq",
+        "profiles": {
+            "novaseq": {"sequencer_ids": ["A01229"], "panels": [...], ...},
+            "aviti": {"sequencer_ids": ["AV241501"], "panels": [...], ...}
+        }
+    }
+"""
+import io
+import os
+import json
+import hashlib
+from typing import Union
+from seglh_naming.samplesheet import Samplesheet
+from .samplesheet_validator import Validator, ValidationResult
+from .streaming import StreamingValidationResult
+from .results_store import ResultsStore
+from .content_store import ContentStore
+from .sample_index import SampleIndex
+
+
+class ValidatorProfiles:
+    """
+    Holds a Validator for each named configuration profile, and selects the profile to use for a
+    samplesheet from its sequencer ID
+
+    Attributes:
+        profiles (dict):            Profile names and their Validators
+        default_profile (str):      Profile used when the sequencer ID cannot be determined or is
+                                    not in any profile (so the sequencer ID check reports it)
+        sequencer_profiles (dict):  Sequencer IDs and the names of the profiles they belong to
+        config_digest (str):        Digest of the configuration of every profile
+
+    Methods:
+        from_config(profiles_config, logdir)
+            Build profiles from a configuration dictionary
+        from_config_file(config_path, logdir)
+            Build profiles from a JSON configuration file
+        get_sequencer_id(samplesheet_name, illumina)
+            Get the sequencer ID from the samplesheet name
+        select(samplesheet_name, illumina)
+            Get the Validator for the profile matching the samplesheet's sequencer ID
+        validate(path_or_buffer, illumina, runname, *, samplesheet_name, queue_logging,
+                 memory_map, incremental, results_store, content_store, sample_index)
+            Validate a samplesheet using the Validator for its profile
+        stream(samplesheet_name, illumina, runname, *, queue_logging, incremental, results_store,
+               sample_index)
+            Start validating a samplesheet fed in chunks, using the Validator for its profile
+    """
+
+    def __init__(self, profiles: dict, default_profile: Union[str, None] = None):
+        """
+        Constructor for the ValidatorProfiles class
+            :param profiles (dict):                 Profile names and their Validators
+            :param default_profile (str | None):    Name of the default profile. Defaults to the
+                                                    first profile
+        """
+        if not profiles:
+            raise ValueError("At least one validator profile is required")
+        self.profiles = dict(profiles)
+        self.default_profile = default_profile or next(iter(self.profiles))
+        if self.default_profile not in self.profiles:
+            raise ValueError(f"Default profile {self.default_profile} is not a profile")
+        self.sequencer_profiles = {}
+        for profile_name, validator in self.profiles.items():
+            for sequencer_id in validator.sequencer_ids:
+                if sequencer_id in self.sequencer_profiles:
+                    raise ValueError(
+                        f"Sequencer ID {sequencer_id} is in more than one profile "
+                        f"({self.sequencer_profiles[sequencer_id]}, {profile_name})"
+                    )
+                self.sequencer_profiles[sequencer_id] = profile_name
+        self.config_digest = hashlib.sha256(
+            json.dumps(
+                {
+                    profile_name: validator.config_digest
+                    for profile_name, validator in self.profiles.items()
+                },
+                sort_keys=True,
+            ).encode()
+        ).hexdigest()
+
+    @classmethod
+    def from_config(
+        cls, profiles_config: dict, logdir: Union[str, None] = None
+    ) -> "ValidatorProfiles":
+        """
+        Build profiles from a configuration dictionary. A configuration without a profiles
+        dictionary is loaded as a single default profile
+            :param profiles_config (dict):  Configuration, with optional profiles dictionary
+            :param logdir (str | None):     Log file directory. Overrides any logdir in the
+                                            configuration
+            :return (ValidatorProfiles):    ValidatorProfiles object
+        """
+        defaults = {
+            key: value for key, value in profiles_config.items() if key != "profiles"
+        }
+        if "profiles" not in profiles_config:
+            return cls({"default": Validator.from_config(defaults, logdir)})
+        profiles = {
+            profile_name: Validator.from_config({**defaults, **profile_config}, logdir)
+            for profile_name, profile_config in profiles_config["profiles"].items()
+        }
+        return cls(profiles, profiles_config.get("default_profile"))
+
+    @classmethod
+    def from_config_file(
+        cls, config_path: str, logdir: Union[str, None] = None
+    ) -> "ValidatorProfiles":
+        """
+        Build profiles from a JSON configuration file
+            :param config_path (str):       Path to JSON configuration file
+            :param logdir (str | None):     Log file directory. Overrides any logdir in the
+                                            configuration file
+            :return (ValidatorProfiles):    ValidatorProfiles object
+        """
+        with open(config_path, "r") as config_file:
+            return cls.from_config(json.load(config_file), logdir)
+
+    def get_sequencer_id(self, samplesheet_name: str, illumina: bool) -> Union[str, None]:
+        """
+        Get the sequencer ID from the samplesheet name. Illumina samplesheet names are parsed
+        with the seglh-naming Samplesheet module, Aviti sequencer IDs are taken from the
+        filename (as in ValidationResult.get_aviti_run_folder_name())
+            :param samplesheet_name (str):  Samplesheet path or name
+            :param illumina (bool):         Illumina or not
+            :return (str | None):           Sequencer ID, None if it cannot be determined
+        """
+        try:
+            if illumina:
+                return Samplesheet.from_string(samplesheet_name).sequencerid
+            return os.path.basename(samplesheet_name).split("_")[1]
+        except Exception:
+            return None
+
+    def select(self, samplesheet_name: str, illumina: bool) -> Validator:
+        """
+        Get the Validator for the profile matching the samplesheet's sequencer ID, or the
+        default profile if there is no match
+            :param samplesheet_name (str):  Samplesheet path or name
+            :param illumina (bool):         Illumina or not
+            :return (Validator):            Validator for the profile
+        """
+        profile_name = self.sequencer_profiles.get(
+            self.get_sequencer_id(samplesheet_name, illumina), self.default_profile
+        )
+        return self.profiles[profile_name]
+
+    def validate(
+        self,
+        path_or_buffer: Union[str, os.PathLike, io.IOBase],
+        illumina: bool = True,
+        runname: str = "",
+        *,
+        samplesheet_name: Union[str, None] = None,
+        queue_logging: bool = False,
+        memory_map: bool = False,
+        incremental: bool = False,
+        results_store: Union[ResultsStore, None] = None,
+        content_store: Union[ContentStore, None] = None,
+        sample_index: Union[SampleIndex, None] = None,
+    ) -> ValidationResult:
+        """
+        Validate a samplesheet using the Validator for its profile. Arguments are as for
+        Validator.validate()
+            :return result (ValidationResult):  Validation outcome
+        """
+        if isinstance(path_or_buffer, (str, os.PathLike)):
+            name = os.fspath(path_or_buffer)
+        else:
+            name = samplesheet_name or getattr(path_or_buffer, "name", "")
+        return self.select(name, illumina).validate(
+            path_or_buffer,
+            illumina,
+            runname,
+            samplesheet_name=samplesheet_name,
+            queue_logging=queue_logging,
+            memory_map=memory_map,
+            incremental=incremental,
+            results_store=results_store,
+            content_store=content_store,
+            sample_index=sample_index,
+        )
+
+    def stream(
+        self,
+        samplesheet_name: str,
+        illumina: bool = True,
+        runname: str = "",
+        *,
+        queue_logging: bool = False,
+        incremental: bool = False,
+        results_store: Union[ResultsStore, None] = None,
+        sample_index: Union[SampleIndex, None] = None,
+    ) -> StreamingValidationResult:
+        """
+        Start validating a samplesheet fed in chunks, using the Validator for its profile. The
+        profile is selected from the samplesheet name, so before any chunks are fed. Arguments
+        are as for Validator.stream()
+            :return (StreamingValidationResult):    Validation fed the samplesheet in chunks
+        """
+        return self.select(samplesheet_name, illumina).stream(
+            samplesheet_name,
+            illumina,
+            runname,
+            queue_logging=queue_logging,
+            incremental=incremental,
+            results_store=results_store,
+            sample_index=sample_index,
+        )
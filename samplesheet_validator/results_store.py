@@ -0,0 +1,153 @@
+""" results_store.py
+
+Per-sample validation results store, for analytics across many runs (e.g. how often samples of a
+pan number are rejected) without parsing errors_dict or the log files. A row is recorded for each
+validated sample row of each samplesheet:
+
+    run, samplesheet, line, sample, pan number, classification (valid / invalid), error codes
+    (config.SAMPLE_ERROR_CODES, comma separated) and the time of validation
+
+The store is a local sqlite file, indexed by run, pan number and classification. Rows are buffered
+and written in bulk (one executemany transaction per config.RESULTS_BATCH_SIZE rows), so batch runs
+across thousands of samplesheets do not commit once per sample. The store can be shared across the
+threads of a process; each process (e.g. pool worker) opens its own store on the same file:
+
+    SELECT pannumber, SUM(classification = 'invalid'), COUNT(*) FROM sample_results
+    GROUP BY pannumber
+"""
+import sqlite3
+import datetime
+import threading
+from . import config
+
+
+class ResultsStore:
+    """
+    Buffers the per-sample results of validations, and writes them to a sqlite store in bulk
+
+    Attributes:
+        store_path (str):               sqlite file holding the results
+        batch_size (int):               Number of rows buffered before they are written
+        connection (sqlite3.Connection):Connection to the store
+        buffer (list):                  Rows not yet written
+        lock (threading.Lock):          Serialises access to the buffer and connection across
+                                        threads
+
+    Methods:
+        add_result(result, verdicts)
+            Buffer the rows for the sample row verdicts of a validation
+        get_rows(result, verdicts)
+            Get the rows for the sample row verdicts of a validation
+        flush()
+            Write the buffered rows to the store
+        close()
+            Write the buffered rows and close the store
+    """
+
+    def __init__(self, store_path: str, batch_size: int = config.RESULTS_BATCH_SIZE):
+        """
+        Constructor for the ResultsStore class
+            :param store_path (str):    sqlite file holding the results, created if it does not
+                                        exist
+            :param batch_size (int):    Number of rows buffered before they are written
+        """
+        self.store_path = store_path
+        self.batch_size = batch_size
+        self.buffer = []
+        self.lock = threading.Lock()
+        # Processes writing to the same store wait for each other's transactions
+        self.connection = sqlite3.connect(store_path, timeout=60, check_same_thread=False)
+        self.connection.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS sample_results (
+                run TEXT NOT NULL,
+                samplesheet TEXT NOT NULL,
+                line INTEGER NOT NULL,
+                sample TEXT NOT NULL,
+                pannumber TEXT,
+                classification TEXT NOT NULL,
+                error_codes TEXT NOT NULL,
+                validated_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS sample_results_run ON sample_results (run);
+            CREATE INDEX IF NOT EXISTS sample_results_pannumber ON sample_results (pannumber);
+            CREATE INDEX IF NOT EXISTS sample_results_classification
+                ON sample_results (classification);
+            """
+        )
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add_result(self, result, verdicts: list) -> None:
+        """
+        Buffer the rows for the sample row verdicts of a validation, writing the buffer once it
+        holds batch_size rows
+            :param result (ValidationResult):   Validation outcome
+            :param verdicts (list):             Sample row verdicts, from iter_sample_verdicts()
+            :return None:
+        """
+        rows = self.get_rows(result, verdicts)
+        with self.lock:
+            self.buffer.extend(rows)
+            if len(self.buffer) >= self.batch_size:
+                self.write_buffer()
+
+    def get_rows(self, result, verdicts: list) -> list:
+        """
+        Get the rows for the sample row verdicts of a validation. The sample is the Sample_Name
+        column (the Aviti sample name is held as Sample_ID), and the error codes are those of the
+        error types raised by the row
+            :param result (ValidationResult):   Validation outcome
+            :param verdicts (list):             Sample row verdicts, from iter_sample_verdicts()
+            :return rows (list):                Row for each verdict
+        """
+        validated_at = datetime.datetime.now().isoformat(timespec="seconds")
+        return [
+            (
+                result.runfolder_name,
+                result.samplesheet_path,
+                verdict["line_index"],
+                verdict["columns"].get("Sample_Name", verdict["columns"].get("Sample_ID", "")),
+                verdict["pannumber"],
+                "invalid" if verdict["errors"] else "valid",
+                ",".join(
+                    config.SAMPLE_ERROR_CODES.get(error_type, error_type)
+                    for error_type in verdict["errors"]
+                ),
+                validated_at,
+            )
+            for verdict in verdicts
+        ]
+
+    def flush(self) -> None:
+        """
+        Write the buffered rows to the store
+            :return None:
+        """
+        with self.lock:
+            self.write_buffer()
+
+    def write_buffer(self) -> None:
+        """
+        Write the buffered rows to the store in a single transaction. Called holding the lock
+            :return None:
+        """
+        if self.buffer:
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT INTO sample_results VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self.buffer
+                )
+            self.buffer = []
+
+    def close(self) -> None:
+        """
+        Write the buffered rows and close the store
+            :return None:
+        """
+        self.flush()
+        self.connection.close()
@@ -0,0 +1,260 @@
+""" run_files.py
+
+Readers of the run files written to the runfolder by the sequencer, used to cross-check the
+instrument, flowcell and read lengths of a samplesheet against the run it is for. The run files
+read are the first present of:
+
+    Illumina:   RunInfo.xml, RunParameters.xml (config.ILLUMINA_RUN_FILES)
+    AVITI:      RunParameters.json (config.AVITI_RUN_FILES)
+
+XML run files are parsed incrementally, in chunks of config.RUN_FILE_CHUNK_SIZE bytes, and reading
+stops once the elements needed have been parsed. The instrument, flowcell and reads are at the
+start of RunInfo.xml, so typically only the first chunk is read. No more than
+config.RUN_FILE_MAX_BYTES is read from any run file, so the cost of the check is bounded however
+large the run files are. check_run_files() cross-checks a validation's samplesheet against them.
+"""
+import os
+import json
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Iterator, Union
+from . import config
+
+
+def iter_xml_elements(xml_file: BinaryIO) -> Iterator[ET.Element]:
+    """
+    Parse an XML file incrementally, yielding each element as its end tag is parsed. The file
+    is read one chunk at a time, so reading stops when the caller stops iterating, and no more
+    than config.RUN_FILE_MAX_BYTES is read
+        :param xml_file (BinaryIO):         XML file open for reading bytes
+        :return (Iterator[ET.Element]):     Elements, in the order their end tags are parsed
+    """
+    parser = ET.XMLPullParser(events=("end",))
+    bytes_read = 0
+    while bytes_read < config.RUN_FILE_MAX_BYTES:
+        chunk = xml_file.read(
+            min(config.RUN_FILE_CHUNK_SIZE, config.RUN_FILE_MAX_BYTES - bytes_read)
+        )
+        if not chunk:
+            break
+        bytes_read += len(chunk)
+        parser.feed(chunk)
+        for _, element in parser.read_events():
+            yield element
+
+
+def get_element_text(element: ET.Element, tags: list) -> Union[str, None]:
+    """
+    Get the text held by an element if its tag is one of those given. Tags are given as "Tag",
+    or as "Parent/Child" for text held in a child element. Namespaces are ignored
+        :param element (ET.Element):    Element
+        :param tags (list):             Tags of the elements holding the text
+        :return (str | None):           Text, None if the element does not hold it
+    """
+    tag = element.tag.rpartition("}")[2]
+    for element_tag in tags:
+        parent_tag, _, child_tag = element_tag.partition("/")
+        if tag == parent_tag:
+            text = element.findtext(child_tag) if child_tag else element.text
+            if text and text.strip():
+                return text.strip()
+    return None
+
+
+def read_xml_run_file(xml_path: str) -> dict:
+    """
+    Read the instrument, flowcell and read lengths (of the reads other than index reads) from
+    an Illumina RunInfo.xml or RunParameters.xml. Reading stops once the instrument, flowcell
+    and a complete list of reads have been parsed. Raises OSError if the file cannot be read,
+    and ET.ParseError if it is not well-formed
+        :param xml_path (str):  Path of the run file
+        :return (dict):         Run file path, instrument, flowcell, read lengths and the number
+                                of bytes read. Values not found are None (an empty list for the
+                                read lengths)
+    """
+    run_file = {"path": xml_path, "instrument": None, "flowcell": None, "reads": []}
+    read_cycles = {}  # Read cycles held in RunParameters.xml elements, by read number
+    reads_complete = False
+    with open(xml_path, "rb") as xml_file:
+        for element in iter_xml_elements(xml_file):
+            tag = element.tag.rpartition("}")[2]
+            if tag in config.RUN_FILE_READ_TAGS and element.get("NumCycles", "").isdigit():
+                if element.get("IsIndexedRead", "N") != "Y":
+                    run_file["reads"].append(int(element.get("NumCycles")))
+            elif tag == "Reads" and run_file["reads"]:
+                reads_complete = True
+            elif tag in config.RUN_FILE_READ_CYCLES_TAGS and (element.text or "").strip().isdigit():
+                read_cycles.setdefault(config.RUN_FILE_READ_CYCLES_TAGS[tag], int(element.text))
+            else:
+                for field, tags in (
+                    ("instrument", config.RUN_FILE_INSTRUMENT_TAGS),
+                    ("flowcell", config.RUN_FILE_FLOWCELL_TAGS),
+                ):
+                    if not run_file[field]:
+                        run_file[field] = get_element_text(element, tags)
+            if reads_complete and run_file["instrument"] and run_file["flowcell"]:
+                break
+        run_file["bytes_read"] = xml_file.tell()
+    if not run_file["reads"]:
+        run_file["reads"] = [cycles for _, cycles in sorted(read_cycles.items()) if cycles]
+    return run_file
+
+
+def read_json_run_file(json_path: str) -> dict:
+    """
+    Read the instrument, flowcell and read lengths (of the reads other than index reads) from
+    an AVITI RunParameters.json. The file is a single JSON object, so is parsed whole, and is
+    not read beyond config.RUN_FILE_MAX_BYTES. Raises OSError if the file cannot be read, and
+    ValueError if it is larger than this or is not valid JSON
+        :param json_path (str): Path of the run file
+        :return (dict):         Run file path, instrument, flowcell, read lengths and the number
+                                of bytes read. Values not found are None (an empty list for the
+                                read lengths)
+    """
+    with open(json_path, "rb") as json_file:
+        contents = json_file.read(config.RUN_FILE_MAX_BYTES + 1)
+    if len(contents) > config.RUN_FILE_MAX_BYTES:
+        raise ValueError(f"Run file is larger than {config.RUN_FILE_MAX_BYTES} bytes")
+    run_parameters = json.loads(contents)
+    cycles = run_parameters.get(config.AVITI_CYCLES_KEY) or {}
+    return {
+        "path": json_path,
+        "instrument": str(run_parameters.get(config.AVITI_INSTRUMENT_KEY) or "") or None,
+        "flowcell": str(run_parameters.get(config.AVITI_FLOWCELL_KEY) or "") or None,
+        "reads": [int(cycles[read]) for read in config.AVITI_READS if cycles.get(read)],
+        "bytes_read": len(contents),
+    }
+
+
+def read_run_files(runfolder_dir: str, illumina: bool) -> Union[dict, None]:
+    """
+    Read the instrument, flowcell and read lengths from the first run file present in the
+    runfolder. Raises OSError, ValueError or ET.ParseError if the run file cannot be read
+        :param runfolder_dir (str): Runfolder directory
+        :param illumina (bool):     True if the run is an Illumina run, False if an AVITI run
+        :return (dict | None):      Values read from the run file (see read_xml_run_file()), None
+                                    if there are no run files in the runfolder
+    """
+    for run_file_name in config.ILLUMINA_RUN_FILES if illumina else config.AVITI_RUN_FILES:
+        run_file_path = os.path.join(runfolder_dir, run_file_name)
+        if os.path.isfile(run_file_path):
+            if run_file_name.endswith(".json"):
+                return read_json_run_file(run_file_path)
+            return read_xml_run_file(run_file_path)
+    return None
+
+
+def check_run_files(result) -> None:
+    """
+    Cross-check the instrument, flowcell and read lengths of a validation's samplesheet against
+    the run files in the runfolder holding it, if configured. Samplesheets not held in a
+    runfolder with run files (e.g. uploaded samplesheets) are not cross-checked
+        :param result (ValidationResult):   Validation outcome
+        :return None:
+    """
+    runfolder_dir = os.path.dirname(result.samplesheet_path)
+    if not result.validator.check_run_files or not runfolder_dir:
+        return
+    logger = result.logger
+    try:
+        run_file = read_run_files(runfolder_dir, result.illumina)
+    except (OSError, ValueError, SyntaxError) as exception:  # ET.ParseError is a SyntaxError
+        logger.warning(logger.log_msgs["run_file_error"], runfolder_dir, exception)
+        return
+    if run_file is None:
+        logger.info(
+            logger.log_msgs["run_files_absent"],
+            ", ".join(config.ILLUMINA_RUN_FILES if result.illumina else config.AVITI_RUN_FILES),
+            runfolder_dir,
+        )
+        return
+    checks = get_run_file_checks(result, run_file)
+    for checked, ss_value, run_file_value, match in checks:
+        if not match:
+            log_args = (checked, ss_value, run_file_value, run_file["path"])
+            result.errors = True
+            result.add_msg_to_error_dict(
+                "Run files mismatch", logger.log_msgs["run_file_mismatch"] % log_args
+            )
+            logger.warning(logger.log_msgs["run_file_mismatch"], *log_args)
+    if checks and all(match for _, _, _, match in checks):
+        logger.info(
+            logger.log_msgs["run_file_match"],
+            ", ".join(checked.lower() for checked, _, _, _ in checks),
+            run_file["path"],
+            run_file["bytes_read"],
+        )
+
+
+def get_run_file_checks(result, run_file: dict) -> list:
+    """
+    Get the samplesheet values to cross-check against those read from a run file. Values
+    missing from either are not checked
+        :param result (ValidationResult):   Validation outcome
+        :param run_file (dict):             Values read from the run file (see read_run_files())
+        :return checks (list):              (value checked, samplesheet value, run file value,
+                                            whether they match) tuples
+    """
+    if result.illumina:
+        instrument = result.ss_obj.sequencerid
+        flowcell = result.runfolder_name.split("_")[-1]
+        read_lengths = get_read_lengths(result)
+    else:
+        instrument = result.aviti_seq_id
+        name_fields = os.path.basename(result.samplesheet_path).split("_")
+        flowcell = name_fields[2] if len(name_fields) > 3 else None
+        read_lengths = []
+    checks = []
+    if run_file["instrument"]:
+        checks.append(
+            (
+                "Instrument",
+                instrument,
+                run_file["instrument"],
+                instrument == run_file["instrument"],
+            )
+        )
+    if run_file["flowcell"] and flowcell:
+        # Runfolder names prefix the flowcell ID with the flowcell side (A/B) on some instruments
+        checks.append(
+            (
+                "Flowcell",
+                flowcell,
+                run_file["flowcell"],
+                flowcell.endswith(run_file["flowcell"]),
+            )
+        )
+    if run_file["reads"] and read_lengths:
+        checks.append(
+            (
+                "Read lengths",
+                ",".join(map(str, read_lengths)),
+                ",".join(map(str, run_file["reads"])),
+                len(read_lengths) == len(run_file["reads"])
+                and all(
+                    read_length <= cycles
+                    for read_length, cycles in zip(read_lengths, run_file["reads"])
+                ),
+            )
+        )
+    return checks
+
+
+def get_read_lengths(result) -> list:
+    """
+    Get the read lengths listed in the [Reads] section of an Illumina samplesheet, reading no
+    further than the end of the section
+        :param result (ValidationResult):   Validation outcome
+        :return read_lengths (list):        Read lengths, in file order
+    """
+    read_lengths = []
+    in_reads_section = False
+    with result.reader.open_lines() as lines:
+        for line in lines:
+            first_field = line.split(",", 1)[0].strip()
+            if first_field.startswith("["):
+                if in_reads_section or first_field == result.data_section_marker:
+                    break
+                in_reads_section = first_field == config.READS_SECTION_MARKER
+            elif in_reads_section and first_field.isdigit():
+                read_lengths.append(int(first_field))
+    return read_lengths
@@ -0,0 +1,201 @@
+""" sample_index.py
+
+Cross-run sample index, to detect the same patient sample booked on more than one concurrent run.
+Each samplesheet is validated in isolation, so a sample booked on two runs by mistake is not
+otherwise reported. The index holds the sample key (config.SAMPLE_INDEX_FIELDS of the seglh-naming
+sample, the DNA number and secondary identifier) of each sample of each run validated within the
+window (config.SAMPLE_INDEX_WINDOW_DAYS). Samples of a samplesheet whose key is also held for
+another run are reported, and the samplesheet's samples then replace those previously held for
+its run. Entries older than the window are evicted when the index is opened.
+
+The index is a local sqlite file keyed by sample key, so each sample is looked up without
+scanning the index. It can be shared across the threads of a process, and by separate processes
+validating samplesheets for different runs:
+
+    SELECT run, sample FROM run_samples WHERE sample_key = '123456_AB'
+"""
+import re
+import sqlite3
+import datetime
+import threading
+from typing import Union
+from . import config
+from seglh_naming.sample import Sample
+
+
+def get_sample_key(result, sample: str) -> Union[str, None]:
+    """
+    Get the key identifying the patient sample of a sample name across runs. The seglh-naming
+    sample parsed by the sample level checks is used, and the sample name is only parsed if its
+    row verdict was reused and it matches the prefilter
+        :param result (ValidationResult):   Validation outcome
+        :param sample (str):                Sample name
+        :return (str | None):               Sample key, None if the sample name is invalid
+    """
+    sample_obj = result.sample_objs.get(sample)
+    if sample_obj is None and result.validator.sample_name_prefilter.match(sample):
+        try:
+            sample_obj = result.sample_objs[sample] = Sample.from_string(sample)
+        except Exception as exception:
+            sample_obj = result.sample_objs[sample] = exception
+    if sample_obj is None or isinstance(sample_obj, Exception):
+        return None
+    return "_".join(str(getattr(sample_obj, field)) for field in config.SAMPLE_INDEX_FIELDS)
+
+
+class SampleIndex:
+    """
+    Index of the samples of recently validated runs
+
+    Attributes:
+        index_path (str):               sqlite file holding the index
+        window_days (float):            Number of days the samples of a run are held
+        connection (sqlite3.Connection):Connection to the index
+        lock (threading.Lock):          Serialises access to the connection across threads
+
+    Methods:
+        get_window_start()
+            Get the time before which entries are outside the window
+        evict()
+            Remove the entries older than the window
+        find_other_runs(run, sample_keys)
+            Get the other runs within the window holding each sample key
+        record_run(run, samples)
+            Replace the samples held for a run
+        check_result(result)
+            Check the samples of a validation are not on other runs, then record them
+        close()
+            Close the index
+    """
+
+    def __init__(self, index_path: str, window_days: float = config.SAMPLE_INDEX_WINDOW_DAYS):
+        """
+        Constructor for the SampleIndex class
+            :param index_path (str):        sqlite file holding the index, created if it does not
+                                            exist
+            :param window_days (float):     Number of days the samples of a run are held
+        """
+        self.index_path = index_path
+        self.window_days = window_days
+        self.lock = threading.Lock()
+        # Processes sharing the index wait for each other's transactions
+        self.connection = sqlite3.connect(index_path, timeout=60, check_same_thread=False)
+        self.connection.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS run_samples (
+                sample_key TEXT NOT NULL,
+                run TEXT NOT NULL,
+                sample TEXT NOT NULL,
+                validated_at TEXT NOT NULL,
+                PRIMARY KEY (sample_key, run)
+            );
+            CREATE INDEX IF NOT EXISTS run_samples_run ON run_samples (run);
+            CREATE INDEX IF NOT EXISTS run_samples_validated_at ON run_samples (validated_at);
+            """
+        )
+        self.evict()
+
+    def __enter__(self) -> "SampleIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def get_window_start(self) -> str:
+        """
+        Get the time before which entries are outside the window
+            :return (str):  ISO format time
+        """
+        return (
+            datetime.datetime.now() - datetime.timedelta(days=self.window_days)
+        ).isoformat(timespec="seconds")
+
+    def evict(self) -> int:
+        """
+        Remove the entries older than the window
+            :return (int):  Number of entries removed
+        """
+        with self.lock, self.connection:
+            return self.connection.execute(
+                "DELETE FROM run_samples WHERE validated_at < ?", (self.get_window_start(),)
+            ).rowcount
+
+    def find_other_runs(self, run: str, sample_keys: list) -> dict:
+        """
+        Get the other runs within the window holding each sample key
+            :param run (str):           Run being validated
+            :param sample_keys (list):  Sample keys of the run
+            :return (dict):             Sample keys held for other runs, each a list of (run,
+                                        sample, time validated)
+        """
+        window_start = self.get_window_start()
+        other_runs = {}
+        with self.lock:
+            for sample_key in sample_keys:
+                rows = self.connection.execute(
+                    "SELECT run, sample, validated_at FROM run_samples "
+                    "WHERE sample_key = ? AND run != ? AND validated_at >= ?",
+                    (sample_key, run, window_start),
+                ).fetchall()
+                if rows:
+                    other_runs[sample_key] = rows
+        return other_runs
+
+    def record_run(self, run: str, samples: dict) -> None:
+        """
+        Replace the samples held for a run, in a single transaction
+            :param run (str):       Run validated
+            :param samples (dict):  Sample keys of the run, and their sample names
+            :return None:
+        """
+        validated_at = datetime.datetime.now().isoformat(timespec="seconds")
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM run_samples WHERE run = ?", (run,))
+            self.connection.executemany(
+                "INSERT INTO run_samples VALUES (?, ?, ?, ?)",
+                [
+                    (sample_key, run, sample, validated_at)
+                    for sample_key, sample in samples.items()
+                ],
+            )
+
+    def check_result(self, result) -> None:
+        """
+        Check the samples of a validation are not on other runs within the window, then record
+        them. Rows with invalid sample names and control samples
+        (config.SAMPLE_INDEX_EXCLUDED_SAMPLES) are not checked
+            :param result (ValidationResult):   Validation outcome
+            :return None:
+        """
+        samples = {}  # Sample key and sample name of each sample
+        sample_key_lines = {}  # Lines holding each sample key
+        for verdict in result.sample_verdicts:
+            sample = verdict["columns"].get("Sample_Name", verdict["columns"].get("Sample_ID", ""))
+            if re.search(config.SAMPLE_INDEX_EXCLUDED_SAMPLES, sample):
+                continue
+            sample_key = get_sample_key(result, sample)
+            if sample_key:
+                samples.setdefault(sample_key, sample)
+                sample_key_lines.setdefault(sample_key, []).append(verdict["line_index"])
+        other_runs = self.find_other_runs(result.runfolder_name, list(samples))
+        for sample_key, runs in other_runs.items():
+            line_numbers = ", ".join(map(str, sample_key_lines[sample_key]))
+            for run, _, validated_at in runs:
+                log_args = (samples[sample_key], line_numbers, run, validated_at, self.window_days)
+                result.errors = True
+                result.add_msg_to_error_dict(
+                    "Sample on another run",
+                    result.logger.log_msgs["sample_on_other_run"] % log_args,
+                )
+                result.logger.warning(result.logger.log_msgs["sample_on_other_run"], *log_args)
+        if not other_runs:
+            result.logger.info(result.logger.log_msgs["no_samples_on_other_runs"], self.window_days)
+        self.record_run(result.runfolder_name, samples)
+
+    def close(self) -> None:
+        """
+        Close the index
+            :return None:
+        """
+        self.connection.close()
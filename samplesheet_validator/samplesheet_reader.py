@@ -0,0 +1,346 @@
+""" samplesheet_reader.py
+
+Reads the samplesheet of a validation, from file, from a buffer or from a memory map of the file.
+Lines are checked against the resource limits as they are read, and lines that are not valid
+UTF-8 are decoded with the fallback encoding.
+"""
+import io
+import os
+import csv
+import mmap
+import contextlib
+from typing import Iterator, Union
+from . import config
+
+
+class SamplesheetReader:
+    """
+    Reads the samplesheet of a validation, passing the lines parsed to the ValidationResult
+
+    Attributes:
+        result (ValidationResult):      Validation the samplesheet is read for
+        memory_map (bool):              True if samplesheet files are parsed from a memory map
+                                        rather than read into a list of lines
+        ss_contents (None | list):      Lines of the samplesheet, populated on first read
+        ss_size (None | int):           Size in bytes of the samplesheet, set once it is read or
+                                        if supplied as a buffer
+        samplesheet_stream (None | obj):    Samplesheet file left open by read_run_parameters()
+        header_lines (list):            Lines already read from samplesheet_stream
+
+    Methods:
+        read_buffer(buffer)
+            Read the contents of a samplesheet buffer, up to the size limit
+        load_contents(contents)
+            Split the contents of a samplesheet buffer into lines
+        read_samplesheet()
+            Read samplesheet lines from file, caching them for subsequent checks
+        open_samplesheet()
+            Open the samplesheet file for reading lines
+        open_lines()
+            Open the samplesheet lines for reading the sections before the data section
+        normalise_line(line, line_index)
+            Decode a line that is not valid UTF-8 with the fallback encoding
+        decode_bytes(data, line_index)
+            Decode bytes of a samplesheet line read from a memory map
+        read_lines(samplesheet_stream)
+            Read lines from an open samplesheet, stopping at any exceeded resource limit
+        check_line_limits(line, line_index)
+            Check a samplesheet line against the line count, line length and column limits
+        map_samplesheet()
+            Memory-map the samplesheet file
+        close()
+            Close the samplesheet file if left open by read_run_parameters()
+        read_run_parameters()
+            Read the leading Aviti [RunParameters] section, leaving the file open
+        parse_mapped_data_section()
+            Parse the Illumina data section from a memory map, using bytes searches
+        open_aviti_lines()
+            Open the lines of an Aviti samplesheet from the [SAMPLES] section marker
+        iter_mapped_lines(samplesheet_map, first_line_index)
+            Yield lines from a memory map, stopping at any exceeded resource limit
+    """
+
+    def __init__(self, result, memory_map: bool = False):
+        """
+        Constructor for the SamplesheetReader class
+            :param result (ValidationResult):   Validation the samplesheet is read for
+            :param memory_map (bool):           Parse samplesheet files from a memory map
+        """
+        self.result = result
+        self.memory_map = memory_map
+        self.ss_contents = None
+        self.ss_size = None
+        self.samplesheet_stream = None
+        self.header_lines = []
+
+    @property
+    def mapped(self) -> bool:
+        """
+        True if the samplesheet is parsed from a memory map of the file
+        """
+        return self.memory_map and self.ss_contents is None
+
+    def read_buffer(self, buffer: io.IOBase) -> str:
+        """
+        Read the contents of a samplesheet buffer, no further than needed to find it exceeds
+        the size limit
+            :param buffer (io.IOBase):  File object containing the samplesheet
+            :return contents (str):     Contents, empty if the buffer exceeds the size limit
+        """
+        max_bytes = self.result.validator.max_bytes
+        contents = buffer.read(max_bytes + 1)
+        if isinstance(contents, bytes):
+            self.ss_size = len(contents)
+            contents = contents.decode(config.SAMPLESHEET_ENCODING, "surrogateescape")
+        else:
+            self.ss_size = len(contents.encode("utf-8"))
+            contents = contents.lstrip("\ufeff")
+        if self.ss_size > max_bytes:
+            contents = ""  # Rejected by check_file_contents()
+        return contents
+
+    def load_contents(self, contents: str) -> None:
+        """
+        Split the contents of a samplesheet buffer into lines, checked and normalised as lines
+        read from file are
+            :param contents (str):  Contents, from read_buffer()
+            :return None:
+        """
+        self.ss_contents = self.read_lines(io.StringIO(contents, newline=None))
+
+    def read_samplesheet(self) -> Union[list, None]:
+        """
+        Read samplesheet lines from file, caching them so the file is only read once
+            :return ss_contents (list | None):  Samplesheet lines, None if file does not exist
+        """
+        if self.ss_contents is None and self.samplesheet_stream is not None:
+            # Continue from the lines already read by read_run_parameters()
+            with self.samplesheet_stream:
+                self.ss_size = os.fstat(self.samplesheet_stream.fileno()).st_size
+                self.ss_contents = self.header_lines
+                self.ss_contents += self.read_lines(self.samplesheet_stream)
+            self.samplesheet_stream = None
+        elif self.ss_contents is None and os.path.isfile(self.result.samplesheet_path):
+            with self.open_samplesheet() as samplesheet_stream:
+                self.ss_size = os.fstat(samplesheet_stream.fileno()).st_size
+                self.ss_contents = self.read_lines(samplesheet_stream)
+        return self.ss_contents
+
+    def open_samplesheet(self) -> io.TextIOWrapper:
+        """
+        Open the samplesheet file for reading lines, keeping bytes that are not valid UTF-8 as
+        surrogates for normalise_line()
+            :return (io.TextIOWrapper):     Open samplesheet, to be closed by the caller
+        """
+        return open(
+            self.result.samplesheet_path,
+            "r",
+            encoding=config.SAMPLESHEET_ENCODING,
+            errors="surrogateescape",
+        )
+
+    def open_lines(self) -> contextlib.AbstractContextManager:
+        """
+        Open the samplesheet lines for reading the sections before the data section. When
+        parsing from a memory map, lines are read from the file only as far as the caller reads
+            :return (contextlib.AbstractContextManager):    Context holding the lines
+        """
+        if self.mapped:
+            return self.open_samplesheet()
+        return contextlib.nullcontext(self.read_samplesheet() or [])
+
+    def normalise_line(self, line: str, line_index: int) -> str:
+        """
+        Decode a line that is not valid UTF-8 with the fallback encoding
+            :param line (str):          Samplesheet line, decoded with surrogateescape
+            :param line_index (int):    Index of line
+            :return line (str):         Decoded line
+        """
+        if not line.isascii():
+            try:
+                line.encode("utf-8")
+            except UnicodeEncodeError:
+                line = line.encode("utf-8", "surrogateescape").decode(
+                    config.SAMPLESHEET_FALLBACK_ENCODING
+                )
+                self.result.logger.info(
+                    self.result.logger.log_msgs["fallback_encoding"],
+                    line_index,
+                    config.SAMPLESHEET_FALLBACK_ENCODING,
+                )
+        return line
+
+    def decode_bytes(self, data: bytes, line_index: int) -> str:
+        """
+        Decode bytes of a samplesheet line read from a memory map, as lines read from file are
+            :param data (bytes):        Line, or field of a line
+            :param line_index (int):    Index of line
+            :return (str):              Decoded line or field
+        """
+        return self.normalise_line(
+            data.decode(config.SAMPLESHEET_ENCODING, "surrogateescape"), line_index
+        )
+
+    def read_lines(self, samplesheet_stream: io.TextIOBase) -> list:
+        """
+        Read lines from an open samplesheet, no longer than the line length limit, stopping at
+        the first exceeded resource limit
+            :param samplesheet_stream (io.TextIOBase):  Open samplesheet
+            :return lines (list):                       Lines read
+        """
+        lines = []
+        line_index = len(self.header_lines)
+        read_limit = self.result.validator.max_line_length + 2  # Allows for the line ending
+        for line in iter(lambda: samplesheet_stream.readline(read_limit), ""):
+            if not self.check_line_limits(line, line_index):
+                break
+            lines.append(self.normalise_line(line, line_index))
+            line_index += 1
+        return lines
+
+    def check_line_limits(self, line: Union[str, bytes], line_index: int) -> bool:
+        """
+        Check a samplesheet line against the line count, line length and column limits
+            :param line (str | bytes):  Samplesheet line
+            :param line_index (int):    Index of line
+            :return (bool):             True if the line is within the limits
+        """
+        validator = self.result.validator
+        line_ending, separator = (b"\r\n", b",") if isinstance(line, bytes) else ("\r\n", ",")
+        if line_index >= validator.max_lines:
+            self.result.report_limit_exceeded("max_lines_exceeded", validator.max_lines)
+        elif len(line.rstrip(line_ending)) > validator.max_line_length:
+            self.result.report_limit_exceeded(
+                "max_line_length_exceeded", line_index, validator.max_line_length
+            )
+        elif line.count(separator) >= validator.max_columns:
+            self.result.report_limit_exceeded(
+                "max_columns_exceeded", line_index, validator.max_columns
+            )
+        return not self.result.limit_exceeded
+
+    def map_samplesheet(self) -> mmap.mmap:
+        """
+        Memory-map the samplesheet file, read only
+            :return (mmap.mmap):    Memory map of the samplesheet, to be closed by the caller
+        """
+        if self.samplesheet_stream is not None:  # Map the file left open by read_run_parameters()
+            with self.samplesheet_stream as samplesheet_stream:
+                self.samplesheet_stream = None
+                return mmap.mmap(samplesheet_stream.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(self.result.samplesheet_path, "rb") as samplesheet_stream:
+            return mmap.mmap(samplesheet_stream.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self) -> None:
+        """
+        Close the samplesheet file if it was left open by read_run_parameters() and not read
+        further
+            :return None:
+        """
+        if self.samplesheet_stream is not None:
+            self.samplesheet_stream.close()
+            self.samplesheet_stream = None
+
+    def read_run_parameters(self) -> dict:
+        """
+        Read the leading [RunParameters] section of an Aviti samplesheet. The file is left open
+        at the next section, so the rest is read from the same buffered stream
+            :return run_parameters (dict):  Parameter names and values
+        """
+        if self.ss_contents is not None:
+            lines = iter(self.ss_contents)
+        else:
+            self.samplesheet_stream = self.open_samplesheet()
+            read_limit = self.result.validator.max_line_length + 2  # Allows for the line ending
+            lines = iter(lambda: self.samplesheet_stream.readline(read_limit), "")
+        run_parameters = {}
+        for line in lines:
+            if self.samplesheet_stream is not None:
+                if not self.check_line_limits(line, len(self.header_lines)):
+                    break
+                line = self.normalise_line(line, len(self.header_lines))
+                self.header_lines.append(line)
+            fields = [field.strip() for field in line.split(",")]
+            if fields[0].startswith("["):
+                if fields[0] != config.AVITI_RUN_PARAMETERS_SECTION:
+                    break  # End of the leading [RunParameters] section
+            elif fields[0]:
+                run_parameters[fields[0]] = fields[1] if len(fields) > 1 else ""
+        return run_parameters
+
+    def parse_mapped_data_section(self) -> None:
+        """
+        Parse the Illumina data section from a memory map of the file. The header line is
+        located with bytes searches, and only the sample and index fields are decoded. Quoted
+        line breaks are not supported
+            :return None:
+        """
+        result = self.result
+        with self.map_samplesheet() as samplesheet_map:
+            section_start = max(samplesheet_map.rfind(result.data_section_marker.encode()), 0)
+            header_position = max(
+                samplesheet_map.rfind(header.encode(), section_start)
+                for header in result.expected_data_headers
+            )
+            line_index = 0  # No header line, so all lines are parsed as sample lines
+            if header_position >= 0:
+                header_start = samplesheet_map.rfind(b"\n", 0, header_position) + 1
+                header_index = samplesheet_map[:header_start].count(b"\n")
+                samplesheet_map.seek(header_start)
+                header_line = samplesheet_map.readline().replace(b"\r\n", b"\n")
+                result.extract_headers(self.decode_bytes(header_line, header_index), header_index)
+                line_index = header_index + 1
+            decode_positions = {*result.sample_columns.values(), *result.index_columns.values()}
+            for line in self.iter_mapped_lines(samplesheet_map, line_index):
+                if b'"' in line:
+                    fields = next(csv.reader([self.decode_bytes(line, line_index)]), [""])
+                else:
+                    fields = [
+                        self.decode_bytes(field, line_index)
+                        if position in decode_positions
+                        else field
+                        for position, field in enumerate(line.rstrip(b"\r\n").split(b","))
+                    ]
+                result.parse_data_line(fields, line_index, line)
+                line_index += 1
+
+    @contextlib.contextmanager
+    def open_aviti_lines(self) -> Iterator[tuple]:
+        """
+        Open the lines of an Aviti samplesheet, from the [SAMPLES] section marker if parsing
+        from a memory map
+            :return (Iterator[tuple]):  Context holding the lines, and the index of the first
+        """
+        if not self.mapped:
+            yield iter(self.read_samplesheet()), 0
+            return
+        with self.map_samplesheet() as samplesheet_map:
+            section_start = samplesheet_map.find(self.result.data_section_marker.encode())
+            if section_start < 0:
+                yield iter(()), 0
+                return
+            samplesheet_map.seek(section_start)
+            first_line_index = samplesheet_map[:section_start].count(b"\n")
+            yield (
+                self.decode_bytes(line.replace(b"\r\n", b"\n"), line_index)
+                for line_index, line in enumerate(
+                    self.iter_mapped_lines(samplesheet_map, first_line_index), first_line_index
+                )
+            ), first_line_index
+
+    def iter_mapped_lines(
+        self, samplesheet_map: mmap.mmap, first_line_index: int
+    ) -> Iterator[bytes]:
+        """
+        Yield lines from a memory map of the samplesheet, from its current position, stopping
+        at the first line exceeding a resource limit
+            :param samplesheet_map (mmap.mmap): Memory map of the samplesheet
+            :param first_line_index (int):      Index of the line at the current position
+            :return (Iterator[bytes]):          Samplesheet lines
+        """
+        for line_index, line in enumerate(
+            iter(samplesheet_map.readline, b""), first_line_index
+        ):
+            if not self.check_line_limits(line, line_index):
+                return
+            yield line
@@ -3,58 +3,434 @@
 Script for checking sample sheet naming and contents.
 
 Uses the seglh-naming library. And adds further lab-specific checks e.g. whether sequencer IDs 
-match those in lists of allowed IDs. Collects all errors in an errors list (SamplesheetCheck.errors_dict)
+match those in lists of allowed IDs. Collects all errors in an errors list (ValidationResult.errors_dict)
 Contains the following classes:
 
+- Validator
+    Immutable validator engine built once from configuration. Can be shared across threads, and returns
+    a fresh ValidationResult for each samplesheet validated
+- ValidationResult
+    Holds the per-run state and runs the checks for a single samplesheet
 - SamplesheetCheck
-    Runs the checks. Called by webapp for uploaded samplesheets (uses name of file being uploaded), and
-    called for runs not yet demultiplexed (uses path of expected samplesheet from demultiplex script)
+    Backwards-compatible wrapper that builds a Validator from the supplied configuration. Called by webapp
+    for uploaded samplesheets (uses name of file being uploaded), and called for runs not yet demultiplexed
+    (uses path of expected samplesheet from demultiplex script)
 """
+import io
 import os
 import re
+import csv
+import json
+import hashlib
+import itertools
 import logging
-from typing import Union
+from typing import Iterator, Union
+from . import config
 from .ss_logger import SSLogger
+from .barcodes import find_index_collisions, is_valid_barcode
+from .results_store import ResultsStore
+from .content_store import ContentStore
+from .sample_index import SampleIndex
+from .md_index import get_md_index
+from .run_files import check_run_files
+from .samplesheet_reader import SamplesheetReader
+from .verdict_cache import VerdictCache
 from seglh_naming.sample import Sample
 from seglh_naming.samplesheet import Samplesheet
 
 
-class SamplesheetCheck:
+class Validator:
     """
-    Runs the checks. Called by webapp for uploaded samplesheets (uses name of file being uploaded), and
-    called for runs not yet demultiplexed (uses path of expected samplesheet from demultiplex script)
+    Immutable validator engine, built once from configuration. All per-run state is held by the
+    ValidationResult returned by validate(), so an instance can be shared across threads
 
     Attributes:
-        samplesheet_path (str):         Path to samplesheet
+        sequencer_ids (frozenset):          Valid sequencer IDs
+        panels (frozenset):                 Valid pan numbers
+        tso_panels (frozenset):             Valid TSO pannumbers
+        okd_panels (frozenset):             Valid OKD pannumbers
+        dev_pannos (tuple):                 Development pan numbers
+        logdir (str):                       Log file directory
+        valid_chars_pattern (re.Pattern):   Compiled pattern matching sample names without
+                                            illegal characters
+        dev_panno_pattern (None | re.Pattern):  Compiled pattern matching any development pan
+                                                number, None if there are none
+        sample_name_prefilter (re.Pattern): Compiled pattern matching the structure of seglh-naming
+                                            sample names
+        min_index_distance (int):           Minimum number of positions at which the barcodes of
+                                            samples sharing a lane must differ
+        max_bytes (int):                    Maximum samplesheet size in bytes
+        max_lines (int):                    Maximum number of samplesheet lines
+        max_columns (int):                  Maximum number of comma separated columns in a line
+        max_line_length (int):              Maximum line length in characters
+        md_dir (None | str):                MasterDataFile directory, None if the MasterDataFile
+                                            check is not run
+        check_run_files (bool):             True if samplesheets are cross-checked against the
+                                            run files in their runfolder
+        config_digest (str):                Digest of the configuration the sample level checks
+                                            depend on
+
+    Methods:
+        from_config(validator_config, logdir)
+            Build a Validator from a configuration dictionary
+        from_config_file(config_path, logdir)
+            Build a Validator from a JSON configuration file
+        validate(path_or_buffer, illumina, runname, *, samplesheet_name, queue_logging,
+                 memory_map, incremental, results_store, content_store, sample_index)
+            Validate a samplesheet, returning a fresh ValidationResult
+        stream(samplesheet_name, illumina, runname, *, queue_logging, incremental, results_store,
+               sample_index)
+            Start validating a samplesheet fed in chunks, returning a StreamingValidationResult
+    """
+
+    __slots__ = (
+        "sequencer_ids",
+        "panels",
+        "tso_panels",
+        "okd_panels",
+        "dev_pannos",
+        "logdir",
+        "valid_chars_pattern",
+        "dev_panno_pattern",
+        "sample_name_prefilter",
+        "min_index_distance",
+        "max_bytes",
+        "max_lines",
+        "max_columns",
+        "max_line_length",
+        "md_dir",
+        "check_run_files",
+        "config_digest",
+    )
+
+    def __init__(
+        self,
+        sequencer_ids: list,
+        panels: list,
+        tso_panels: list,
+        okd_panels: list,
+        dev_pannos: list,
+        logdir: str,
+        min_index_distance: int = config.MIN_INDEX_DISTANCE,
+        max_bytes: int = config.MAX_BYTES,
+        max_lines: int = config.MAX_LINES,
+        max_columns: int = config.MAX_COLUMNS,
+        max_line_length: int = config.MAX_LINE_LENGTH,
+        md_dir: Union[str, None] = None,
+        check_run_files: bool = False,
+    ):
+        """
+        Constructor for the Validator class
+            :param sequencer_ids (list):        Allowed sequencer IDs
+            :param panels (list):               Allowed pan numbers
+            :param tso_panels (list):           TSO500 pan numbers
+            :param okd_panels (list):           Oncodeep pan numbers
+            :param dev_pannos (list):           Development pan numbers
+            :param logdir (str):                Log file directory
+            :param min_index_distance (int):    Minimum barcode distance between samples sharing
+                                                a lane
+            :param max_bytes (int):             Maximum samplesheet size in bytes
+            :param max_lines (int):             Maximum number of samplesheet lines
+            :param max_columns (int):           Maximum number of columns in a line
+            :param max_line_length (int):       Maximum line length in characters
+            :param md_dir (str | None):         MasterDataFile directory, if runs are checked for
+                                                a MasterDataFile
+            :param check_run_files (bool):      Cross-check samplesheets against the run files in
+                                                the directory holding them
+        """
+        object.__setattr__(self, "sequencer_ids", frozenset(sequencer_ids))
+        object.__setattr__(self, "panels", frozenset(panels))
+        object.__setattr__(self, "tso_panels", frozenset(tso_panels))
+        object.__setattr__(self, "okd_panels", frozenset(okd_panels))
+        object.__setattr__(self, "dev_pannos", tuple(dev_pannos))
+        object.__setattr__(self, "logdir", logdir)
+        object.__setattr__(
+            self, "valid_chars_pattern", re.compile(config.VALID_SAMPLE_CHARS)
+        )
+        object.__setattr__(
+            self,
+            "dev_panno_pattern",
+            re.compile("|".join(map(re.escape, self.dev_pannos)))
+            if self.dev_pannos
+            else None,
+        )
+        object.__setattr__(
+            self, "sample_name_prefilter", re.compile(config.SAMPLE_NAME_PREFILTER)
+        )
+        object.__setattr__(self, "min_index_distance", int(min_index_distance))
+        object.__setattr__(self, "max_bytes", int(max_bytes))
+        object.__setattr__(self, "max_lines", int(max_lines))
+        object.__setattr__(self, "max_columns", int(max_columns))
+        object.__setattr__(self, "max_line_length", int(max_line_length))
+        object.__setattr__(self, "md_dir", md_dir)
+        object.__setattr__(self, "check_run_files", bool(check_run_files))
+        object.__setattr__(
+            self,
+            "config_digest",
+            hashlib.sha256(
+                json.dumps(
+                    [
+                        sorted(self.sequencer_ids),
+                        sorted(self.panels),
+                        sorted(self.tso_panels),
+                        sorted(self.okd_panels),
+                        list(self.dev_pannos),
+                        self.min_index_distance,
+                        config.VALID_SAMPLE_CHARS,
+                        config.SAMPLE_NAME_PREFILTER,
+                    ]
+                ).encode()
+            ).hexdigest(),
+        )
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError(f"{type(self).__name__} object is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} object is immutable")
+
+    def __getstate__(self) -> dict:
+        """
+        Pickle the prebuilt lookups and configuration digest, so unpickling (e.g. in pool
+        workers) does not rebuild them from the configuration lists
+        """
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __setstate__(self, state: dict) -> None:
+        for slot, value in state.items():
+            object.__setattr__(self, slot, value)
+
+    @classmethod
+    def from_config(
+        cls, validator_config: dict, logdir: Union[str, None] = None
+    ) -> "Validator":
+        """
+        Build a Validator from a configuration dictionary. Lists may be supplied as lists
+        or as comma separated strings, as on the command line
+            :param validator_config (dict): Configuration, with keys config.CONFIG_KEYS, and
+                                            optionally min_index_distance, the resource
+                                            limits (config.RESOURCE_LIMITS), md_dir and
+                                            check_run_files
+            :param logdir (str | None):     Log file directory. Overrides any logdir in the
+                                            configuration
+            :return (Validator):            Validator object
+        """
+        missing_keys = [key for key in config.CONFIG_KEYS if key not in validator_config]
+        if missing_keys:
+            raise ValueError(f"Validator configuration is missing keys: {missing_keys}")
+        config_lists = {}
+        for key in config.CONFIG_KEYS:
+            value = validator_config[key]
+            config_lists[key] = value.split(",") if isinstance(value, str) else value
+        logdir = logdir or validator_config.get("logdir")
+        if not logdir:
+            raise ValueError("Validator configuration requires a logdir")
+        return cls(
+            **config_lists,
+            logdir=logdir,
+            min_index_distance=validator_config.get(
+                "min_index_distance", config.MIN_INDEX_DISTANCE
+            ),
+            **{
+                key: validator_config.get(key, default)
+                for key, default in config.RESOURCE_LIMITS.items()
+            },
+            md_dir=validator_config.get("md_dir"),
+            check_run_files=validator_config.get("check_run_files", False),
+        )
+
+    @classmethod
+    def from_config_file(
+        cls, config_path: str, logdir: Union[str, None] = None
+    ) -> "Validator":
+        """
+        Build a Validator from a JSON configuration file
+            :param config_path (str):       Path to JSON configuration file
+            :param logdir (str | None):     Log file directory. Overrides any logdir in the
+                                            configuration file
+            :return (Validator):            Validator object
+        """
+        with open(config_path, "r") as config_file:
+            return cls.from_config(json.load(config_file), logdir)
+
+    def validate(
+        self,
+        path_or_buffer: Union[str, os.PathLike, io.IOBase],
+        illumina: bool = True,
+        runname: str = "",
+        *,
+        samplesheet_name: Union[str, None] = None,
+        queue_logging: bool = False,
+        memory_map: bool = False,
+        incremental: bool = False,
+        results_store: Union[ResultsStore, None] = None,
+        content_store: Union[ContentStore, None] = None,
+        sample_index: Union[SampleIndex, None] = None,
+    ) -> "ValidationResult":
+        """
+        Validate a samplesheet, returning a new ValidationResult holding the outcome
+            :param path_or_buffer (str | PathLike | IOBase):    Path to samplesheet, or a file
+                                                                object containing the samplesheet
+            :param illumina (bool):                             Illumina or not
+            :param runname (str):                               Processed run folder name
+            :param samplesheet_name (str | None):               Samplesheet name, used for naming
+                                                                checks when validating a buffer
+            :param queue_logging (bool):                        Write log records to file from a
+                                                                listener thread
+            :param memory_map (bool):                           Parse the samplesheet from a memory
+                                                                map of the file
+            :param incremental (bool):                          Only re-validate sample rows changed
+                                                                since the previous validation
+            :param results_store (ResultsStore | None):         Store to record the per-sample
+                                                                results in
+            :param content_store (ContentStore | None):         Store of the outcomes of samplesheet
+                                                                contents already validated
+            :param sample_index (SampleIndex | None):           Index of the samples of recently
+                                                                validated runs
+            :return result (ValidationResult):                  Validation outcome
+        """
+        result = ValidationResult(
+            self,
+            path_or_buffer,
+            illumina,
+            runname,
+            samplesheet_name=samplesheet_name,
+            queue_logging=queue_logging,
+            memory_map=memory_map,
+            incremental=incremental,
+            results_store=results_store,
+            content_store=content_store,
+            sample_index=sample_index,
+        )
+        result.ss_checks()
+        return result
+
+    def stream(
+        self,
+        samplesheet_name: str,
+        illumina: bool = True,
+        runname: str = "",
+        *,
+        queue_logging: bool = False,
+        incremental: bool = False,
+        results_store: Union[ResultsStore, None] = None,
+        sample_index: Union[SampleIndex, None] = None,
+    ) -> "StreamingValidationResult":
+        """
+        Start validating a samplesheet fed in chunks as it arrives (e.g. as it is uploaded),
+        through feed() and close() on the returned StreamingValidationResult
+            :param samplesheet_name (str):  Samplesheet name, used for naming checks
+            :param illumina (bool):         Illumina or not
+            :param runname (str):           Processed run folder name
+            :param queue_logging (bool):    Write log records to file from a listener thread
+            :param incremental (bool):      Only re-validate sample rows changed since the
+                                            previous validation
+            :param results_store (ResultsStore | None): Store to record the per-sample results in
+            :param sample_index (SampleIndex | None):   Index of the samples of recently validated
+                                                        runs
+            :return (StreamingValidationResult):    Validation fed the samplesheet in chunks
+        """
+        from .streaming import StreamingValidationResult  # Imports this module
+
+        return StreamingValidationResult(
+            self,
+            samplesheet_name,
+            illumina,
+            runname,
+            queue_logging=queue_logging,
+            incremental=incremental,
+            results_store=results_store,
+            sample_index=sample_index,
+        )
+
+
+class ValidationResult:
+    """
+    Holds the per-run state for a single samplesheet validation, and runs the checks against
+    the configuration held by a Validator
+
+    Attributes:
+        validator (Validator):          Validator holding the configuration for the run
+        samplesheet_path (str):         Path to samplesheet (or samplesheet name if validating
+                                        a buffer)
+        reader (SamplesheetReader):     Reads the samplesheet
         logdir (str):                   Log file directory
-        logger (obj):                   Logger object
         ss_obj (False | obj):           seglh-naming samplesheet object
         dev_run (bool):                 True if run is a development run, else False
         pannumbers (list):              Panel numbers in the sample sheet
         tso (bool):                     True if samplesheet contains any TSO samples
         okd (bool):                     True if samplesheet contains any OKD samples
         samples (dict):                 Dictionary of sample IDs and sample names from the samplesheet
+        sample_rows (list):             (line index, {column: sample}) for each sample line
+        mismatched_samples (dict):      (Sample_ID, Sample_Name) of each sample line on which they
+                                        differ, by line index
+        legal_chars (dict):             Distinct sample strings, True if they contain no illegal characters
+        sample_objs (dict):             Distinct sample strings, and their seglh-naming sample object or
+                                        the exception raised when parsing them
+        sample_columns (dict):          Positions of the Sample_ID and Sample_Name columns
+        index_columns (dict):           Positions of the index, index2 and lane columns
+        control_rows (list):            (line index, control name, {column: value}) for each Aviti
+                                        control line
+        lane_indexes (dict):            Lanes, each a list of ((line index, sample), barcode)
+        sample_indexes (list):          (line index, sample ID, {column: value}) for each sample line
+        sample_lines (dict):            Sample_ID and Sample_Name columns, each a dictionary of
+                                        distinct samples and the indexes of the lines holding them
+        index_lines (dict):             Distinct (index, index2, lane) tuples, and the indexes of the
+                                        lines holding them
         errors (bool):                  True if samplesheet errors encountered, False if not
         errors_dict (dict):             Stores identifiers for any types of errors encountered
         data_headers (list):            Populated with headers from data section
         missing_headers (list):         Populated with missing data headers
         expected_data_headers (list):   Headers expected to be present in samplesheet
-        sequencer_ids (list):           Valid sequencer IDs
-        panels (list):                  Valid pan numbers
-        tso_panels (list):              Valid TSO pannumbers
-        okd_panels (list):              Valid OKD pannumbers
-        development_panels (list):      Development pan numbers
+        sequencer_ids (frozenset):      Valid sequencer IDs
+        panels (frozenset):             Valid pan numbers
+        tso_panels (frozenset):         Valid TSO pannumbers
+        okd_panels (frozenset):         Valid OKD pannumbers
+        dev_pannos (tuple):             Development pan numbers
         runfolder_name (str):           Name of runfolder
         logfile_path (str):             Path to use for logfile
         logger (logging.Logger):        Logger
         illumina(bool)                  Type of seqencing instrument (Illumina or Aviti)
         runname(str)                    Name of processed run folder
+        queue_logging (bool):           True if log records are written to file by a queue listener
+        queue_handler (None | obj):     QueueHandler used when queue_logging is True
+        log_handler (None | obj):       Handler added to the logger for this run
+        data_section_marker (str):      Marker of the section containing the sample lines
+        row_errors (None | dict):       Errors raised by the checks of the sample row being validated
+        verdict_cache (None | VerdictCache):    Row verdicts of the previous validation of the
+                                                runfolder, if validating incrementally
+        results_store (None | ResultsStore):    Store the per-sample results are recorded in
+        sample_verdicts (list):         Verdicts of the sample rows, kept for the stores and index
+        content_store (None | ContentStore):    Store of the outcomes of samplesheet contents
+        content_key (None | str):       Key of the samplesheet contents in the content store
+        sample_index (None | SampleIndex):  Index of the samples of recently validated runs
+        limit_exceeded (bool):          True if the samplesheet exceeds a resource limit
 
     Methods:
         get_logger()
             Get logger for the class
+        close_logger()
+            Remove and close the handler added to the logger for this run
+        get_summary()
+            Get a picklable summary of the validation outcome
+        report_limit_exceeded(log_msg, *args)
+            Report an exceeded resource limit
         ss_checks()
             Run checks at samplesheet and sample level
+        iter_sample_verdicts()
+            Run checks at samplesheet and sample level, yielding the verdict for each sample row
+        iter_stored_verdicts()
+            Run the checks on the samplesheet contents, or reuse their stored outcome
+        iter_content_verdicts()
+            Run the checks on the samplesheet contents, yielding the verdict for each sample row
+        finish_checks()
+            Run the checks that follow the sample level checks
+        check_sample_row(line_index, sample_row)
+            Run the sample level checks for a sample row, returning its verdict
+        get_row_verdict(line_index, sample_row)
+            Get the verdict for a sample row, from the verdict cache if the row is unchanged
+        apply_cached_verdict(cached_verdict)
+            Add the errors and pan numbers of a cached row verdict to this validation
         check_ss_present()
             Checks samplesheet exists
         add_msg_to_error_dict()
@@ -68,83 +444,145 @@ class SamplesheetCheck:
             Checks that a file is not empty (<10 bytes)
         get_data_section()
             Parse data section of samplesheet from file
+        get_listed_data_section()
+            Parse data section of samplesheet from the list of samplesheet lines
+        parse_data_line(fields, line_index, line)
+            Parse a line following the [Data] section headers
+        parse_aviti_samples(lines, first_line_index)
+            Parse the Aviti [SAMPLES] section
+        parse_aviti_line(fields, line_index, line)
+            Parse a line within the Aviti [SAMPLES] section
+        extract_headers(line, line_index, fields)
+            Extract headers from line
+        extract_sample_fields(fields, line_index, line)
+            Extract sample name, sample id and indexes from the fields of a sample row
+        extract_sample_indexes(fields, line_index, sample_row)
+            Extract the index, index2 and lane of a sample line
+        extract_control_row(fields, line_index)
+            Extract the name and indexes of an Aviti control line
+        index_lanes(fields, line_index, sample)
+            Get the indexes of a line, adding its barcode to the lane index
         development_run()
             Check if the run is a development run, by determining if the run contains
             any development pan numbers
         check_expected_headers()
             Check [Data] section has expected headers, against self.expected_data_headers list
-        comp_samplenameid()
-            Check whether names match between Sample_ID and Sample_Name in data section
-            of samplesheet
-        check_illegal_chars(sample, column)
+        report_mismatched_sample(line_index, sample_id, sample_name)
+            Report a sample line whose Sample_ID and Sample_Name differ
+        check_duplicates()
+            Check sample IDs, sample names and (index, index2, lane) tuples are not duplicated
+        check_sample_columns(line_index, sample_row)
+            Run the sample name checks for each column of a sample row
+        check_illegal_chars(sample, column, line_index)
             Returns true if illegal characters present
-        check_sample(sample, column)
+        check_sample(sample, column, line_index)
             Validate sample names using seglh-naming Sample module.
-        check_pannos(sample, column, sample_obj)
+        check_pannos(sample, column, sample_obj, line_index)
             Check sample names contain allowed pan numbers from self.panels number list
         check_tso()
             Assigns self.tso as True if TSO run
         check_okd()
             Assigns self.okd as True if OKD run
+        check_index_collisions()
+            Check the barcodes of samples sharing a lane are sufficiently distinct
         check_md_file()
-            Checks a matching MasterDateFile is present
+            Checks a matching MasterDataFile is present, if a MasterDataFile directory is
+            configured
         log_summary()
             Write summary of validator outcome to log
         get_aviti_run_folder_name()
             Get the aviti run folder name from the sample sheet content
         check_aviti_run_folder_name()
-            Check if the run folder name extracted from samplesheet matches with 
+            Check if the run folder name extracted from samplesheet matches with
             actual Aviti run folder name provided in the args
     """
 
     def __init__(
         self,
-        samplesheet_path: str,
-        sequencer_ids: list,
-        panels: list,
-        tso_panels: list,
-        okd_panels: list,
-        dev_pannos: list,
-        logdir: str,
+        validator: Validator,
+        path_or_buffer: Union[str, os.PathLike, io.IOBase],
         illumina: bool,
-        runname: str
+        runname: str,
+        *,
+        samplesheet_name: Union[str, None] = None,
+        queue_logging: bool = False,
+        memory_map: bool = False,
+        incremental: bool = False,
+        results_store: Union[ResultsStore, None] = None,
+        content_store: Union[ContentStore, None] = None,
+        sample_index: Union[SampleIndex, None] = None,
     ):
         """
-        Constructor for the SamplesheetCheck class
-            :param samplesheet_path (str):      Path to samplesheet
-            :param sequencer_ids (list):        Allowed sequencer IDs
-            :param panels (list):               Allowed pan numbers
-            :param tso_panels (list):           TSO500 pan numbers
-            :param okd_panels (list):           Oncodeep pan numbers
-            :param dev_pannos (list):           Development pan numbers
-            :param logdir (str):                Log file directory
-            :param illumina(bool):              Illumina or not
-            :param runname (str):               Processed run folder name
+        Constructor for the ValidationResult class
+            :param validator (Validator):                       Validator holding the configuration
+            :param path_or_buffer (str | PathLike | IOBase):    Path to samplesheet, or a file
+                                                                object containing the samplesheet
+            :param illumina(bool):                              Illumina or not
+            :param runname (str):                               Processed run folder name
+            :param samplesheet_name (str | None):               Samplesheet name, required when
+                                                                validating a buffer without a name
+            :param queue_logging (bool):                        Write log records to file from a
+                                                                listener thread
+            :param memory_map (bool):                           Parse samplesheet files from a memory
+                                                                map (buffers are parsed as lines)
+            :param incremental (bool):                          Only re-validate sample rows changed
+                                                                since the previous validation
+            :param results_store (ResultsStore | None):         Store to record the per-sample
+                                                                results in
+            :param content_store (ContentStore | None):         Store of the outcomes of samplesheet
+                                                                contents already validated
+            :param sample_index (SampleIndex | None):           Index of the samples of recently
+                                                                validated runs
         """
-        self.samplesheet_path = samplesheet_path
-        self.logdir = logdir
+        self.validator = validator
+        self.limit_exceeded = False
+        self.reader = SamplesheetReader(self, memory_map)
+        contents = None
+        if isinstance(path_or_buffer, (str, os.PathLike)):
+            self.samplesheet_path = os.fspath(path_or_buffer)
+        else:
+            self.samplesheet_path = samplesheet_name or getattr(path_or_buffer, "name", None)
+            if not self.samplesheet_path:
+                raise ValueError("samplesheet_name is required when validating a buffer")
+            contents = self.reader.read_buffer(path_or_buffer)
+        self.logdir = validator.logdir
         self.ss_obj = False
         self.pannumbers = []
         self.tso = False
         self.okd = False
         # Store sample IDs and sample names from samplesheet
         self.samples = {"Sample_ID": [], "Sample_Name": []}
+        self.sample_rows = []  # Line index and sample ID/name of each sample line
+        self.mismatched_samples = {}  # Lines whose sample ID and sample name differ
+        # Outcomes of checks for each distinct sample string, so each is only checked once
+        self.legal_chars = {}
+        self.sample_objs = {}
+        self.sample_indexes = []  # Index, index2 and lane of each sample line
+        self.control_rows = []  # Aviti control lines
+        self.lane_indexes = {}  # Barcodes of the samples and controls in each lane
+        # Lines holding each sample and index combination, indexed as the data section is parsed
+        self.sample_lines = {"Sample_ID": {}, "Sample_Name": {}}
+        self.index_lines = {}
         self.errors = False  # Switches to True if samplesheet errors encountered
         self.errors_dict = {}
         self.data_headers = []  # Populate with headers from data section
         self.missing_headers = []  # Populate with missing headers
-        self.illumina = illumina      
+        self.illumina = illumina
         self.runname = runname
+        self.queue_logging = queue_logging
+        self.queue_handler = None
+        self.log_handler = None
         if self.illumina:
             self.expected_data_headers = ["Sample_ID", "Sample_Name", "index"]
+            self.data_section_marker = config.DATA_SECTION_MARKER
+            # Positions used if the headers are not found
+            self.sample_columns = {"Sample_ID": 0, "Sample_Name": 1}
         else:
-            self.expected_data_headers = ["# Fill in the correct sample schema associated with "
-                                          "the Freestyle Workflow for all sequenced samples. "]
-        self.sequencer_ids = sequencer_ids
-        self.panels = panels
-        self.tso_panels = tso_panels
-        self.okd_panels = okd_panels
-        self.dev_pannos = dev_pannos
+            self.expected_data_headers = config.AVITI_EXPECTED_HEADERS
+            self.data_section_marker = config.AVITI_DATA_SECTION_MARKER
+            self.sample_columns = {"Sample_ID": 0}  # Updated from the [SAMPLES] headers
+        self.index_columns = {}  # Populated from the data section headers
+        self.row_errors = None  # Errors of the sample row being validated
         if self.illumina:
             self.runfolder_name = (self.samplesheet_path.split("/")[-1]).split(
                 "_SampleSheet.csv"
@@ -152,22 +590,125 @@ class SamplesheetCheck:
         else:
             self.runfolder_name = self.runname
         self.logfile_path = (
-            f"{os.path.join(logdir, self.runfolder_name)}_samplesheet_validator.log"
+            f"{os.path.join(self.logdir, self.runfolder_name)}_samplesheet_validator.log"
         )
+        self.verdict_cache = None
+        if incremental:
+            self.verdict_cache = VerdictCache(
+                f"{os.path.join(self.logdir, self.runfolder_name)}{config.VERDICT_CACHE_SUFFIX}",
+                validator.config_digest,
+                illumina,
+            )
+        self.results_store = results_store
+        self.sample_verdicts = []
+        self.content_store = content_store
+        self.content_key = None
+        self.sample_index = sample_index
         self.logger = self.get_logger()
+        if contents is not None:
+            self.reader.load_contents(contents)
 
+    @property
+    def sequencer_ids(self) -> frozenset:
+        """
+        Valid sequencer IDs, from the validator configuration
+        """
+        return self.validator.sequencer_ids
+    @property
+    def panels(self) -> frozenset:
+        """
+        Valid pan numbers, from the validator configuration
+        """
+        return self.validator.panels
+    @property
+    def tso_panels(self) -> frozenset:
+        """
+        Valid TSO pannumbers, from the validator configuration
+        """
+        return self.validator.tso_panels
+    @property
+    def okd_panels(self) -> frozenset:
+        """
+        Valid OKD pannumbers, from the validator configuration
+        """
+        return self.validator.okd_panels
+    @property
+    def dev_pannos(self) -> tuple:
+        """
+        Development pan numbers, from the validator configuration
+        """
+        return self.validator.dev_pannos
     def get_logger(self) -> logging.Logger:
         """
         Get logger for the class
             :return (object):   Logger
         """
-        return SSLogger(self.logfile_path, self.runfolder_name).get_logger(__name__)
-
+        ss_logger = SSLogger(self.logfile_path, self.runfolder_name)
+        if self.queue_logging:
+            self.queue_handler = ss_logger.get_queue_handler()
+            self.log_handler = self.queue_handler
+        else:
+            self.log_handler = ss_logger.get_file_handler()
+        return ss_logger.get_logger(__name__, self.log_handler)
+    def close_logger(self) -> None:
+        """
+        Remove and close the handler added to the logger for this run, stopping any queue
+        listener thread first
+            :return None:
+        """
+        if self.queue_handler:
+            self.queue_handler.listener.stop()
+            self.queue_handler.file_handler.close()
+            self.queue_handler = None
+        if self.log_handler:
+            self.logger.removeHandler(self.log_handler)
+            self.log_handler.close()
+            self.log_handler = None
+    def get_summary(self) -> dict:
+        """
+        Get a summary of the validation outcome containing only plain data types, so that it
+        can be pickled
+            :return (dict):    Validation outcome
+        """
+        return {
+            "samplesheet_path": self.samplesheet_path,
+            "runfolder_name": self.runfolder_name,
+            "errors": self.errors,
+            "errors_dict": self.errors_dict,
+            "dev_run": getattr(self, "dev_run", False),
+            "tso": self.tso,
+            "okd": self.okd,
+            "pannumbers": list(self.pannumbers),
+        }
+    def report_limit_exceeded(self, log_msg: str, *args) -> None:
+        """
+        Report an exceeded resource limit. Only the first exceeded limit is reported, as
+        reading stops there
+            :param log_msg (str):   Key of the log message in config.LOG_MSGS
+            :param args:            Log message arguments
+            :return None:
+        """
+        if not self.limit_exceeded:
+            self.limit_exceeded = True
+            self.errors = True
+            self.add_msg_to_error_dict(
+                "Resource limit exceeded", self.logger.log_msgs[log_msg] % args
+            )
+            self.logger.warning(self.logger.log_msgs[log_msg], *args)
     def ss_checks(self) -> None:
         """
         Run checks at samplesheet and sample level. Performs required extra checks for
         checks not included in seglh-naming
         """
+        for _ in self.iter_sample_verdicts():
+            pass  # Errors are collected in self.errors_dict
+
+    def iter_sample_verdicts(self) -> Iterator[dict]:
+        """
+        Run checks at samplesheet and sample level, yielding the verdict for each sample row as
+        it is validated. self.errors_dict is complete once the generator is exhausted
+            :return (Iterator[dict]):   Verdict for each sample row, in file order
+        """
         if self.check_ss_present():
             if self.illumina: # if illumina, check if the ss name follows the convention
                 setattr(self, "ss_obj", self.check_ss_name())
@@ -176,27 +717,139 @@ class SamplesheetCheck:
                 self.check_run_folder_name()
             if self.ss_obj or not self.illumina:
                 self.check_sequencer_id()
+                self.check_md_file()
                 if self.check_file_contents(self.samplesheet_path):
-                    self.get_data_section()
-                    if not self.development_run():
-                        self.check_expected_headers() # not essential for aviti
-                        # Check sample id or sample name columns are not missing before
-                        # doing sample validation
-                        self.comp_samplenameid() # not essential for aviti
-                        for (
-                            column,
-                            samples,
-                        ) in self.samples.items():  # Run checks at the sample level
-                            for sample in samples:
-                                self.check_illegal_chars(sample, column)
-                                sample_obj = self.check_sample(sample, column)
-                                if sample_obj:
-                                    self.check_pannos(sample, column, sample_obj)
-                        self.check_tso()
-                        self.check_okd()
+                    check_run_files(self)
+                    yield from self.iter_stored_verdicts()
+                    # Run after the outcome is stored, as it depends on the other runs
+                    if (
+                        self.sample_index is not None
+                        and not self.limit_exceeded
+                        and not getattr(self, "dev_run", False)
+                    ):
+                        self.sample_index.check_result(self)
 
+        self.reader.close()
         self.log_summary()
 
+    def iter_stored_verdicts(self) -> Iterator[dict]:
+        """
+        Run the checks on the samplesheet contents, or reuse the stored outcome of identical
+        contents if there is a content store
+            :return (Iterator[dict]):   Verdict for each sample row, in file order
+        """
+        if self.content_store is not None:
+            self.content_key = self.content_store.get_result_key(self)
+        stored_outcome = self.content_key and self.content_store.lookup(self.content_key)
+        if stored_outcome:
+            yield from self.content_store.apply_outcome(self, stored_outcome)
+            if self.results_store is not None:
+                self.results_store.add_result(self, self.sample_verdicts)
+            return
+        errors_before = {
+            error_type: len(messages) for error_type, messages in self.errors_dict.items()
+        }
+        yield from self.iter_content_verdicts()
+        if self.content_key:
+            self.content_store.save_result(self, errors_before)
+
+    def iter_content_verdicts(self) -> Iterator[dict]:
+        """
+        Run the checks on the samplesheet contents, yielding the verdict for each sample row
+            :return (Iterator[dict]):   Verdict for each sample row, in file order
+        """
+        self.get_data_section()
+        if not self.limit_exceeded and not self.development_run():
+            self.check_expected_headers() # not essential for aviti
+            self.check_duplicates()
+            if self.verdict_cache is not None:
+                self.verdict_cache.load(self.logger)
+            # Run checks at the sample level, comparing sample id and sample
+            # name (not essential for aviti) row by row
+            for line_index, sample_row in self.sample_rows:
+                yield self.get_row_verdict(line_index, sample_row)
+            self.finish_checks()
+
+    def finish_checks(self) -> None:
+        """
+        Run the checks that follow the sample level checks
+            :return None:
+        """
+        if not self.mismatched_samples:
+            self.logger.info(self.logger.log_msgs["samplenames_match"])
+        self.check_tso()
+        self.check_okd()
+        self.check_index_collisions()
+        if self.verdict_cache is not None:
+            self.verdict_cache.save(self.logger, len(self.sample_rows))
+        if self.results_store is not None:
+            self.results_store.add_result(self, self.sample_verdicts)
+
+    def check_sample_row(self, line_index: int, sample_row: dict) -> dict:
+        """
+        Run the sample level checks for a sample row, collecting the errors raised for the row
+            :param line_index (int):    Index of line
+            :param sample_row (dict):   Sample ID and sample name of the line
+            :return verdict (dict):     Line index, sample columns, pan number and errors by
+                                        error type for the row
+        """
+        self.row_errors = {}
+        if line_index in self.mismatched_samples:
+            self.report_mismatched_sample(line_index, *self.mismatched_samples[line_index])
+        pannumbers = self.check_sample_columns(line_index, sample_row)
+        verdict = {
+            "line_index": line_index,
+            "columns": dict(sample_row),
+            "pannumber": pannumbers[0] if pannumbers else None,
+            "errors": self.row_errors,
+        }
+        self.row_errors = None
+        if self.verdict_cache is not None:
+            self.verdict_cache.add_verdict(sample_row, verdict, pannumbers)
+        return verdict
+
+    def get_row_verdict(self, line_index: int, sample_row: dict) -> dict:
+        """
+        Get the verdict for a sample row, reusing the cached verdict if validating
+        incrementally and the row is unchanged
+            :param line_index (int):    Index of line
+            :param sample_row (dict):   Sample ID and sample name of the line
+            :return verdict (dict):     Verdict for the row
+        """
+        verdict = None
+        if self.verdict_cache is not None:
+            cached_verdict = self.verdict_cache.get_cached_verdict(sample_row, line_index)
+            if cached_verdict is not None:
+                verdict = self.apply_cached_verdict(cached_verdict)
+        if verdict is None:
+            verdict = self.check_sample_row(line_index, sample_row)
+        if (
+            self.results_store is not None
+            or self.content_store is not None
+            or self.sample_index is not None
+        ):
+            self.sample_verdicts.append(verdict)
+        return verdict
+
+    def apply_cached_verdict(self, cached_verdict: dict) -> dict:
+        """
+        Add the errors and pan numbers of a cached row verdict to this validation, as if the
+        sample level checks had been run on the row
+            :param cached_verdict (dict):   Cached verdict and pan numbers of the row, for its
+                                            current line
+            :return verdict (dict):         Verdict for the row
+        """
+        verdict = cached_verdict["verdict"]
+        for error_type, messages in verdict["errors"].items():
+            for message in messages:
+                self.errors = True
+                self.add_msg_to_error_dict(error_type, message)
+                self.logger.warning(message)
+        for pannumber in cached_verdict["pannumbers"]:
+            if pannumber not in self.pannumbers:
+                self.pannumbers.append(pannumber)
+        return verdict
+
     def check_ss_present(self) -> Union[bool, None]:
         """
         Checks samplesheet exists.
@@ -204,7 +857,7 @@ class SamplesheetCheck:
         false.
             :return True | None:    True if samplesheet exists, else None
         """
-        if os.path.isfile(self.samplesheet_path):
+        if self.reader.ss_contents is not None or os.path.isfile(self.samplesheet_path):
             self.logger.info(self.logger.log_msgs["ss_present"], self.samplesheet_path)
             return True
         else:
@@ -227,7 +880,8 @@ class SamplesheetCheck:
             self.errors_dict[key].append(message)
         else:
             self.errors_dict[key] = [message]
-
+        if self.row_errors is not None:  # Attribute to the sample row being validated
+            self.row_errors.setdefault(key, []).append(message)
     def check_ss_name(self) -> object:
         """
         Validate samplesheet names using seglh-naming Samplesheet module.
@@ -249,7 +903,6 @@ class SamplesheetCheck:
                 self.logger.log_msgs["ssname_invalid"], self.samplesheet_path, exception
             )
         return self.ss_obj
-
     def development_run(self) -> Union[bool, None]:
         """
         Check if the run is a development run, by determining if the samplesheet contains
@@ -258,11 +911,10 @@ class SamplesheetCheck:
                                             samplesheet_validator.SampleheetCheck
             :return True | None:            True if contains dev pan numbers, None if does not
         """
-        strings_to_check = self.samples["Sample_ID"] + self.samples["Sample_Name"]
-
-        if any(
-            any(dev_panno in sample_string for sample_string in strings_to_check)
-            for dev_panno in self.dev_pannos
+        dev_panno_pattern = self.validator.dev_panno_pattern
+        if dev_panno_pattern and any(
+            dev_panno_pattern.search(sample_string)
+            for sample_string in self.samples["Sample_ID"] + self.samples["Sample_Name"]
         ):
             self.logger.info(
                 self.logger.log_msgs["dev_run"],
@@ -276,7 +928,6 @@ class SamplesheetCheck:
                 self.samplesheet_path,
             )
             setattr(self, "dev_run", False)
-
     def check_sequencer_id(self) -> None:
         """
         For Illumina, check element 2 of samplesheet (sequencer name matches list of
@@ -302,59 +953,194 @@ class SamplesheetCheck:
             )
         else:
             self.logger.info(self.logger.log_msgs["sequencer_id_valid"])
+    def check_md_file(self) -> None:
+        """
+        Checks a MasterDataFile for the run is present in the MasterDataFile directory, if one
+        is configured
+            :return None:
+        """
+        md_dir = self.validator.md_dir
+        if not md_dir:
+            return
+        try:
+            md_file = get_md_index(md_dir).lookup(self.runfolder_name)
+        except OSError as exception:
+            md_file = None
+            self.logger.warning(self.logger.log_msgs["md_dir_error"], md_dir, exception)
+        if md_file:
+            self.logger.info(self.logger.log_msgs["md_file_present"], self.runfolder_name, md_file)
+        else:
+            self.errors = True
+            self.add_msg_to_error_dict(
+                "MasterDataFile missing",
+                self.logger.log_msgs["md_file_absent"] % (self.runfolder_name, md_dir),
+            )
+            self.logger.warning(
+                self.logger.log_msgs["md_file_absent"], self.runfolder_name, md_dir
+            )
 
     def check_file_contents(self, file) -> Union[bool, None]:
         """
-        Checks that a file is not empty (<10 bytes)
-            :return (True | None): True if file not empty, else None
+        Checks that a file is not empty (<10 bytes), and is not larger than the maximum
+        samplesheet size
+            :return (True | None): True if file not empty and within the resource limits
+                                   checked so far, else None
         """
-        if os.stat(file).st_size < 10:
+        ss_size = self.reader.ss_size
+        file_size = ss_size if ss_size is not None else os.stat(file).st_size
+        if file_size < 10:
             self.logger.warning(self.logger.log_msgs[f"file_empty"], file)
             self.errors = True
             self.add_msg_to_error_dict(
                 "File is empty",
                 self.logger.log_msgs["file_empty"] % file,
             )
-        else:
+        elif file_size > self.validator.max_bytes:
+            self.report_limit_exceeded("max_bytes_exceeded", file, self.validator.max_bytes)
+        elif not self.limit_exceeded:
             self.logger.info(self.logger.log_msgs["file_not_empty"] % file)
             return True
 
     def get_data_section(self) -> None:
         """
-        Parse data section of samplesheet from file. Read samplesheet in reverse order,
-        collect sample ID and sample name
+        Parse data section of samplesheet from file, collecting sample ID, sample name and
+        indexes from the lines following the last header line
             :return None:
         """
-        with open(self.samplesheet_path, "r") as samplesheet_stream:
-            samplesheet_contents = samplesheet_stream.readlines()
-            for line in reversed(samplesheet_contents):
-                line_index = samplesheet_contents.index(line)
-                # If line contains table headers, stop looping through the file
-                if any(header in line for header in self.expected_data_headers):
-                    self.extract_headers(line, line_index)
-                    break
-                elif len(line.split(",")[0]) < 2:
-                    self.logger.info(
-                        self.logger.log_msgs["found_empty_line"], line_index
-                    )
-                    pass  # Skip empty lines
-                else:  # Contains sample
-                    self.extract_sample_name_id(line, line_index)
-
+        if not self.illumina:
+            with self.reader.open_aviti_lines() as (lines, first_line_index):
+                self.parse_aviti_samples(lines, first_line_index)
+        elif self.reader.mapped:
+            self.reader.parse_mapped_data_section()
+        else:
+            self.get_listed_data_section()
         # if aviti, take sample ID as sample name also
         # since aviti only has sample ID col, not sample name
-        if not self.illumina: 
+        if not self.illumina:
             self.samples["Sample_Name"] = self.samples["Sample_ID"]
+            self.sample_lines["Sample_Name"] = self.sample_lines["Sample_ID"]
+            for _, sample_row in self.sample_rows:
+                sample_row["Sample_Name"] = sample_row["Sample_ID"]
 
-    def extract_headers(self, line: str, line_index: int) -> None:
+    def get_listed_data_section(self) -> None:
+        """
+        Parse data section of samplesheet from the list of samplesheet lines, with the csv reader
+            :return None:
+        """
+        samplesheet_contents = self.reader.read_samplesheet()
+        header_index = next(
+            (
+                line_index
+                for line_index in reversed(range(len(samplesheet_contents)))
+                if any(
+                    header in samplesheet_contents[line_index]
+                    for header in self.expected_data_headers
+                )
+            ),
+            -1,  # No header line, so all lines are parsed as sample lines
+        )
+        if header_index >= 0:
+            self.extract_headers(samplesheet_contents[header_index], header_index)
+        first_line_index = header_index + 1
+        reader = csv.reader(itertools.islice(samplesheet_contents, first_line_index, None))
+        line_index = first_line_index
+        for fields in reader:
+            self.parse_data_line(fields, line_index, samplesheet_contents[line_index])
+            # Rows with quoted line breaks span several lines
+            line_index = first_line_index + reader.line_num
+
+    def parse_data_line(self, fields: list, line_index: int, line: str) -> None:
+        """
+        Parse a line following the [Data] section headers, skipping empty lines
+            :param fields (list):       Fields of the line
+            :param line_index (int):    Index of line
+            :param line (str):          Line, for error messages
+            :return None:
+        """
+        if not fields or len(fields[0]) < 2:
+            self.logger.info(
+                self.logger.log_msgs["found_empty_line"], line_index
+            )
+            pass  # Skip empty lines
+        else:  # Contains sample
+            self.extract_sample_fields(fields, line_index, line)
+    def parse_aviti_samples(self, lines: Iterator[str], first_line_index: int) -> None:
+        """
+        Parse the Aviti [SAMPLES] section in a single pass, stopping at the next section.
+        Control lines (e.g. PhiX) are kept separately from the samples
+            :param lines (Iterator[str]):   Samplesheet lines, from first_line_index onwards
+            :param first_line_index (int):  Index of the first line
+            :return None:
+        """
+        in_section = False
+        reader = csv.reader(lines)
+        line_index = first_line_index
+        for fields in reader:
+            fields = fields or [""]
+            first_field = fields[0].strip()
+            if first_field.startswith("["):
+                if in_section:
+                    break  # End of the [SAMPLES] section
+                in_section = first_field == self.data_section_marker
+            elif in_section:
+                self.parse_aviti_line(fields, line_index, ",".join(fields))
+            line_index = first_line_index + reader.line_num
+    def parse_aviti_line(self, fields: list, line_index: int, line: str) -> None:
         """
-        Extract headers from line
-            :param line (str):          Line containing samplesheet headers
+        Parse a line within the Aviti [SAMPLES] section, as a comment, empty, header, control or
+        sample line
+            :param fields (list):       Fields of the line
             :param line_index (int):    Index of line
+            :param line (str):          Line, for error messages
+            :return None:
+        """
+        first_field = fields[0].strip()
+        if first_field.startswith("#"):
+            self.logger.info(self.logger.log_msgs["found_comment_line"], line_index)
+        elif not any(field.strip() for field in fields):
+            self.logger.info(self.logger.log_msgs["found_empty_line"], line_index)
+        elif not self.data_headers:
+            self.extract_headers(line, line_index, fields)
+        elif first_field in config.AVITI_CONTROL_SAMPLES:
+            self.extract_control_row(fields, line_index)
+        else:  # Contains sample
+            self.extract_sample_fields(fields, line_index, line)
+    def extract_headers(
+        self, line: str, line_index: int, fields: Union[list, None] = None
+    ) -> None:
+        """
+        Extract headers from line, and locate the sample and index columns from them
+            :param line (str):              Line containing samplesheet headers
+            :param line_index (int):        Index of line
+            :param fields (list | None):    Fields of the line, if already parsed
         """
         try:
             self.logger.info(self.logger.log_msgs["found_header_line"], line_index)
-            self.data_headers = line.split(",")
+            self.data_headers = (
+                fields if fields is not None else next(csv.reader([line]), [])
+            )
+            headers = [header.strip() for header in self.data_headers]
+            if self.illumina:
+                self.sample_columns = {
+                    column: headers.index(column) if column in headers else position
+                    for column, position in self.sample_columns.items()
+                }
+                self.index_columns = {
+                    column: headers.index(column)
+                    for column in config.INDEX_COLUMNS
+                    if column in headers
+                }
+            else:
+                self.data_headers = headers
+                self.index_columns = {
+                    column: headers.index(header)
+                    for column, header in config.AVITI_INDEX_COLUMNS.items()
+                    if header in headers
+                }
+                if config.AVITI_SAMPLE_COLUMN in headers:
+                    self.sample_columns = {
+                        "Sample_ID": headers.index(config.AVITI_SAMPLE_COLUMN)
+                    }
         except Exception as exception:
             self.errors = True
             self.logger.warning(
@@ -365,19 +1151,36 @@ class SamplesheetCheck:
                 self.logger.log_msgs["error_extracting_headers"]
                 % (line_index, exception),
             )
-
     def extract_sample_name_id(self, line: str, line_index: int) -> None:
         """
         Extract sample name and sample id from samplesheet line
             :param line (str):  Line containing sample details
             :param line_index (int):    Index of line
         """
+        self.extract_sample_fields(next(csv.reader([line]), [""]), line_index, line)
+    def extract_sample_fields(
+        self, fields: list, line_index: int, line: Union[str, bytes]
+    ) -> None:
+        """
+        Extract sample name, sample id and indexes from the fields of a samplesheet row,
+        recording the row if its sample ID and sample name differ
+            :param fields (list):           Fields of the row
+            :param line_index (int):        Index of line
+            :param line (str | bytes):      Line containing sample details, for error messages
+        """
         self.logger.info(self.logger.log_msgs["found_sample_line"], line_index)
-        for column_details in [("Sample_ID", 0), ("Sample_Name", 1)]:
-            col_name, index = column_details
+        sample_row = {}
+        self.sample_rows.append((line_index, sample_row))
+        for col_name, index in self.sample_columns.items():
             try:
-                self.samples[col_name].append(line.split(",")[index])
+                sample_row[col_name] = fields[index]
+                self.samples[col_name].append(sample_row[col_name])
+                self.sample_lines[col_name].setdefault(sample_row[col_name], []).append(
+                    line_index
+                )
             except Exception as exception:
+                if isinstance(line, bytes):
+                    line = line.decode(errors="replace")
                 self.errors = True
                 self.logger.warning(
                     self.logger.log_msgs["col_extraction_error"],
@@ -391,7 +1194,73 @@ class SamplesheetCheck:
                     self.logger.log_msgs["col_extraction_error"]
                     % (col_name, line_index, line, exception),
                 )
-
+        # Compared as the row is parsed, and reported by the sample level checks
+        if (
+            self.illumina
+            and len(sample_row) == 2
+            and sample_row["Sample_ID"] != sample_row["Sample_Name"]
+        ):
+            self.mismatched_samples[line_index] = (
+                sample_row["Sample_ID"],
+                sample_row["Sample_Name"],
+            )
+        self.extract_sample_indexes(fields, line_index, sample_row)
+    def extract_sample_indexes(self, fields: list, line_index: int, sample_row: dict) -> None:
+        """
+        Extract the index, index2 and lane of a sample line, for the index collision check
+            :param fields (list):       Comma separated fields of the line
+            :param line_index (int):    Index of line
+            :param sample_row (dict):   Sample ID and sample name extracted from the line
+            :return None:
+        """
+        if self.index_columns:
+            sample_indexes = self.index_lanes(
+                fields, line_index, sample_row.get("Sample_ID", "")
+            )
+            self.sample_indexes.append(
+                (line_index, sample_row.get("Sample_ID", ""), sample_indexes)
+            )
+            index_key = tuple(
+                sample_indexes.get(column, "") for column in config.INDEX_COLUMNS
+            )
+            if index_key[0] or index_key[1]:
+                self.index_lines.setdefault(index_key, []).append(line_index)
+    def extract_control_row(self, fields: list, line_index: int) -> None:
+        """
+        Extract the name and indexes of an Aviti control line. Controls are not validated as
+        samples, but are indexed by lane for the index collision check
+            :param fields (list):       Comma separated fields of the line
+            :param line_index (int):    Index of line
+            :return None:
+        """
+        control = fields[self.sample_columns["Sample_ID"]].strip()
+        self.logger.info(self.logger.log_msgs["found_control_line"], line_index, control)
+        self.control_rows.append(
+            (line_index, control, self.index_lanes(fields, line_index, control))
+        )
+    def index_lanes(self, fields: list, line_index: int, sample: str) -> dict:
+        """
+        Get the index, index2 and lane of a line, adding its combined barcode to the lane index
+        for each lane it is in. Lanes are given as e.g. 1+2
+            :param fields (list):       Comma separated fields of the line
+            :param line_index (int):    Index of line
+            :param sample (str):        Sample (or control) on the line
+            :return sample_indexes (dict):  Index, index2 and lane of the line
+        """
+        sample_indexes = {
+            column: fields[position].strip() if position < len(fields) else ""
+            for column, position in self.index_columns.items()
+        }
+        barcode = (
+            (line_index, sample),
+            sample_indexes.get("index", "") + sample_indexes.get("index2", ""),
+        )
+        lanes = [
+            lane.strip() for lane in sample_indexes.get("Lane", "").split("+") if lane.strip()
+        ]
+        for lane in lanes or [None]:
+            self.lane_indexes.setdefault(lane, []).append(barcode)
+        return sample_indexes
     def check_expected_headers(self) -> None:
         """
         Check [Data] section has expected headers, against self.expected_data_headers
@@ -417,128 +1286,295 @@ class SamplesheetCheck:
             )
         else:
             self.logger.info(self.logger.log_msgs["headers_as_expected"])
-
-    def comp_samplenameid(self) -> None:
+    def report_mismatched_sample(
+        self, line_index: int, sample_id: str, sample_name: str
+    ) -> None:
         """
-        Check whether names match between Sample_ID and Sample_Name in data section of
-        samplesheet
+        Report a sample line whose Sample_ID and Sample_Name differ
+            :param line_index (int):    Index of line
+            :param sample_id (str):     Sample_ID of the line
+            :param sample_name (str):   Sample_Name of the line
             :return None:
         """
-        differences = ", ".join(
-            map(
-                str,
-                (
-                    list(
-                        set(self.samples["Sample_ID"])
-                        - set(self.samples["Sample_Name"])
-                    )
-                ),
-            )
+        self.errors = True
+        self.add_msg_to_error_dict(
+            "Sample names do not match",
+            self.logger.log_msgs["nonmatching_samplenames"]
+            % (line_index, sample_id, sample_name),
         )
-        self.logger.info(self.logger.log_msgs["samplenames_match"])
-        if differences:
-            self.errors = True
-            self.add_msg_to_error_dict(
-                "Sample names do not match",
-                self.logger.log_msgs["nonmatching_samplenames"] % differences,
-            )
-            self.logger.warning(
-                self.logger.log_msgs["nonmatching_samplenames"], differences
+        self.logger.warning(
+            self.logger.log_msgs["nonmatching_samplenames"],
+            line_index,
+            sample_id,
+            sample_name,
+        )
+    def check_duplicates(self) -> None:
+        """
+        Check sample IDs, sample names and (index, index2, lane) tuples each appear on only one
+        line. A sample may be listed once in each lane
+            :return None:
+        """
+        duplicates = False
+        line_lanes = {
+            line_index: [
+                lane.strip() for lane in indexes.get("Lane", "").split("+") if lane.strip()
+            ]
+            for line_index, _, indexes in self.sample_indexes
+        }
+        # Aviti samplesheets have a single sample column
+        columns = ["Sample_ID", "Sample_Name"] if self.illumina else ["Sample_ID"]
+        for column in columns:
+            for sample, line_indexes in self.sample_lines[column].items():
+                if len(line_indexes) < 2:
+                    continue
+                for duplicate_lines, lanes in self.get_lane_duplicates(
+                    line_indexes, line_lanes
+                ).items():
+                    duplicates = True
+                    log_args = (column, sample, ", ".join(map(str, duplicate_lines)))
+                    log_msg = self.logger.log_msgs["duplicate_sample"]
+                    if lanes:
+                        log_args += (", ".join(lanes),)
+                        log_msg = self.logger.log_msgs["duplicate_sample_lanes"]
+                    self.errors = True
+                    self.add_msg_to_error_dict("Duplicate samples", log_msg % log_args)
+                    self.logger.warning(log_msg, *log_args)
+        for index_key, line_indexes in self.index_lines.items():
+            if len(line_indexes) > 1:
+                duplicates = True
+                line_numbers = ", ".join(map(str, line_indexes))
+                self.errors = True
+                self.add_msg_to_error_dict(
+                    "Duplicate indexes",
+                    self.logger.log_msgs["duplicate_indexes"] % (index_key, line_numbers),
+                )
+                self.logger.warning(
+                    self.logger.log_msgs["duplicate_indexes"], index_key, line_numbers
+                )
+        if not duplicates:
+            self.logger.info(self.logger.log_msgs["no_duplicates"])
+    @staticmethod
+    def get_lane_duplicates(line_indexes: list, line_lanes: dict) -> dict:
+        """
+        Get the lines holding a sample that share a lane. Lines without a lane are in every lane
+            :param line_indexes (list):     Lines holding the sample
+            :param line_lanes (dict):       Lanes of each sample line
+            :return (dict):                 Lines sharing a lane, and the lanes they share (empty
+                                            if no line has a lane)
+        """
+        lanes = sorted(
+            {lane for line_index in line_indexes for lane in line_lanes.get(line_index, [])},
+            key=lambda lane: (len(lane), lane),
+        )
+        if not lanes:
+            return {tuple(line_indexes): []}
+        duplicates = {}
+        for lane in lanes:
+            lane_lines = tuple(
+                line_index
+                for line_index in line_indexes
+                if lane in line_lanes.get(line_index, []) or not line_lanes.get(line_index)
             )
-
-    def check_illegal_chars(self, sample: str, column: str) -> None:
+            if len(lane_lines) > 1:
+                duplicates.setdefault(lane_lines, []).append(lane)
+        return duplicates
+    def check_sample_columns(
+        self, line_index: int, sample_row: dict
+    ) -> Union[str, None]:
+        """
+        Run the illegal character, sample name and pan number checks for each column of a
+        sample row
+            :param line_index (int):        Index of line
+            :param sample_row (dict):       Sample ID and sample name of the line
+            :return pannumbers (list):      Pan numbers of the columns holding valid sample names
+        """
+        pannumbers = []
+        for column, sample in sample_row.items():
+            self.check_illegal_chars(sample, column, line_index)
+            sample_obj = self.check_sample(sample, column, line_index)
+            if sample_obj:
+                self.check_pannos(sample, column, sample_obj, line_index)
+                pannumbers.append(sample_obj.panelnumber)
+        return pannumbers
+    def check_illegal_chars(
+        self, sample: str, column: str, line_index: Union[int, None] = None
+    ) -> None:
         """
         Returns true if illegal characters present
-            :param sample (str): Sample name
-            :param column (str): Column header
+            :param sample (str):            Sample name
+            :param column (str):            Column header
+            :param line_index (int | None): Index of line containing the sample
             :return None:
         """
-        valid_chars = "^[A-Za-z0-9_-]+$"
-        if not re.match(valid_chars, sample):
+        if sample not in self.legal_chars:
+            self.legal_chars[sample] = bool(
+                self.validator.valid_chars_pattern.match(sample)
+            )
+            if self.legal_chars[sample]:
+                self.logger.info(self.logger.log_msgs["no_illegal_chars"], sample, column)
+        if not self.legal_chars[sample]:
             self.errors = True
             self.add_msg_to_error_dict(
                 "Illegal characters",
-                self.logger.log_msgs["illegal_chars"] % (column, sample),
+                self.logger.log_msgs["illegal_chars"] % (column, line_index, sample),
             )
-            self.logger.warning(self.logger.log_msgs["illegal_chars"], column, sample)
-        else:
-            self.logger.info(self.logger.log_msgs["no_illegal_chars"], sample, column)
-
-    def check_sample(self, sample: str, column: str) -> Union[object, None]:
+            self.logger.warning(
+                self.logger.log_msgs["illegal_chars"], column, line_index, sample
+            )
+    def check_sample(
+        self, sample: str, column: str, line_index: Union[int, None] = None
+    ) -> Union[object, None]:
         """
         Validate sample names using seglh-naming Sample module. Checks run on
         Sample_Name and Sample_ID; Sample_Name is used by bcl2fastq2 and Sample_ID is
         used if Sample_Name is not present
             :param sample (str):               Sample name
             :param column (str):               Column header
+            :param line_index (int | None):    Index of line containing the sample
             :return sample_obj (obj):   seglh-naming sample object
         """
-        try:
-            sample_obj = Sample.from_string(sample)
-            self.logger.info(self.logger.log_msgs["sample_name_valid"], sample, column)
-            return sample_obj
-        except Exception as exception:
+        if sample not in self.sample_objs:
+            try:
+                self.sample_objs[sample] = Sample.from_string(sample)
+                self.logger.info(self.logger.log_msgs["sample_name_valid"], sample, column)
+            except Exception as exception:
+                self.sample_objs[sample] = exception
+        sample_obj = self.sample_objs[sample]
+        if isinstance(sample_obj, Exception):
             self.errors = True
             self.add_msg_to_error_dict(
                 "Sample name invalid",
-                self.logger.log_msgs["sample_name_invalid"] % (column, exception),
+                self.logger.log_msgs["sample_name_invalid"]
+                % (column, line_index, sample_obj),
             )
             self.logger.warning(
                 self.logger.log_msgs["sample_name_invalid"],
                 column,
-                exception,
+                line_index,
+                sample_obj,
             )
-
-    def check_pannos(self, sample: str, column: str, sample_obj: object) -> None:
+        else:
+            return sample_obj
+    def check_pannos(
+        self,
+        sample: str,
+        column: str,
+        sample_obj: object,
+        line_index: Union[int, None] = None,
+    ) -> None:
         """
         Check sample names contain allowed pan numbers from self.panels number list
             :param sample (str):            Sample name
             :param column (str):            Column header
             :param sample_obj (object):     seglh-naming sample object
+            :param line_index (int | None): Index of line containing the sample
             :return None:
         """
-        self.pannumbers.append(sample_obj.panelnumber)
-        if sample_obj.panelnumber not in self.panels:
+        panelnumber = sample_obj.panelnumber
+        if panelnumber not in self.panels:
             self.errors = True
             self.add_msg_to_error_dict(
                 "Pan number invalid",
                 self.logger.log_msgs["invalid_panno"]
-                % (sample_obj.panelnumber, column, sample),
+                % (panelnumber, column, line_index, sample),
             )
             self.logger.warning(
                 self.logger.log_msgs["invalid_panno"],
-                sample_obj.panelnumber,
+                panelnumber,
                 column,
+                line_index,
                 sample,
             )
-        else:
-            self.logger.info(
-                self.logger.log_msgs["valid_panno"], sample_obj.panelnumber
-            )
-
+        elif panelnumber not in self.pannumbers:
+            self.logger.info(self.logger.log_msgs["valid_panno"], panelnumber)
+        if panelnumber not in self.pannumbers:
+            self.pannumbers.append(panelnumber)
     def check_tso(self) -> None:
         """
         Assigns self.tso as True if TSO run
             :return None:
         """
-        if set(self.pannumbers).intersection(set(self.tso_panels)):
+        if not self.tso_panels.isdisjoint(self.pannumbers):
             self.logger.info(self.logger.log_msgs["tso_run"])
             self.tso = True
         else:
             self.logger.info(self.logger.log_msgs["not_tso_run"])
-
     def check_okd(self) -> Union[bool, None]:
         """
         Assigns self.okd as True if OKD run
             : return None:
         """
-        if set(self.pannumbers).intersection(set(self.okd_panels)):
+        if not self.okd_panels.isdisjoint(self.pannumbers):
             self.logger.info(self.logger.log_msgs["okd_run"])
             self.okd = True
             return True
         else:
             self.logger.info(self.logger.log_msgs["not_okd_run"])
-
+    def check_index_collisions(self) -> None:
+        """
+        Check the combined index and index2 barcodes of samples sharing a lane differ at no
+        fewer than validator.min_index_distance positions. Invalid barcodes are reported
+            :return None:
+        """
+        min_index_distance = self.validator.min_index_distance
+        invalid_barcodes = {
+            key: barcode
+            for barcodes in self.lane_indexes.values()
+            for key, barcode in barcodes
+            if not is_valid_barcode(barcode)
+        }
+        for (line_index, sample), barcode in sorted(invalid_barcodes.items()):
+            self.errors = True
+            self.add_msg_to_error_dict(
+                "Index invalid",
+                self.logger.log_msgs["invalid_index"] % (line_index, sample, barcode),
+            )
+            self.logger.warning(
+                self.logger.log_msgs["invalid_index"], line_index, sample, barcode
+            )
+        unlaned_barcodes = self.lane_indexes.get(None, [])
+        lane_barcodes = {
+            lane: barcodes + unlaned_barcodes
+            for lane, barcodes in self.lane_indexes.items()
+            if lane is not None
+        }
+        if unlaned_barcodes and not lane_barcodes:
+            lane_barcodes["all"] = unlaned_barcodes
+        reported = set()  # Pairs of unlaned samples are in every lane, so report them once
+        # Lines with identical indexes and lane are reported by check_duplicates()
+        duplicate_lines = {
+            line_index: line_indexes
+            for line_indexes in self.index_lines.values()
+            if len(line_indexes) > 1
+            for line_index in line_indexes
+        }
+        for lane, barcodes in lane_barcodes.items():
+            for (line_a, sample_a), (line_b, sample_b), distance in find_index_collisions(
+                barcodes, min_index_distance
+            ):
+                if (line_a, line_b) in reported or line_b in duplicate_lines.get(line_a, ()):
+                    continue
+                reported.add((line_a, line_b))
+                self.errors = True
+                self.add_msg_to_error_dict(
+                    "Index collision",
+                    self.logger.log_msgs["index_collision"]
+                    % (lane, line_a, line_b, sample_a, sample_b, distance, min_index_distance),
+                )
+                self.logger.warning(
+                    self.logger.log_msgs["index_collision"],
+                    lane,
+                    line_a,
+                    line_b,
+                    sample_a,
+                    sample_b,
+                    distance,
+                    min_index_distance,
+                )
+        if not reported:
+            self.logger.info(
+                self.logger.log_msgs["no_index_collisions"], min_index_distance
+            )
     def log_summary(self) -> None:
         """
         Write summary of validator outcome to log
@@ -552,20 +1588,17 @@ class SamplesheetCheck:
             self.logger.info(
                 self.logger.log_msgs["sschecks_passed"], self.samplesheet_path
             )
-    
+
     def get_aviti_run_folder_name(self) -> str:
         """
         Obtain RunName inserted in samplesheet to check samplesheet has correct name given and
         aviti sequencer id from the samplesheet name to assign to object
             :return None
         """
-        with open(self.samplesheet_path, "r") as ss_file:
-            ss_file_contents = ss_file.readlines()
-            run_name = ss_file_contents[2]
-            run_name = run_name.split(",", 1)[1].split(",", 1)[0]
-            self.aviti_seq_id = (self.samplesheet_path.split("/")[-1]).split("_")[1]
-            self.ss_runname = run_name
-    
+        run_parameters = self.reader.read_run_parameters()
+        self.aviti_seq_id = (self.samplesheet_path.split("/")[-1]).split("_")[1]
+        self.ss_runname = run_parameters.get(config.AVITI_RUN_NAME_KEY, "")
+
     def check_run_folder_name(self) -> None:
         """
         Check if the run folder name extracted from aviti sample sheet 
@@ -580,4 +1613,64 @@ class SamplesheetCheck:
             )
             self.logger.warning(self.logger.log_msgs["Aviti not match"], self.runname)
         else:
-            self.logger.info(self.logger.log_msgs["Aviti match"], self.runname)
\ No newline at end of file
+            self.logger.info(self.logger.log_msgs["Aviti match"], self.runname)
+
+
+class SamplesheetCheck(ValidationResult):
+    """
+    Backwards-compatible wrapper, building a Validator from the supplied configuration and
+    holding the outcome of validating a single samplesheet
+    """
+
+    def __init__(
+        self,
+        samplesheet_path: str,
+        sequencer_ids: list,
+        panels: list,
+        tso_panels: list,
+        okd_panels: list,
+        dev_pannos: list,
+        logdir: str,
+        illumina: bool,
+        runname: str,
+        *,
+        queue_logging: bool = False,
+        memory_map: bool = False,
+        incremental: bool = False,
+        results_store: Union[ResultsStore, None] = None,
+        content_store: Union[ContentStore, None] = None,
+        sample_index: Union[SampleIndex, None] = None,
+    ):
+        """
+        Constructor for the SamplesheetCheck class
+            :param samplesheet_path (str):      Path to samplesheet
+            :param sequencer_ids (list):        Allowed sequencer IDs
+            :param panels (list):               Allowed pan numbers
+            :param tso_panels (list):           TSO500 pan numbers
+            :param okd_panels (list):           Oncodeep pan numbers
+            :param dev_pannos (list):           Development pan numbers
+            :param logdir (str):                Log file directory
+            :param illumina(bool):              Illumina or not
+            :param runname (str):               Processed run folder name
+            :param queue_logging (bool):        Write log records to file from a listener thread
+            :param memory_map (bool):           Parse the samplesheet from a memory map of the file
+            :param incremental (bool):          Only re-validate sample rows changed since the
+                                                previous validation
+            :param results_store (ResultsStore | None): Store to record the per-sample results in
+            :param content_store (ContentStore | None): Store of the outcomes of samplesheet
+                                                        contents already validated
+            :param sample_index (SampleIndex | None):   Index of the samples of recently validated
+                                                        runs
+        """
+        super().__init__(
+            Validator(sequencer_ids, panels, tso_panels, okd_panels, dev_pannos, logdir),
+            samplesheet_path,
+            illumina,
+            runname,
+            queue_logging=queue_logging,
+            memory_map=memory_map,
+            incremental=incremental,
+            results_store=results_store,
+            content_store=content_store,
+            sample_index=sample_index,
+        )
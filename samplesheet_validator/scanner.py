@@ -0,0 +1,343 @@
+""" scanner.py
+
+Discovery and bulk validation of the samplesheets under sequencer data roots (e.g. /genomics/runs).
+Data roots are walked with os.scandir, pruning the directories that cannot hold a samplesheet:
+
+- Hidden directories, and the runfolder subdirectories in config.SCAN_PRUNE_DIRS, are not entered
+- A directory containing a samplesheet is a runfolder, so its subdirectories are not entered
+- Directories more than config.SCAN_MAX_DEPTH levels below the root are not entered
+
+The samplesheets found are validated across a shared process pool (see pool.py). The modification
+time and size of each validated samplesheet is kept in an index file, so that later scans skip
+the samplesheets of runs that have not changed. Samplesheets are added to the index as their
+validation completes, and the index is saved as the scan progresses, so an interrupted scan keeps
+the samplesheets already validated. Samplesheets whose validation raises an exception are reported
+as failed, and are not indexed so are validated again by the next scan.
+
+Usage (from the repository root):
+    python3 -m samplesheet_validator.scanner -d /genomics/runs -C config.json -L logdir -X index.json
+"""
+import os
+import json
+import logging
+import argparse
+import multiprocessing.pool
+from typing import Iterator, Union
+from . import config
+from .samplesheet_validator import Validator
+from .profiles import ValidatorProfiles
+from .pool import get_pool, validate_in_worker
+from .ss_logger import set_root_logger
+
+
+def scan_in_worker(job: tuple) -> tuple:
+    """
+    Validate a scanned samplesheet using this worker's Validator. Exceptions are recorded as the
+    outcome, so that one unreadable samplesheet does not stop the scan
+        :param job (tuple):     Samplesheet path, Illumina or not, and run name
+        :return (tuple):        Samplesheet path, the summary of the validation outcome, and
+                                whether the validation raised an exception
+    """
+    samplesheet_path, illumina, runname = job
+    try:
+        return samplesheet_path, validate_in_worker(samplesheet_path, illumina, runname), False
+    except Exception as exception:
+        return (
+            samplesheet_path,
+            {
+                "samplesheet_path": samplesheet_path,
+                "runfolder_name": runname,
+                "errors": True,
+                "errors_dict": {config.SCAN_EXCEPTION_ERROR: [repr(exception)]},
+                "dev_run": False,
+                "tso": False,
+                "okd": False,
+                "pannumbers": [],
+            },
+            True,
+        )
+
+
+class RunScanner:
+    """
+    Finds the new and changed samplesheets under sequencer data roots, and validates them
+
+    Attributes:
+        index_path (None | str):    JSON file holding the index of validated samplesheets. The
+                                    index is only kept in memory if None
+        max_depth (int):            Number of directory levels below each root searched
+        index (dict):               Modification time (ns) and size of each validated samplesheet,
+                                    keyed by path
+
+    Methods:
+        load_index()
+            Load the index of validated samplesheets from the index file
+        save_index()
+            Save the index of validated samplesheets to the index file
+        scan(roots)
+            Yield each new or changed samplesheet under the data roots
+        find_samplesheets(directory, depth)
+            Yield the samplesheets in a directory and its unpruned subdirectories
+        get_run(samplesheet_path)
+            Get the instrument type and run name of a samplesheet
+        validate(validator, roots, pool, processes)
+            Validate the new and changed samplesheets under the data roots across a process pool
+        index_outcomes(scan_pool, jobs, stat_keys)
+            Validate samplesheets across a pool, indexing each as it completes
+    """
+
+    def __init__(
+        self, index_path: Union[str, None] = None, max_depth: int = config.SCAN_MAX_DEPTH
+    ):
+        """
+        Constructor for the RunScanner class
+            :param index_path (None | str): JSON file holding the index of validated
+                                            samplesheets, created if it does not exist
+            :param max_depth (int):         Number of directory levels below each root searched
+        """
+        self.index_path = index_path
+        self.max_depth = max_depth
+        self.index = {}
+        self.load_index()
+
+    def load_index(self) -> None:
+        """
+        Load the index of validated samplesheets from the index file. An unreadable index is
+        ignored, so every samplesheet is validated again
+            :return None:
+        """
+        if self.index_path and os.path.isfile(self.index_path):
+            try:
+                with open(self.index_path, "r") as index_file:
+                    self.index = json.load(index_file)
+            except ValueError:
+                self.index = {}
+
+    def save_index(self) -> None:
+        """
+        Save the index of validated samplesheets to the index file. The file is replaced
+        atomically, so an interrupted scan never leaves a partial index
+            :return None:
+        """
+        if self.index_path:
+            temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(temp_path, "w") as index_file:
+                index_file.write(json.dumps(self.index))
+            os.replace(temp_path, self.index_path)
+
+    def scan(self, roots: list) -> Iterator[tuple]:
+        """
+        Yield each samplesheet under the data roots that is not in the index, or whose
+        modification time or size has changed since it was validated
+            :param roots (list):        Sequencer data roots
+            :return (Iterator[tuple]):  Samplesheet path, and its [modification time (ns), size]
+        """
+        for root in roots:
+            for entry in self.find_samplesheets(root, 0):
+                try:
+                    stat = entry.stat()
+                except OSError:  # Removed since the directory was listed
+                    continue
+                stat_key = [stat.st_mtime_ns, stat.st_size]
+                if self.index.get(entry.path) != stat_key:
+                    yield entry.path, stat_key
+
+    def find_samplesheets(self, directory: str, depth: int) -> Iterator[os.DirEntry]:
+        """
+        Yield the samplesheets in a directory, then those in its subdirectories. Subdirectories
+        are not entered if the directory holds a samplesheet (it is a runfolder), if they are
+        hidden or in config.SCAN_PRUNE_DIRS, or if they are below the maximum depth
+            :param directory (str):         Directory to search
+            :param depth (int):             Number of levels of the directory below the root
+            :return (Iterator[DirEntry]):   Samplesheets found
+        """
+        samplesheets = []
+        subdirectories = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.name.endswith(config.SAMPLESHEET_SUFFIX):
+                        if entry.is_file():
+                            samplesheets.append(entry)
+                    elif (
+                        depth < self.max_depth
+                        and entry.name not in config.SCAN_PRUNE_DIRS
+                        and entry.is_dir()
+                    ):
+                        subdirectories.append(entry.path)
+        except OSError:  # e.g. permission denied, or removed during the scan
+            return
+        yield from samplesheets
+        if not samplesheets:
+            for subdirectory in subdirectories:
+                yield from self.find_samplesheets(subdirectory, depth + 1)
+
+    def get_run(self, samplesheet_path: str) -> tuple:
+        """
+        Get the instrument type and run name of a samplesheet. Aviti samplesheets are
+        identified by their leading [RunParameters] section, and the run name is the name of
+        the runfolder containing the samplesheet
+            :param samplesheet_path (str):  Path to samplesheet
+            :return (tuple):                Illumina or not, and the run name
+        """
+        with open(
+            samplesheet_path, "r", encoding=config.SAMPLESHEET_ENCODING, errors="replace"
+        ) as samplesheet:
+            first_line = samplesheet.readline(config.MAX_LINE_LENGTH)
+        illumina = not first_line.startswith(config.AVITI_RUN_PARAMETERS_SECTION)
+        runname = os.path.basename(os.path.dirname(os.path.abspath(samplesheet_path)))
+        return illumina, runname
+
+    def validate(
+        self,
+        validator: Union[Validator, ValidatorProfiles],
+        roots: list,
+        pool: Union[multiprocessing.pool.Pool, None] = None,
+        processes: Union[int, None] = None,
+    ) -> dict:
+        """
+        Validate the new and changed samplesheets under the data roots across a process pool,
+        adding each to the index as its validation completes
+            :param validator (Validator | ValidatorProfiles):   Validator to use
+            :param roots (list):                                Sequencer data roots
+            :param pool (Pool | None):                          Shared pool, from
+                                                                pool.get_pool(validator). A pool
+                                                                is created for the scan if None
+            :param processes (int | None):                      Number of worker processes of the
+                                                                created pool. Defaults to the
+                                                                CPU count
+            :return summaries (dict):                           Summary of the validation outcome
+                                                                of each samplesheet validated
+        """
+        jobs = []
+        stat_keys = {}
+        for samplesheet_path, stat_key in self.scan(roots):
+            try:
+                jobs.append((samplesheet_path, *self.get_run(samplesheet_path)))
+            except OSError:  # Removed since the directory was listed
+                continue
+            stat_keys[samplesheet_path] = stat_key
+        if not jobs:
+            return {}
+        if pool is None:
+            with get_pool(validator, processes) as scan_pool:
+                return self.index_outcomes(scan_pool, jobs, stat_keys)
+        return self.index_outcomes(pool, jobs, stat_keys)
+
+    def index_outcomes(
+        self, scan_pool: multiprocessing.pool.Pool, jobs: list, stat_keys: dict
+    ) -> dict:
+        """
+        Validate the samplesheets across the pool, adding each to the index as soon as its
+        validation completes. The index is saved every config.SCAN_INDEX_SAVE_INTERVAL
+        samplesheets and when the scan ends (including if it is interrupted). Samplesheets whose
+        validation raised an exception are not indexed
+            :param scan_pool (Pool):    Process pool, from pool.get_pool(validator)
+            :param jobs (list):         Samplesheet path, Illumina or not, and run name of each
+                                        samplesheet
+            :param stat_keys (dict):    [modification time (ns), size] of each samplesheet
+            :return summaries (dict):   Summary of the validation outcome of each samplesheet
+        """
+        summaries = {}
+        try:
+            for samplesheet_path, summary, raised in scan_pool.imap_unordered(
+                scan_in_worker, jobs
+            ):
+                summaries[samplesheet_path] = summary
+                if not raised:
+                    self.index[samplesheet_path] = stat_keys[samplesheet_path]
+                if len(summaries) % config.SCAN_INDEX_SAVE_INTERVAL == 0:
+                    self.save_index()
+        finally:
+            self.save_index()
+        return summaries
+
+
+def get_arguments() -> argparse.Namespace:
+    """
+    Uses argparse module to define and handle command line input arguments and help menu
+        :return argparse.Namespace (object):    Contains the parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description=(
+            "Find the new and changed samplesheets under sequencer data roots, and validate them "
+            "using seglh-naming conventions, outputting a logfile per samplesheet"
+        ),
+    )
+    parser.add_argument(
+        "-d",
+        "--data_roots",
+        nargs="+",
+        required=True,
+        help="Sequencer data roots to scan for runfolders",
+    )
+    parser.add_argument(
+        "-C",
+        "--config",
+        required=True,
+        help=(
+            "JSON configuration file containing the sequencer_ids, panels, tso_panels, okd_panels "
+            "and dev_pannos lists, or named profiles of these lists"
+        ),
+    )
+    parser.add_argument(
+        "-L",
+        "--logdir",
+        required=True,
+        help="Directory to save the output logfiles to",
+    )
+    parser.add_argument(
+        "-X",
+        "--index",
+        required=False,
+        help=(
+            "JSON file holding the modification time and size of each validated samplesheet, so "
+            "that unchanged samplesheets are skipped by later scans"
+        ),
+    )
+    parser.add_argument(
+        "-p",
+        "--processes",
+        type=int,
+        required=False,
+        help="Number of worker processes (defaults to the CPU count)",
+    )
+    parser.add_argument(
+        "--max_depth",
+        type=int,
+        default=config.SCAN_MAX_DEPTH,
+        help="Number of directory levels below each data root searched for samplesheets",
+    )
+    parser.add_argument(
+        "-NSH",
+        "--no_stream_handler",
+        action="store_true",
+        required=False,
+        help="Provide flag when log messages should not be output to the terminal",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    parsed_args = get_arguments()
+    set_root_logger(parsed_args.no_stream_handler)
+    logger = logging.getLogger(__name__)
+    scan_validator = ValidatorProfiles.from_config_file(parsed_args.config, parsed_args.logdir)
+    scanner = RunScanner(parsed_args.index, parsed_args.max_depth)
+    scan_summaries = scanner.validate(
+        scan_validator, parsed_args.data_roots, processes=parsed_args.processes
+    )
+    for scanned_path, scan_summary in scan_summaries.items():
+        if scan_summary["errors"]:
+            logger.warning(
+                config.LOG_MSGS["scan_failed"],
+                scanned_path,
+                ", ".join(scan_summary["errors_dict"]),
+            )
+        else:
+            logger.info(config.LOG_MSGS["scan_passed"], scanned_path)
+    logger.info(
+        config.LOG_MSGS["scan_complete"], len(scan_summaries), ", ".join(parsed_args.data_roots)
+    )
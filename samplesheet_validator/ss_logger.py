@@ -4,9 +4,11 @@ Class used to create Samplesheet Validator logfiles
 """
 
 import sys
+import queue
 from . import config
 import logging
 import logging.handlers
+from typing import Union
 
 
 def set_root_logger(no_stream_handler: bool):
@@ -41,9 +43,12 @@ class SSLogger:
         logging_formatter (logging.Formatter):  Specifies the layout of log records in the final output
 
     Methods
-        get_logger(logger_name)
-            Returns a Python logging object
-        _get_file_handler()
+        get_logger(logger_name, handler)
+            Returns a Python logging object used only by this run
+        get_queue_handler()
+            Get queue handler that passes records to a file handler and the root logger
+            handlers on a listener thread
+        get_file_handler()
             Get file handler for the logger
         _get_syslog_handler()
             Get syslog handler for the logger
@@ -60,20 +65,56 @@ class SSLogger:
         self.runfolder_name = runfolder_name
         self.logging_formatter = logging.Formatter(config.LOGGING_FORMATTER)
 
-    def get_logger(self, logger_name: str) -> logging.Logger:
+    def get_logger(
+        self, logger_name: str, handler: Union[logging.Handler, None] = None
+    ) -> logging.Logger:
         """
-        Returns a Python logging object, and give it a name
-            :param logger_name (str):   Logger name string
-            :return logger (object):    Python logging object with custom attributes
+        Returns a Python logging object, and give it a name. The logger is created for this run
+        only and is not registered with the logging module, so validations of the same
+        runfolder do not share handlers (which would duplicate records in the logfile), and
+        loggers do not accumulate in long-lived processes. Records propagate to the root logger
+        handlers unless a queue handler is used, in which case the queue listener passes them
+        to the root logger handlers instead (see get_queue_handler())
+            :param logger_name (str):               Logger name string
+            :param handler (logging.Handler|None):  Handler to add to the logger. Defaults to a
+                                                    file handler writing to self.logfile_path
+            :return logger (object):                Python logging object with custom attributes
         """
-        logger = logging.getLogger(f"{logger_name}.{self.runfolder_name}")
+        logger = logging.Logger(f"{logger_name}.{self.runfolder_name}")
+        logger.parent = logging.getLogger(logger_name)
+        logger.propagate = not isinstance(handler, logging.handlers.QueueHandler)
         logger.filepath = self.logfile_path
         logger.setLevel(logging.DEBUG)
-        logger.addHandler(self._get_file_handler())
+        logger.addHandler(handler if handler else self.get_file_handler())
         logger.log_msgs = config.LOG_MSGS
         return logger
 
-    def _get_file_handler(self) -> logging.FileHandler:
+    def get_queue_handler(self) -> logging.handlers.QueueHandler:
+        """
+        Get queue handler for the logger. Records are put on a queue and passed to a file
+        handler and the root logger handlers (stream and syslog handlers) by a QueueListener
+        running on its own thread, so logging never blocks the caller on writes. The started
+        listener is stored as the handler's listener attribute and must be stopped by the
+        caller once logging is complete. The file handler is stored as the handler's
+        file_handler attribute, to be closed by the caller (the root logger handlers are shared,
+        so are left open)
+            :return queue_handler (logging.handlers.QueueHandler): QueueHandler
+        """
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.setLevel(logging.DEBUG)
+        queue_handler.name = "queue_handler"
+        queue_handler.file_handler = self.get_file_handler()
+        queue_handler.listener = logging.handlers.QueueListener(
+            log_queue,
+            queue_handler.file_handler,
+            *logging.getLogger().handlers,
+            respect_handler_level=True,
+        )
+        queue_handler.listener.start()
+        return queue_handler
+
+    def get_file_handler(self) -> logging.FileHandler:
         """
         Get file handler for the logger, and give it a name
             :return file_handler (logging.FileHandler): FileHandler
@@ -0,0 +1,241 @@
+""" streaming.py
+
+Validation of a samplesheet fed in chunks as it arrives (e.g. as it is uploaded), so that
+validation overlaps with the upload. Quoted fields spanning several lines are not supported.
+"""
+import io
+import csv
+import codecs
+from typing import Union
+from . import config
+from .results_store import ResultsStore
+from .sample_index import SampleIndex
+from .run_files import check_run_files
+from .samplesheet_validator import Validator, ValidationResult
+
+
+class StreamingValidationResult(ValidationResult):
+    """
+    ValidationResult fed the samplesheet in chunks as it arrives (e.g. as it is uploaded). Sample
+    rows are validated as their lines complete, and the checks needing every row run on close()
+
+    Attributes:
+        decoder (io.IncrementalNewlineDecoder): Decodes chunks, translating line endings
+        partial_line (str):                     Incomplete line at the end of the chunks fed so far
+        stream_stage (str):                     "preamble", "data", "ended" (after the Aviti
+                                                [SAMPLES] section), "stopped" (if the preamble
+                                                checks failed) or "closed"
+        checked_rows (int):                     Number of sample rows validated so far
+        stream_dev_run (bool):                  True if a development pan number has been found
+
+    Methods:
+        feed(chunk)
+            Add a chunk of the samplesheet, returning the verdicts of the sample rows completed
+        close()
+            Complete the validation once the whole samplesheet has been fed
+        feed_line(line)
+            Add a complete line of the samplesheet, returning the verdicts of any sample rows
+        check_preamble()
+            Run the samplesheet level checks once the preamble is complete
+        check_streamed_rows()
+            Validate the sample rows parsed since the last call
+        discard_sample_errors()
+            Discard the sample level errors of a development run
+    """
+
+    def __init__(
+        self,
+        validator: Validator,
+        samplesheet_name: str,
+        illumina: bool = True,
+        runname: str = "",
+        *,
+        queue_logging: bool = False,
+        incremental: bool = False,
+        results_store: Union[ResultsStore, None] = None,
+        sample_index: Union[SampleIndex, None] = None,
+    ):
+        """
+        Constructor for the StreamingValidationResult class
+            :param validator (Validator):   Validator holding the configuration
+            :param samplesheet_name (str):  Samplesheet name, used for naming checks
+            :param illumina (bool):         Illumina or not
+            :param runname (str):           Processed run folder name
+            :param queue_logging (bool):    Write log records to file from a listener thread
+            :param incremental (bool):      Only re-validate sample rows changed since the
+                                            previous validation
+            :param results_store (ResultsStore | None): Store to record the per-sample results in
+            :param sample_index (SampleIndex | None):   Index of the samples of recently validated
+                                                        runs
+        """
+        super().__init__(
+            validator,
+            io.StringIO(),  # Lines are added to self.reader.ss_contents as they are fed
+            illumina,
+            runname,
+            samplesheet_name=samplesheet_name,
+            queue_logging=queue_logging,
+            incremental=incremental,
+            results_store=results_store,
+            sample_index=sample_index,
+        )
+        self.decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder(config.SAMPLESHEET_ENCODING)(errors="surrogateescape"),
+            translate=True,
+        )
+        self.partial_line = ""
+        self.stream_stage = "preamble"
+        self.checked_rows = 0
+        self.stream_dev_run = False
+        if not self.illumina:  # Aviti sample ID is also the sample name, as in get_data_section()
+            self.samples["Sample_Name"] = self.samples["Sample_ID"]
+            self.sample_lines["Sample_Name"] = self.sample_lines["Sample_ID"]
+
+    def feed(self, chunk: Union[bytes, str]) -> list:
+        """
+        Add a chunk of the samplesheet, buffering any incomplete line
+            :param chunk (bytes | str):     Next chunk of the samplesheet
+            :return verdicts (list):        Verdicts of the sample rows completed by the chunk, as
+                                            yielded by iter_sample_verdicts()
+        """
+        if self.stream_stage == "closed":
+            raise ValueError("Samplesheet chunk fed after close()")
+        if self.limit_exceeded:
+            return []
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        self.reader.ss_size += len(chunk)
+        if self.reader.ss_size > self.validator.max_bytes:
+            self.report_limit_exceeded(
+                "max_bytes_exceeded", self.samplesheet_path, self.validator.max_bytes
+            )
+            self.partial_line = ""
+            return []
+        *lines, self.partial_line = (
+            self.partial_line + self.decoder.decode(chunk)
+        ).split("\n")
+        verdicts = []
+        for line in lines:
+            verdicts.extend(self.feed_line(f"{line}\n"))
+        # Reject an overlong or overwide line before the rest of it arrives
+        if self.partial_line and not self.reader.check_line_limits(
+            self.partial_line, len(self.reader.ss_contents)
+        ):
+            self.partial_line = ""
+        return verdicts
+
+    def close(self) -> "StreamingValidationResult":
+        """
+        Complete the validation once the whole samplesheet has been fed
+            :return self (StreamingValidationResult):   Validation outcome
+        """
+        if self.stream_stage == "closed":
+            return self
+        final_line = self.partial_line + self.decoder.decode(b"", final=True)
+        self.partial_line = ""
+        if final_line:
+            self.feed_line(final_line)
+        if self.stream_stage == "preamble" and not self.limit_exceeded:
+            self.logger.info(
+                self.logger.log_msgs["stream_no_data_section"], self.data_section_marker
+            )
+            self.ss_checks()
+        else:
+            if self.stream_stage in ("data", "ended"):
+                if self.check_file_contents(self.samplesheet_path):
+                    if self.development_run():
+                        self.discard_sample_errors()
+                    else:
+                        self.check_expected_headers()
+                        self.check_duplicates()
+                        self.finish_checks()
+                        if self.sample_index is not None:
+                            self.sample_index.check_result(self)
+            self.reader.close()
+            self.log_summary()
+        self.stream_stage = "closed"
+        return self
+
+    def feed_line(self, line: str) -> list:
+        """
+        Add a complete line of the samplesheet, parsing and validating it
+            :param line (str):          Samplesheet line
+            :return verdicts (list):    Verdicts of the sample rows on the line
+        """
+        line_index = len(self.reader.ss_contents)
+        if self.limit_exceeded or not self.reader.check_line_limits(line, line_index):
+            return []
+        line = self.reader.normalise_line(line, line_index)
+        self.reader.ss_contents.append(line)
+        if self.stream_stage == "preamble":
+            if line.startswith(self.data_section_marker):
+                self.check_preamble()
+            return []
+        if self.stream_stage != "data":
+            return []
+        fields = next(csv.reader([line]), [])
+        if self.illumina:
+            if not self.data_headers:
+                if any(header in line for header in self.expected_data_headers):
+                    self.extract_headers(line, line_index, fields)
+                return []
+            self.parse_data_line(fields, line_index, line)
+        else:
+            fields = fields or [""]
+            if fields[0].strip().startswith("["):
+                self.stream_stage = "ended"  # End of the [SAMPLES] section
+                return []
+            self.parse_aviti_line(fields, line_index, ",".join(fields))
+        return self.check_streamed_rows()
+
+    def check_preamble(self) -> None:
+        """
+        Run the samplesheet level checks once the preamble is complete, as by ss_checks()
+            :return None:
+        """
+        self.stream_stage = "stopped"
+        if self.check_ss_present():
+            if self.illumina:
+                setattr(self, "ss_obj", self.check_ss_name())
+            else:
+                self.get_aviti_run_folder_name()
+                self.check_run_folder_name()
+            if self.ss_obj or not self.illumina:
+                self.check_sequencer_id()
+                self.check_md_file()
+                check_run_files(self)
+                if self.verdict_cache is not None:
+                    self.verdict_cache.load(self.logger)
+                self.stream_stage = "data"
+
+    def check_streamed_rows(self) -> list:
+        """
+        Validate the sample rows parsed since the last call, until a development pan number is
+        found
+            :return verdicts (list):    Verdicts of the rows validated
+        """
+        verdicts = []
+        dev_panno_pattern = self.validator.dev_panno_pattern
+        for line_index, sample_row in self.sample_rows[self.checked_rows :]:
+            self.checked_rows += 1
+            if not self.illumina and "Sample_ID" in sample_row:
+                sample_row["Sample_Name"] = sample_row["Sample_ID"]
+            if not self.stream_dev_run and dev_panno_pattern and any(
+                dev_panno_pattern.search(sample) for sample in sample_row.values()
+            ):
+                self.stream_dev_run = True
+                self.logger.info(self.logger.log_msgs["stream_dev_run"], line_index)
+            if not self.stream_dev_run:
+                verdicts.append(self.get_row_verdict(line_index, sample_row))
+        return verdicts
+
+    def discard_sample_errors(self) -> None:
+        """
+        Discard the sample level errors and pan numbers of rows validated before a development
+        pan number was found
+            :return None:
+        """
+        for error_type in config.SAMPLE_ERROR_TYPES:
+            self.errors_dict.pop(error_type, None)
+        self.errors = bool(self.errors_dict)
+        self.pannumbers = []
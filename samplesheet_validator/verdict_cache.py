@@ -0,0 +1,179 @@
+""" verdict_cache.py
+
+Cache of the sample row verdicts of the previous validation of a runfolder, for incremental
+validation. Rows are identified by a fingerprint of their sample columns, so rows moved by adding
+or removing other rows keep their verdict. Verdicts are only reused if made with the same
+validator configuration and instrument type.
+"""
+import os
+import re
+import json
+import hashlib
+from typing import Union
+
+
+class VerdictCache:
+    """
+    Row verdicts of the previous and current validation of a runfolder
+
+    Attributes:
+        cache_path (str):           File holding the row verdicts of the previous validation
+        config_digest (str):        Digest of the validator configuration
+        illumina (bool):            Illumina or not
+        cached_verdicts (dict):     Row verdicts loaded from the cache, by row fingerprint
+        row_verdicts (dict):        Row verdicts of this validation, by row fingerprint
+        reused_verdicts (int):      Number of sample rows whose verdict was taken from the cache
+
+    Methods:
+        get_row_fingerprint(sample_row)
+            Get the fingerprint identifying a sample row by its sample columns
+        relocate_cached_verdict(cached_verdict, line_index)
+            Get a cached row verdict for the row's current line
+        get_cached_verdict(sample_row, line_index)
+            Get the cached verdict of an unchanged sample row
+        add_verdict(sample_row, verdict, pannumbers)
+            Add the verdict of a validated sample row
+        load(logger)
+            Load the row verdicts of the previous validation of the runfolder
+        save(logger, row_count)
+            Save the row verdicts of this validation
+    """
+
+    def __init__(self, cache_path: str, config_digest: str, illumina: bool):
+        """
+        Constructor for the VerdictCache class
+            :param cache_path (str):        File holding the row verdicts
+            :param config_digest (str):     Digest of the validator configuration
+            :param illumina (bool):         Illumina or not
+        """
+        self.cache_path = cache_path
+        self.config_digest = config_digest
+        self.illumina = illumina
+        self.cached_verdicts = {}
+        self.row_verdicts = {}
+        self.reused_verdicts = 0
+
+    @staticmethod
+    def get_row_fingerprint(sample_row: dict) -> str:
+        """
+        Get the fingerprint identifying a sample row by its sample columns, without its line
+            :param sample_row (dict):   Sample ID and sample name of the line
+            :return (str):              Row fingerprint
+        """
+        return hashlib.sha256(json.dumps(sample_row, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def relocate_cached_verdict(cached_verdict: dict, line_index: int) -> dict:
+        """
+        Get a cached row verdict for the row's current line. Error messages give the line as
+        "line N" before any sample value, so the first occurrence in each is the line number
+            :param cached_verdict (dict):   Cached verdict and pan numbers of the row
+            :param line_index (int):        Index of the line now holding the row
+            :return (dict):                 Cached verdict and pan numbers, for the line
+        """
+        verdict = cached_verdict["verdict"]
+        if verdict["line_index"] == line_index:
+            return cached_verdict
+        line_pattern = re.compile(rf"\bline {verdict['line_index']}(?=[:)])")
+        return {
+            **cached_verdict,
+            "verdict": {
+                **verdict,
+                "line_index": line_index,
+                "errors": {
+                    error_type: [
+                        line_pattern.sub(f"line {line_index}", message, count=1)
+                        for message in messages
+                    ]
+                    for error_type, messages in verdict["errors"].items()
+                },
+            },
+        }
+
+    def get_cached_verdict(self, sample_row: dict, line_index: int) -> Union[dict, None]:
+        """
+        Get the cached verdict of a sample row unchanged since the previous validation
+            :param sample_row (dict):       Sample ID and sample name of the line
+            :param line_index (int):        Index of line
+            :return (dict | None):          Cached verdict and pan numbers, for the line, None if
+                                            the row is not cached
+        """
+        fingerprint = self.get_row_fingerprint(sample_row)
+        if fingerprint not in self.cached_verdicts:
+            return None
+        self.reused_verdicts += 1
+        cached_verdict = self.relocate_cached_verdict(self.cached_verdicts[fingerprint], line_index)
+        self.row_verdicts[fingerprint] = cached_verdict
+        return cached_verdict
+
+    def add_verdict(self, sample_row: dict, verdict: dict, pannumbers: list) -> None:
+        """
+        Add the verdict of a validated sample row
+            :param sample_row (dict):   Sample ID and sample name of the line
+            :param verdict (dict):      Verdict for the row
+            :param pannumbers (list):   Pan numbers of the row
+            :return None:
+        """
+        self.row_verdicts[self.get_row_fingerprint(sample_row)] = {
+            "verdict": verdict,
+            "pannumbers": pannumbers,
+        }
+
+    def load(self, logger) -> None:
+        """
+        Load the row verdicts of the previous validation of the runfolder
+            :param logger (logging.Logger): Logger of the validation
+            :return None:
+        """
+        if not os.path.isfile(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r") as verdict_cache:
+                cache = json.load(verdict_cache)
+            if cache["config_digest"] != self.config_digest:
+                raise ValueError("configuration has changed")
+            if cache["illumina"] != self.illumina:
+                raise ValueError("instrument type has changed")
+            self.cached_verdicts = cache["rows"]
+            logger.info(
+                logger.log_msgs["verdict_cache_loaded"],
+                len(self.cached_verdicts),
+                self.cache_path,
+            )
+        except Exception as exception:
+            logger.info(logger.log_msgs["verdict_cache_not_used"], self.cache_path, exception)
+
+    def save(self, logger, row_count: int) -> None:
+        """
+        Save the row verdicts of this validation, replacing the file atomically
+            :param logger (logging.Logger): Logger of the validation
+            :param row_count (int):         Number of sample rows validated
+            :return None:
+        """
+        logger.info(
+            logger.log_msgs["cached_verdicts_used"],
+            self.reused_verdicts,
+            row_count,
+            row_count - self.reused_verdicts,
+        )
+        temp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w") as verdict_cache:
+                # json.dumps uses the C encoder, which json.dump to a stream does not
+                verdict_cache.write(
+                    json.dumps(
+                        {
+                            "config_digest": self.config_digest,
+                            "illumina": self.illumina,
+                            "rows": self.row_verdicts,
+                        }
+                    )
+                )
+            os.replace(temp_path, self.cache_path)
+            logger.info(
+                logger.log_msgs["verdict_cache_saved"], len(self.row_verdicts), self.cache_path
+            )
+        except OSError as exception:
+            logger.warning(
+                logger.log_msgs["verdict_cache_save_error"], self.cache_path, exception
+            )
@@ -1,12 +1,13 @@
 #!/usr/bin/python3
 # coding=utf-8
 """
-Variables used across test modules, including the setup and teardown fixture
-that is run before and after every test
+Variables and fixtures used across test modules, including the setup and teardown
+fixture that is run before and after every test
 """
 import os
 import shutil
 import pytest
+from samplesheet_validator.samplesheet_validator import Validator
 
 
 tempdir = os.path.join(os.path.abspath("test"), "temp/")
@@ -37,6 +38,7 @@ def pytest_configure(config):
     os.environ["temp_dir"] = tempdir
     os.environ["runname"] = config.getoption("runname")
 
+
 @pytest.fixture(scope="function", autouse=True)
 def run_before_and_after_tests():
     """
@@ -54,3 +56,84 @@ def run_before_and_after_tests():
     if os.path.isdir(tempdir):
         # Remove dir and all flag files created
         shutil.rmtree(tempdir)
+
+
+@pytest.fixture(scope="function")
+def get_validator():
+    """
+    Function to retrieve a Validator built from the test configuration
+    """
+
+    def get_validator(panels: list = None, logdir: str = None, **options) -> Validator:
+        """
+        Function to retrieve a Validator built from the test configuration
+            :param panels (list):            Pan numbers, if not those of the test configuration
+            :param logdir (str):             Log directory, if not the temp dir
+            :param options:                  Validator options, if not the defaults
+            :return validator (Validator):   Validator object
+        """
+        return Validator(
+            os.getenv("sequencer_ids").split(","),
+            panels or os.getenv("panels").split(","),
+            os.getenv("tso_panels").split(","),
+            os.getenv("okd_panels").split(","),
+            os.getenv("dev_pannos").split(","),
+            logdir or os.getenv("temp_dir"),
+            **options,
+        )
+
+    return get_validator
+
+
+@pytest.fixture(scope="function")
+def valid_samplesheet():
+    """
+    Valid Custom Panels samplesheet, whose samples all have DNA number 123456 and secondary
+    identifier AB
+    """
+    return os.path.join(
+        os.getenv("samplesheet_dir"),
+        "valid",
+        "210917_NB551068_0409_AH3YNFAFX3_SampleSheet.csv",
+    )
+
+
+@pytest.fixture(scope="function")
+def invalid_samplesheet():
+    """
+    Samplesheet containing multiple errors, including in the sample rows (pan number Pan0034 is
+    not in the panels)
+    """
+    return os.path.join(
+        os.getenv("samplesheet_dir"),
+        "invalid",
+        "230309_E02631_4297_000000000-KRDLT_SampleSheet.csv",
+    )
+
+
+@pytest.fixture(scope="function")
+def write_samplesheet():
+    """
+    Function to write a copy of a samplesheet
+    """
+
+    def write_samplesheet(
+        samplesheet: str, directory: str, edit: callable = None, name: str = None
+    ) -> str:
+        """
+        Write a copy of a samplesheet, optionally with its contents edited or under another name
+            :param samplesheet (str):   Samplesheet to copy
+            :param directory (str):     Directory to write the copy to, created if missing
+            :param edit (callable):     Function returning the edited contents of the samplesheet
+            :param name (str):          Name of the copy, if not that of the samplesheet
+            :return (str):              Path of the copy
+        """
+        os.makedirs(directory, exist_ok=True)
+        copy_path = os.path.join(directory, name or os.path.basename(samplesheet))
+        with open(samplesheet, "r") as source:
+            contents = source.read()
+        with open(copy_path, "w", newline="") as copy:
+            copy.write(edit(contents) if edit else contents)
+        return copy_path
+
+    return write_samplesheet
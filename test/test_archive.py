@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+# coding=utf-8
+""" archive.py pytest unit tests
+"""
+import os
+import pickle
+import pytest
+from samplesheet_validator import archive, pool
+
+
+@pytest.fixture(scope="function")
+def copy_samplesheets(valid_samplesheet, invalid_samplesheet, write_samplesheet):
+    """
+    Function to copy the valid and invalid (pan number Pan0034 is not in the panels) samplesheets
+    into their own runfolders under the archive root
+    """
+
+    def copy_samplesheets(archive_root: str, samplesheets: slice = slice(None)) -> list:
+        """
+        Copy samplesheets into their own runfolders under the archive root
+            :param archive_root (str):      Archive root
+            :param samplesheets (slice):    Samplesheets to copy, of the valid and invalid
+            :return (list):                 Paths of the copied samplesheets
+        """
+        return [
+            write_samplesheet(
+                samplesheet,
+                os.path.join(
+                    archive_root, os.path.basename(samplesheet).split("_SampleSheet.csv")[0]
+                ),
+            )
+            for samplesheet in [valid_samplesheet, invalid_samplesheet][samplesheets]
+        ]
+
+    return copy_samplesheets
+
+
+class TestArchiveRevalidation(object):
+    """
+    Tests for the resumable re-validation of archived samplesheets
+    """
+
+    def test_run_report(self, copy_samplesheets, tmp_path, get_validator):
+        """
+        Test the archived samplesheets are validated across the pool, and the outcomes are
+        aggregated by error category and pan number
+        """
+        archive_root = str(tmp_path / "archive")
+        copy_samplesheets(archive_root)
+        revalidation = archive.ArchiveRevalidation(
+            get_validator(), str(tmp_path / "checkpoint.db")
+        )
+        report = revalidation.run([archive_root], processes=2)
+        revalidation.close()
+        assert revalidation.revalidated == 2
+        assert report["samplesheets"] == 2
+        assert report["samplesheets_with_errors"] == 1
+        assert report["error_categories"]["Pan number invalid"]["samplesheets"] == 1
+        assert report["pannumbers"]["Pan0034"]["errors"]["Pan number invalid"] >= 1
+        assert report["pannumbers"]["Pan4816"]["samples_with_errors"] == 0
+        assert sum(counts["samples"] for counts in report["pannumbers"].values()) > 2
+
+    def test_run_resume(self, copy_samplesheets, tmp_path, get_validator):
+        """
+        Test a re-validation resumes from the checkpoint, only validating the samplesheets not
+        already checkpointed, and reports on every checkpointed outcome
+        """
+        archive_root = str(tmp_path / "archive")
+        checkpoint_path = str(tmp_path / "checkpoint.db")
+        copy_samplesheets(archive_root, slice(1))
+        revalidation = archive.ArchiveRevalidation(get_validator(), checkpoint_path)
+        assert revalidation.run([archive_root], processes=2)["samplesheets"] == 1
+        revalidation.close()
+        copy_samplesheets(archive_root, slice(1, None))
+        resumed = archive.ArchiveRevalidation(get_validator(), checkpoint_path)
+        report = resumed.run([archive_root], processes=2)
+        assert resumed.revalidated == 1
+        assert report["samplesheets"] == 2
+        assert resumed.run([archive_root], processes=2) == report
+        assert resumed.revalidated == 0
+        resumed.close()
+
+    def test_checkpoint_config_changed(self, tmp_path, get_validator):
+        """
+        Test a checkpoint cannot be resumed with a different configuration
+        """
+        checkpoint_path = str(tmp_path / "checkpoint.db")
+        archive.ArchiveRevalidation(get_validator(), checkpoint_path).close()
+        with pytest.raises(ValueError):
+            archive.ArchiveRevalidation(get_validator(["Pan4009"]), checkpoint_path)
+
+    def test_revalidate_in_worker_exception(self, tmp_path, get_validator):
+        """
+        Test a samplesheet whose validation raises an exception is recorded as failed, rather
+        than stopping the re-validation
+        """
+        pool.init_worker(pickle.dumps(get_validator()))
+        samplesheet_path = tmp_path / "SampleSheet.csv"  # No sequencer ID in the name
+        samplesheet_path.write_text("[RunParameters],,,\n")
+        _, outcome = archive.revalidate_in_worker((str(samplesheet_path), False, ""))
+        assert outcome["errors"]
+        assert archive.config.ARCHIVE_EXCEPTION_ERROR in outcome["errors_dict"]
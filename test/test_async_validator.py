@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+# coding=utf-8
+""" async_validator.py pytest unit tests
+"""
+import os
+import asyncio
+import threading
+import logging.handlers
+from samplesheet_validator import async_validator
+from samplesheet_validator.async_validator import ss_checks_async, validate_async
+from samplesheet_validator.samplesheet_validator import SamplesheetCheck
+
+
+def get_ss_checks_coroutine(samplesheet: str, illumina: bool = True):
+    """
+    Return a coroutine that carries out the samplesheet checks for a supplied samplesheet
+        :param samplesheet (str):   Samplesheet path
+        :param illumina (bool):     True if Illumina samplesheet, False if Aviti
+        :return (coroutine):        ss_checks_async coroutine
+    """
+    return ss_checks_async(
+        samplesheet,
+        os.getenv("sequencer_ids").split(","),
+        os.getenv("panels").split(","),
+        os.getenv("tso_panels").split(","),
+        os.getenv("okd_panels").split(","),
+        os.getenv("dev_pannos").split(","),
+        os.getenv("temp_dir"),
+        illumina,
+        os.getenv("runname"),
+    )
+
+
+class TestSSChecksAsync(object):
+    """
+    Tests for the ss_checks_async coroutine
+    """
+
+    def test_ss_checks_async_pass(self, caplog, valid_samplesheet):
+        """
+        Test valid samplesheet passes, and that the logfile is written by the queue listener
+        """
+        sscheck_obj = asyncio.run(get_ss_checks_coroutine(valid_samplesheet))
+        assert not sscheck_obj.errors
+        assert "Samplesheet passed all checks" in caplog.text
+        assert not sscheck_obj.queue_handler
+        assert not sscheck_obj.log_handler
+        assert not any(
+            isinstance(handler, logging.handlers.QueueHandler)
+            for handler in sscheck_obj.logger.handlers
+        )
+        with open(sscheck_obj.logfile_path, "r") as logfile:
+            assert "Samplesheet passed all checks" in logfile.read()
+
+    def test_ss_checks_async_fail(self, caplog, invalid_samplesheet):
+        """
+        Test invalid samplesheet fails
+        """
+        sscheck_obj = asyncio.run(get_ss_checks_coroutine(invalid_samplesheet))
+        assert sscheck_obj.errors
+        assert "Samplesheet did not pass checks" in caplog.text
+
+    def test_ss_checks_async_aviti(self):
+        """
+        Test Aviti samplesheets are read ahead of the checks and pass
+        """
+        samplesheet = os.path.join(
+            os.getenv("samplesheet_dir"),
+            "valid",
+            "250123_AV241501_A2434485185_SampleSheet.csv",
+        )
+        sscheck_obj = asyncio.run(get_ss_checks_coroutine(samplesheet, False))
+        assert sscheck_obj.reader.ss_contents
+        assert not sscheck_obj.errors
+
+    def test_ss_checks_async_concurrent(self, valid_samplesheet, invalid_samplesheet):
+        """
+        Test concurrent validations on one loop each return their own outcome
+        """
+
+        async def gather_checks():
+            return await asyncio.gather(
+                get_ss_checks_coroutine(valid_samplesheet),
+                get_ss_checks_coroutine(invalid_samplesheet),
+            )
+
+        valid_obj, invalid_obj = asyncio.run(gather_checks())
+        assert not valid_obj.errors
+        assert invalid_obj.errors
+
+    def test_validate_async_off_loop(self, get_validator, valid_samplesheet, monkeypatch):
+        """
+        Test the result, whose logger opens the logfile, is built off the event loop thread, and
+        that ss_checks_async still returns a SamplesheetCheck object
+        """
+        result_threads = []
+        validation_result = async_validator.ValidationResult
+
+        def get_result(*args, **kwargs):
+            result_threads.append(threading.get_ident())
+            return validation_result(*args, **kwargs)
+
+        monkeypatch.setattr(async_validator, "ValidationResult", get_result)
+        result = asyncio.run(
+            validate_async(get_validator(), valid_samplesheet, True, os.getenv("runname"))
+        )
+        assert not result.errors
+        assert result_threads and threading.get_ident() not in result_threads
+        sscheck_obj = asyncio.run(get_ss_checks_coroutine(valid_samplesheet))
+        assert isinstance(sscheck_obj, SamplesheetCheck)
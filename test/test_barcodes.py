@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+# coding=utf-8
+""" barcodes.py pytest unit tests
+"""
+import random
+import itertools
+import pytest
+from samplesheet_validator import barcodes
+
+
+def brute_force_collisions(barcode_list: list, threshold: int) -> list:
+    """
+    Compare every pair of barcodes of the same length
+    """
+    collisions = []
+    for (key_a, barcode_a), (key_b, barcode_b) in itertools.combinations(barcode_list, 2):
+        if len(barcode_a) == len(barcode_b):
+            distance = sum(a != b for a, b in zip(barcode_a, barcode_b))
+            if distance < threshold:
+                collisions.append((key_a, key_b, distance))
+    return sorted(collisions)
+
+
+class TestBarcodes(object):
+    """
+    Tests for the barcode collision functions
+    """
+
+    @pytest.mark.parametrize(
+        "barcode_a, barcode_b, distance",
+        [
+            ("ACGTACGT", "ACGTACGT", 0),
+            ("ACGTACGT", "ACGTACGA", 1),
+            ("ACGTACGT", "TGCATGCA", 8),
+            ("ACGTNCGT", "ACGTACGT", 1),
+            ("acgtacgt", "ACGTACGT", 0),
+        ],
+    )
+    def test_hamming_distance(self, barcode_a, barcode_b, distance):
+        """
+        Test Hamming distances between packed barcodes
+        """
+        position_mask = int("1" * len(barcode_a), 8)
+        assert (
+            barcodes.hamming_distance(
+                barcodes.pack_barcode(barcode_a),
+                barcodes.pack_barcode(barcode_b),
+                position_mask,
+            )
+            == distance
+        )
+
+    @pytest.mark.parametrize("barcode", ["ACG1", "ACGT-CGT", " ACGT", "AC_GT", "+ACGT", "-ACGT"])
+    def test_pack_barcode_invalid(self, barcode):
+        """
+        Test barcodes containing characters other than ACGTN are not packed, or compared
+        """
+        assert not barcodes.is_valid_barcode(barcode)
+        with pytest.raises(ValueError):
+            barcodes.pack_barcode(barcode)
+        assert barcodes.find_index_collisions([("a", barcode), ("b", barcode)], 3) == []
+
+    def test_find_index_collisions(self):
+        """
+        Test collisions are reported in order of distance, then barcode order
+        """
+        barcode_list = [
+            ("a", "AAAAAAAACCCCCCCC"),
+            ("b", "AAAAAAAACCCCCCCA"),
+            ("c", "GGGGGGGGTTTTTTTT"),
+            ("d", "AAAAAAAACCCCCCCC"),
+            ("e", "AAAAAAAA"),
+            ("f", ""),
+            ("g", ""),
+        ]
+        assert barcodes.find_index_collisions(barcode_list, 3) == [
+            ("a", "d", 0),
+            ("a", "b", 1),
+            ("b", "d", 1),
+        ]
+        assert barcodes.find_index_collisions(barcode_list, 0) == []
+
+    def test_find_index_collisions_brute_force(self):
+        """
+        Test the pigeonhole candidate pairs find every collision found by comparing all pairs
+        """
+        rng = random.Random(0)
+        for _ in range(100):
+            length = rng.choice([4, 8, 16, 20])
+            threshold = rng.randint(1, 6)
+            template = [rng.choice("ACGT") for _ in range(length)]
+            barcode_list = []
+            for key in range(rng.randint(2, 50)):
+                barcode = list(template)
+                for _ in range(rng.randint(0, length)):
+                    barcode[rng.randrange(length)] = rng.choice("ACGTN")
+                barcode_list.append((key, "".join(barcode)))
+            assert sorted(
+                barcodes.find_index_collisions(barcode_list, threshold)
+            ) == brute_force_collisions(barcode_list, threshold)
@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+# coding=utf-8
+""" content_store.py pytest unit tests
+"""
+import pytest
+from samplesheet_validator.content_store import ContentStore
+
+
+class TestContentStore(object):
+    """
+    Tests for the content-addressed store of validation outcomes
+    """
+
+    @pytest.mark.parametrize(
+        "line, normalised",
+        [
+            ("Sample1,Sample1,,,\r\n", "Sample1,Sample1,,,"),
+            ("\ufeff[Header],,\n", "[Header],,"),
+            ("[Data]", "[Data]"),
+            ("   ,\n", "   ,"),
+        ],
+    )
+    def test_normalise_line(self, line, normalised):
+        """
+        Test line endings and byte order marks are canonicalised, and whitespace and empty
+        fields are kept
+        """
+        assert ContentStore.normalise_line(line) == normalised
+
+    def test_validate(self, invalid_samplesheet, tmp_path, get_validator, write_samplesheet):
+        """
+        Test identical and equivalent samplesheet contents are answered from the store, with the
+        outcome of the first validation
+        """
+        validator = get_validator()
+        # Copy with Windows line endings and a byte order mark
+        copy_path = write_samplesheet(
+            invalid_samplesheet,
+            str(tmp_path / "copy"),
+            lambda contents: "\ufeff" + contents.replace("\n", "\r\n"),
+        )
+        with ContentStore(str(tmp_path / "outcomes.db")) as store:
+            first_result = validator.validate(invalid_samplesheet, content_store=store)
+            first_verdicts = first_result.sample_verdicts
+            repeat_result = validator.validate(invalid_samplesheet, content_store=store)
+            copy_result = validator.validate(copy_path, content_store=store)
+            assert store.hits == 2
+        for result in (first_result, repeat_result, copy_result):
+            result.close_logger()
+        assert first_result.errors
+        assert first_result.sample_rows
+        for result in (repeat_result, copy_result):
+            assert result.content_key == first_result.content_key
+            assert result.errors_dict == first_result.errors_dict
+            assert result.pannumbers == first_result.pannumbers
+            assert not result.sample_rows  # Not parsed
+        with ContentStore(str(tmp_path / "outcomes.db")) as store:
+            result = validator.validate(invalid_samplesheet, content_store=store)
+            assert list(store.lookup(result.content_key)["verdicts"]) == first_verdicts
+            result.close_logger()
+
+    def test_changed_contents_and_configuration(
+        self, invalid_samplesheet, tmp_path, get_validator, write_samplesheet
+    ):
+        """
+        Test samplesheets are re-validated if their contents or the configuration differ
+        """
+        copy_path = write_samplesheet(
+            invalid_samplesheet,
+            str(tmp_path),
+            lambda contents: contents.replace("Pan0034", "Pan4816"),
+        )
+        with ContentStore(str(tmp_path / "outcomes.db")) as store:
+            results = [
+                get_validator().validate(invalid_samplesheet, content_store=store),
+                get_validator().validate(copy_path, content_store=store),
+                get_validator(["Pan0034"]).validate(invalid_samplesheet, content_store=store),
+            ]
+            assert store.hits == 0
+        assert len({result.content_key for result in results}) == 3
+        assert all(result.sample_rows for result in results)
+        for result in results:
+            result.close_logger()
+
+    @pytest.mark.parametrize(
+        "edit, error_type",
+        [
+            # A data line of spaces is a sample row that fails extraction, whereas an empty line
+            # is skipped
+            (
+                lambda contents: contents.rstrip("\n") + "\n          \n",
+                "Error extracting sample name and ID",
+            ),
+            # Trailing whitespace in a sample column is an illegal character
+            (
+                lambda contents: contents.replace("_Pan4822,", "_Pan4822 ,", 1),
+                "Illegal characters",
+            ),
+        ],
+    )
+    def test_whitespace_not_normalised(
+        self, valid_samplesheet, tmp_path, edit, error_type, get_validator, write_samplesheet
+    ):
+        """
+        Test a samplesheet differing from a stored passing one only by whitespace is not
+        answered from the store, as whitespace changes the outcome of the checks
+        """
+        copy_path = write_samplesheet(valid_samplesheet, str(tmp_path), edit)
+        with ContentStore(str(tmp_path / "outcomes.db")) as store:
+            clean_result = get_validator().validate(valid_samplesheet, content_store=store)
+            copy_result = get_validator().validate(copy_path, content_store=store)
+            assert store.hits == 0
+        for result in (clean_result, copy_result):
+            result.close_logger()
+        assert not clean_result.errors
+        assert clean_result.content_key != copy_result.content_key
+        assert error_type in copy_result.errors_dict
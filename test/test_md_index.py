@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+# coding=utf-8
+""" md_index.py pytest unit tests
+"""
+import os
+import pytest
+from samplesheet_validator import md_index
+
+
+class TestMasterDataIndex(object):
+    """
+    Tests for the MasterDataFile directory index
+    """
+
+    def test_lookup(self, tmp_path, monkeypatch):
+        """
+        Test MasterDataFiles are looked up by run identifier, and the directory is only listed
+        again once it has changed
+        """
+        md_dir = tmp_path / "md"
+        md_dir.mkdir()
+        (md_dir / "210917_NB551068_0409_AH3YNFAFX3_MasterDataFile.xlsx").write_text("")
+        (md_dir / "notes.txt").write_text("")
+        scans = []
+        scandir = os.scandir
+        monkeypatch.setattr(
+            md_index.os, "scandir", lambda path: scans.append(path) or scandir(path)
+        )
+        index = md_index.MasterDataIndex(str(md_dir))
+        assert index.lookup("210917_NB551068_0409_AH3YNFAFX3") == str(
+            md_dir / "210917_NB551068_0409_AH3YNFAFX3_MasterDataFile.xlsx"
+        )
+        assert index.lookup("210918_NB551068_0410_AH3YNFAFX4") is None
+        assert index.lookup("notes.txt") is None
+        assert len(scans) == 1
+        (md_dir / "210918_NB551068_0410_AH3YNFAFX4_MasterDataFile.xlsx").write_text("")
+        os.utime(md_dir, ns=(0, index.mtime_ns + 1))  # Filesystems may round modification times
+        assert index.lookup("210918_NB551068_0410_AH3YNFAFX4")
+        assert len(scans) == 2
+
+    def test_get_md_index(self, tmp_path):
+        """
+        Test the index of a directory is shared across the process
+        """
+        assert md_index.get_md_index(str(tmp_path)) is md_index.get_md_index(
+            str(tmp_path) + os.sep
+        )
+
+    def test_check_md_file(self, valid_samplesheet, tmp_path, get_validator):
+        """
+        Test a run without a MasterDataFile is reported only if a MasterDataFile directory is
+        configured
+        """
+        md_dir = tmp_path / "md"
+        md_dir.mkdir()
+        results = [
+            get_validator().validate(valid_samplesheet),
+            get_validator(md_dir=str(md_dir)).validate(valid_samplesheet),
+        ]
+        (md_dir / "210917_NB551068_0409_AH3YNFAFX3_MasterDataFile.xlsx").write_text("")
+        os.utime(md_dir, ns=(0, md_index.get_md_index(str(md_dir)).mtime_ns + 1))
+        results.append(get_validator(md_dir=str(md_dir)).validate(valid_samplesheet))
+        for result in results:
+            result.close_logger()
+        no_md_dir_result, missing_result, present_result = results
+        assert "MasterDataFile missing" not in no_md_dir_result.errors_dict
+        assert missing_result.errors
+        assert "MasterDataFile missing" in missing_result.errors_dict
+        assert "MasterDataFile missing" not in present_result.errors_dict
@@ -0,0 +1,35 @@
+#!/usr/bin/python3
+# coding=utf-8
+""" pool.py pytest unit tests
+"""
+import pickle
+from samplesheet_validator import pool
+
+
+class TestPool(object):
+    """
+    Tests for validating samplesheets across a process pool
+    """
+
+    def test_init_worker_blob(self, get_validator, valid_samplesheet):
+        """
+        Test the worker Validator is set from a pickled blob
+        """
+        validator = get_validator()
+        pool.init_worker(pickle.dumps(validator))
+        assert pool._WORKER_VALIDATOR.__getstate__() == validator.__getstate__()
+        summary = pool.validate_in_worker(valid_samplesheet)
+        assert not summary["errors"]
+        assert pickle.loads(pickle.dumps(summary)) == summary
+
+    def test_get_pool(self, get_validator, valid_samplesheet, invalid_samplesheet):
+        """
+        Test workers share the Validator and return picklable summaries
+        """
+        with pool.get_pool(get_validator(), 2) as process_pool:
+            summaries = process_pool.map(
+                pool.validate_in_worker, [valid_samplesheet, invalid_samplesheet]
+            )
+        assert not summaries[0]["errors"]
+        assert summaries[1]["errors"]
+        assert "Sample name invalid" in summaries[1]["errors_dict"]
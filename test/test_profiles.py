@@ -0,0 +1,127 @@
+#!/usr/bin/python3
+# coding=utf-8
+""" profiles.py pytest unit tests
+"""
+import os
+import json
+import pytest
+from samplesheet_validator.profiles import ValidatorProfiles
+
+
+def get_profiles_config() -> dict:
+    """
+    Profiles configuration splitting the test sequencer IDs between an Illumina profile and
+    an Aviti profile, with shared lists given at the top level
+        :return (dict):     Profiles configuration
+    """
+    sequencer_ids = os.getenv("sequencer_ids").split(",")
+    return {
+        "panels": os.getenv("panels"),
+        "tso_panels": os.getenv("tso_panels"),
+        "okd_panels": os.getenv("okd_panels"),
+        "dev_pannos": os.getenv("dev_pannos"),
+        "default_profile": "illumina",
+        "profiles": {
+            "illumina": {
+                "sequencer_ids": [i for i in sequencer_ids if not i.startswith("AV")]
+            },
+            "aviti": {"sequencer_ids": [i for i in sequencer_ids if i.startswith("AV")]},
+        },
+    }
+
+
+def get_samplesheet(validity: str, name: str) -> str:
+    """
+    Get path to test samplesheet
+    """
+    return os.path.join(os.getenv("samplesheet_dir"), validity, name)
+
+
+class TestValidatorProfiles(object):
+    """
+    Tests for the ValidatorProfiles class
+    """
+
+    def test_from_config_file(self):
+        """
+        Test profiles are loaded once from file, each with their own Validator
+        """
+        config_path = os.path.join(os.getenv("temp_dir"), "profiles.json")
+        with open(config_path, "w") as config_file:
+            json.dump(get_profiles_config(), config_file)
+        profiles = ValidatorProfiles.from_config_file(config_path, os.getenv("temp_dir"))
+        assert set(profiles.profiles) == {"illumina", "aviti"}
+        assert profiles.sequencer_profiles["AV241501"] == "aviti"
+        assert profiles.sequencer_profiles["A01229"] == "illumina"
+
+    def test_single_configuration(self):
+        """
+        Test a configuration without profiles is loaded as a single default profile
+        """
+        profiles_config = get_profiles_config()
+        profiles_config.pop("profiles")
+        profiles_config["sequencer_ids"] = os.getenv("sequencer_ids")
+        profiles = ValidatorProfiles.from_config(profiles_config, os.getenv("temp_dir"))
+        assert list(profiles.profiles) == ["default"]
+
+    def test_duplicate_sequencer_id(self):
+        """
+        Test a sequencer ID in more than one profile is rejected
+        """
+        profiles_config = get_profiles_config()
+        profiles_config["profiles"]["aviti"]["sequencer_ids"].append("A01229")
+        with pytest.raises(ValueError):
+            ValidatorProfiles.from_config(profiles_config, os.getenv("temp_dir"))
+
+    def test_config_digest(self):
+        """
+        Test the configuration digest changes with the configuration of any profile
+        """
+        profiles = ValidatorProfiles.from_config(get_profiles_config(), os.getenv("temp_dir"))
+        profiles_config = get_profiles_config()
+        assert (
+            ValidatorProfiles.from_config(profiles_config, os.getenv("temp_dir")).config_digest
+            == profiles.config_digest
+        )
+        profiles_config["profiles"]["aviti"]["panels"] = ["Pan4396"]
+        assert (
+            ValidatorProfiles.from_config(profiles_config, os.getenv("temp_dir")).config_digest
+            != profiles.config_digest
+        )
+
+    def test_select(self):
+        """
+        Test the profile is selected from the Illumina samplesheet name or the Aviti filename,
+        falling back to the default profile
+        """
+        profiles = ValidatorProfiles.from_config(get_profiles_config(), os.getenv("temp_dir"))
+        assert profiles.select(
+            "221021_A01229_0145_BHGGTHDMXY_SampleSheet.csv", True
+        ) is profiles.profiles["illumina"]
+        assert profiles.select(
+            "250123_AV241501_A2434485185_SampleSheet.csv", False
+        ) is profiles.profiles["aviti"]
+        assert profiles.select("not_a_samplesheet.csv", True) is profiles.profiles["illumina"]
+
+    def test_validate(self, caplog):
+        """
+        Test mixed batches validate against the correct profile
+        """
+        profiles = ValidatorProfiles.from_config(get_profiles_config(), os.getenv("temp_dir"))
+        illumina_result = profiles.validate(
+            get_samplesheet("valid", "221021_A01229_0145_BHGGTHDMXY_SampleSheet.csv"), True
+        )
+        aviti_result = profiles.validate(
+            get_samplesheet("valid", "250123_AV241501_A2434485185_SampleSheet.csv"),
+            False,
+            os.getenv("runname"),
+        )
+        invalid_result = profiles.validate(
+            get_samplesheet("invalid", "211008_1229_0040_AHKGTFDRXY_SampleSheet.csv"), True
+        )
+        assert not illumina_result.errors
+        assert not aviti_result.errors
+        assert aviti_result.validator is profiles.profiles["aviti"]
+        assert invalid_result.errors
+        for result in (illumina_result, aviti_result, invalid_result):
+            result.close_logger()
@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+# coding=utf-8
+""" results_store.py pytest unit tests
+"""
+import sqlite3
+from samplesheet_validator import pool
+from samplesheet_validator.results_store import ResultsStore
+
+
+def get_rows(store_path: str, query: str = "SELECT * FROM sample_results") -> list:
+    """
+    Query the rows of a results store
+    """
+    with sqlite3.connect(store_path) as connection:
+        return connection.execute(query).fetchall()
+
+
+class TestResultsStore(object):
+    """
+    Tests for recording the per-sample results of validations
+    """
+
+    def test_validate(self, tmp_path, get_validator, valid_samplesheet, invalid_samplesheet):
+        """
+        Test a row is recorded for each sample row, classified from the row's errors
+        """
+        store_path = str(tmp_path / "results.db")
+        validator = get_validator()
+        with ResultsStore(store_path) as store:
+            results = [
+                validator.validate(samplesheet, results_store=store)
+                for samplesheet in [valid_samplesheet, invalid_samplesheet]
+            ]
+        for result in results:
+            result.close_logger()
+        valid_result, invalid_result = results
+        assert len(get_rows(store_path)) == len(valid_result.sample_rows) + len(
+            invalid_result.sample_rows
+        )
+        assert get_rows(
+            store_path,
+            "SELECT DISTINCT classification FROM sample_results "
+            f"WHERE run = '{valid_result.runfolder_name}'",
+        ) == [("valid",)]
+        invalid_rows = get_rows(
+            store_path,
+            "SELECT line, error_codes FROM sample_results "
+            f"WHERE run = '{invalid_result.runfolder_name}' AND pannumber = 'Pan0034'",
+        )
+        assert invalid_rows
+        assert all("panno_invalid" in error_codes for _, error_codes in invalid_rows)
+
+    def test_buffered_writes(self, tmp_path, get_validator, valid_samplesheet):
+        """
+        Test rows are buffered until the batch size is reached, then written in bulk
+        """
+        store_path = str(tmp_path / "results.db")
+        validator = get_validator()
+        samplesheet = valid_samplesheet
+        store = ResultsStore(store_path, batch_size=100000)
+        result = validator.validate(samplesheet, results_store=store)
+        result.close_logger()
+        assert len(store.buffer) == len(result.sample_rows)
+        assert get_rows(store_path) == []
+        store.close()
+        assert len(get_rows(store_path)) == len(result.sample_rows)
+        store = ResultsStore(store_path, batch_size=1)
+        validator.validate(samplesheet, results_store=store).close_logger()
+        assert store.buffer == []
+        assert len(get_rows(store_path)) == 2 * len(result.sample_rows)
+        store.close()
+
+    def test_stream(self, tmp_path, get_validator, invalid_samplesheet):
+        """
+        Test the rows of a streamed validation are recorded once it is closed
+        """
+        store_path = str(tmp_path / "results.db")
+        samplesheet = invalid_samplesheet
+        with ResultsStore(store_path) as store:
+            streamed_result = get_validator().stream(samplesheet, results_store=store)
+            with open(samplesheet, "rb") as samplesheet_stream:
+                streamed_result.feed(samplesheet_stream.read())
+            assert store.buffer == []
+            streamed_result.close()
+            streamed_result.close_logger()
+        assert len(get_rows(store_path)) == len(streamed_result.sample_rows)
+
+    def test_pool(self, tmp_path, get_validator, valid_samplesheet, invalid_samplesheet):
+        """
+        Test pool workers record the results of each samplesheet in the shared store
+        """
+        store_path = str(tmp_path / "results.db")
+        ResultsStore(store_path).close()
+        with pool.get_pool(get_validator(), 2, store_path) as process_pool:
+            summaries = process_pool.map(
+                pool.validate_in_worker, [valid_samplesheet, invalid_samplesheet]
+            )
+        runs = get_rows(store_path, "SELECT DISTINCT run FROM sample_results")
+        assert sorted(run for (run,) in runs) == sorted(
+            summary["runfolder_name"] for summary in summaries
+        )
@@ -0,0 +1,201 @@
+#!/usr/bin/python3
+# coding=utf-8
+""" run_files.py pytest unit tests
+"""
+import os
+import json
+import pytest
+from samplesheet_validator import config
+from samplesheet_validator import run_files
+
+RUN_INFO = """<?xml version="1.0"?>
+<RunInfo Version="5">
+  <Run Id="210917_NB551068_0409_AH3YNFAFX3" Number="409">
+    <Flowcell>%s</Flowcell>
+    <Instrument>%s</Instrument>
+    <Date>9/17/2021 10:02:51 AM</Date>
+    <Reads>
+      <Read Number="1" NumCycles="%s" IsIndexedRead="N" />
+      <Read Number="2" NumCycles="8" IsIndexedRead="Y" />
+      <Read Number="3" NumCycles="8" IsIndexedRead="Y" />
+      <Read Number="4" NumCycles="151" IsIndexedRead="N" />
+    </Reads>
+    <FlowcellLayout LaneCount="4" SurfaceCount="2" SwathCount="3" TileCount="12" />
+%s  </Run>
+</RunInfo>
+"""
+
+
+def write_run_info(
+    runfolder: str,
+    flowcell: str = "H3YNFAFX3",
+    instrument: str = "NB551068",
+    read1_cycles: int = 151,
+    padding: str = "",
+) -> str:
+    """
+    Write a RunInfo.xml to a runfolder
+        :param runfolder (str):     Runfolder directory
+        :param flowcell (str):      Flowcell ID
+        :param instrument (str):    Instrument ID
+        :param read1_cycles (int):  Number of cycles of read 1
+        :param padding (str):       Elements written after the reads
+        :return (str):              Path of the RunInfo.xml
+    """
+    run_info_path = os.path.join(runfolder, "RunInfo.xml")
+    with open(run_info_path, "w") as run_info:
+        run_info.write(RUN_INFO % (flowcell, instrument, read1_cycles, padding))
+    return run_info_path
+
+
+@pytest.fixture(scope="function")
+def runfolder(valid_samplesheet, write_samplesheet, tmp_path):
+    """
+    Runfolder holding a valid Illumina samplesheet
+    """
+    return os.path.dirname(
+        write_samplesheet(valid_samplesheet, str(tmp_path / "210917_NB551068_0409_AH3YNFAFX3"))
+    )
+
+
+class TestRunFiles(object):
+    """
+    Tests for the run file readers and the cross-check of samplesheets against them
+    """
+
+    def test_read_run_info(self, runfolder):
+        """
+        Test RunInfo.xml is read up to the elements needed, however large the rest of the file
+        """
+        padding = '    <Tile Name="1_1101" />\n' * 10000
+        run_info_path = write_run_info(runfolder, padding=padding)
+        run_file = run_files.read_run_files(runfolder, True)
+        assert run_file["path"] == run_info_path
+        assert run_file["instrument"] == "NB551068"
+        assert run_file["flowcell"] == "H3YNFAFX3"
+        assert run_file["reads"] == [151, 151]
+        assert run_file["bytes_read"] == config.RUN_FILE_CHUNK_SIZE
+        assert os.path.getsize(run_info_path) > config.RUN_FILE_MAX_BYTES
+
+    @pytest.mark.parametrize(
+        "run_parameters, expected",
+        [
+            (  # MiSeq
+                "<RunParameters><ScannerID>M02631</ScannerID><FlowcellRFIDTag>"
+                "<SerialNumber>000000000-KRDLT</SerialNumber></FlowcellRFIDTag><Reads>"
+                '<RunInfoRead Number="1" NumCycles="151" IsIndexedRead="N" />'
+                '<RunInfoRead Number="2" NumCycles="8" IsIndexedRead="Y" />'
+                "</Reads></RunParameters>",
+                ("M02631", "000000000-KRDLT", [151]),
+            ),
+            (  # NovaSeq 6000
+                '<RunParameters xmlns:xsd="http://www.w3.org/2001/XMLSchema">'
+                "<Read1NumberOfCycles>151</Read1NumberOfCycles>"
+                "<Read2NumberOfCycles>151</Read2NumberOfCycles>"
+                "<IndexRead1NumberOfCycles>8</IndexRead1NumberOfCycles>"
+                "<InstrumentName>A01229</InstrumentName><RfidsInfo>"
+                "<FlowCellSerialBarcode>HGGTHDMXY</FlowCellSerialBarcode></RfidsInfo>"
+                "</RunParameters>",
+                ("A01229", "HGGTHDMXY", [151, 151]),
+            ),
+        ],
+    )
+    def test_read_run_parameters_xml(self, runfolder, run_parameters, expected):
+        """
+        Test RunParameters.xml is read if there is no RunInfo.xml
+        """
+        with open(os.path.join(runfolder, "RunParameters.xml"), "w") as run_parameters_file:
+            run_parameters_file.write(run_parameters)
+        run_file = run_files.read_run_files(runfolder, True)
+        assert (run_file["instrument"], run_file["flowcell"], run_file["reads"]) == expected
+
+    def test_read_run_parameters_json(self, tmp_path):
+        """
+        Test the AVITI RunParameters.json is read, unless it exceeds the size limit
+        """
+        run_parameters = {
+            "InstrumentName": "AV241501",
+            "FlowcellID": "2434485185",
+            "Cycles": {"R1": 151, "R2": 151, "I1": 10, "I2": 10},
+        }
+        run_parameters_path = tmp_path / "RunParameters.json"
+        run_parameters_path.write_text(json.dumps(run_parameters))
+        run_file = run_files.read_run_files(str(tmp_path), False)
+        assert (run_file["instrument"], run_file["flowcell"], run_file["reads"]) == (
+            "AV241501",
+            "2434485185",
+            [151, 151],
+        )
+        assert run_files.read_run_files(str(tmp_path), True) is None
+        run_parameters_path.write_text(" " * config.RUN_FILE_MAX_BYTES + json.dumps(run_parameters))
+        with pytest.raises(ValueError):
+            run_files.read_run_files(str(tmp_path), False)
+
+    @pytest.mark.parametrize(
+        "run_info_values, mismatches",
+        [
+            ({}, []),
+            ({"flowcell": "H3YNFAFX4"}, ["Flowcell"]),
+            ({"instrument": "NB551069", "read1_cycles": 75}, ["Instrument", "Read lengths"]),
+        ],
+    )
+    def test_check_run_files(self, runfolder, run_info_values, mismatches, get_validator):
+        """
+        Test the instrument, flowcell and read lengths of the samplesheet are cross-checked
+        against RunInfo.xml
+        """
+        write_run_info(runfolder, **run_info_values)
+        samplesheet = os.path.join(runfolder, "210917_NB551068_0409_AH3YNFAFX3_SampleSheet.csv")
+        results = [
+            get_validator(check_run_files=True).validate(samplesheet),
+            get_validator(check_run_files=True).validate(samplesheet, memory_map=True),
+        ]
+        for result in results:
+            result.close_logger()
+            messages = result.errors_dict.get("Run files mismatch", [])
+            assert [message.split(" in the ")[0] for message in messages] == mismatches
+
+    def test_check_run_files_skipped(self, runfolder, get_validator):
+        """
+        Test samplesheets are not cross-checked unless configured, or if their runfolder holds
+        no run files
+        """
+        samplesheet = os.path.join(runfolder, "210917_NB551068_0409_AH3YNFAFX3_SampleSheet.csv")
+        no_run_files_result = get_validator(check_run_files=True).validate(samplesheet)
+        write_run_info(runfolder, instrument="NB551069")
+        not_configured_result = get_validator().validate(samplesheet)
+        for result in (no_run_files_result, not_configured_result):
+            result.close_logger()
+            assert "Run files mismatch" not in result.errors_dict
+
+    @pytest.mark.parametrize(
+        "instrument, flowcell, mismatches",
+        [
+            ("AV241501", "2434485185", []),
+            ("AV241502", "2434485186", ["Instrument", "Flowcell"]),
+        ],
+    )
+    def test_check_run_files_aviti(
+        self, tmp_path, instrument, flowcell, mismatches, get_validator, write_samplesheet
+    ):
+        """
+        Test the instrument and flowcell of AVITI samplesheets are cross-checked against
+        RunParameters.json
+        """
+        samplesheet = write_samplesheet(
+            os.path.join(
+                os.getenv("samplesheet_dir"),
+                "valid",
+                "250123_AV241501_A2434485185_SampleSheet.csv",
+            ),
+            str(tmp_path),
+        )
+        (tmp_path / "RunParameters.json").write_text(
+            json.dumps({"InstrumentName": instrument, "FlowcellID": flowcell})
+        )
+        result = get_validator(check_run_files=True).validate(
+            samplesheet, False, os.getenv("runname")
+        )
+        result.close_logger()
+        messages = result.errors_dict.get("Run files mismatch", [])
+        assert [message.split(" in the ")[0] for message in messages] == mismatches
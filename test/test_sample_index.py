@@ -0,0 +1,112 @@
+#!/usr/bin/python3
+# coding=utf-8
+""" sample_index.py pytest unit tests
+"""
+import os
+import sqlite3
+import pytest
+from samplesheet_validator.sample_index import SampleIndex
+
+
+class TestSampleIndex(object):
+    """
+    Tests for the cross-run sample index
+    """
+
+    def test_concurrent_runs(self, valid_samplesheet, tmp_path, get_validator, write_samplesheet):
+        """
+        Test samples also on another run validated within the window are reported, and that
+        re-validating a run does not report its own samples
+        """
+        validator = get_validator()
+        concurrent_run, other_run = [
+            write_samplesheet(
+                valid_samplesheet,
+                str(tmp_path),
+                lambda contents: contents.replace("_123456_", f"_{dna_number}_"),
+                os.path.basename(valid_samplesheet).replace("_0409_", f"_{run_number}_"),
+            )
+            for run_number, dna_number in (("0410", "123456"), ("0411", "654321"))
+        ]
+        with SampleIndex(str(tmp_path / "samples.db")) as sample_index:
+            results = [
+                validator.validate(valid_samplesheet, sample_index=sample_index),
+                validator.validate(valid_samplesheet, sample_index=sample_index),
+                validator.validate(concurrent_run, sample_index=sample_index),
+                validator.validate(other_run, sample_index=sample_index),
+            ]
+        for result in results:
+            result.close_logger()
+        first_result, repeat_result, concurrent_result, other_result = results
+        assert "Sample on another run" not in first_result.errors_dict
+        assert "Sample on another run" not in repeat_result.errors_dict
+        assert "Sample on another run" not in other_result.errors_dict
+        assert concurrent_result.errors
+        (message,) = concurrent_result.errors_dict["Sample on another run"]
+        assert first_result.runfolder_name in message
+
+    def test_controls_not_indexed(self, tmp_path, get_validator, write_samplesheet):
+        """
+        Test runs sharing only their control samples (no template control and reference
+        standard) do not report them as samples on another run
+        """
+        okd_samplesheet = os.path.join(
+            os.getenv("samplesheet_dir"),
+            "valid",
+            "251127_A01229_0637_AHGLV2DRX7_SampleSheet.csv",
+        )
+        run_paths = [
+            write_samplesheet(
+                okd_samplesheet,
+                str(tmp_path),
+                lambda contents: contents.replace("_123456_", f"_{dna_number}_"),
+                os.path.basename(okd_samplesheet).replace("_0637_", f"_{run_number}_"),
+            )
+            for run_number, dna_number in (("0637", "123456"), ("0638", "654321"))
+        ]
+        validator = get_validator()
+        with SampleIndex(str(tmp_path / "samples.db")) as sample_index:
+            results = [
+                validator.validate(run_path, sample_index=sample_index) for run_path in run_paths
+            ]
+            indexed_samples = [
+                sample
+                for (sample,) in sample_index.connection.execute("SELECT sample FROM run_samples")
+            ]
+        for result in results:
+            result.close_logger()
+        assert "Sample on another run" not in results[1].errors_dict
+        assert indexed_samples
+        assert not any("_NTC" in sample or "_HD200" in sample for sample in indexed_samples)
+
+    def test_evict(self, tmp_path):
+        """
+        Test entries older than the window are not reported, and are evicted when the index is
+        opened
+        """
+        index_path = str(tmp_path / "samples.db")
+        with SampleIndex(index_path, window_days=7) as sample_index:
+            sample_index.record_run("old_run", {"123456_AB": "NGS432_01_123456_AB_F_X_Pan4822"})
+            sample_index.record_run("new_run", {"123456_AB": "NGS432_02_123456_AB_F_X_Pan4822"})
+            with sample_index.connection:
+                sample_index.connection.execute(
+                    "UPDATE run_samples SET validated_at = '2000-01-01T00:00:00' "
+                    "WHERE run = 'old_run'"
+                )
+            other_runs = sample_index.find_other_runs("run", ["123456_AB", "654321_AB"])
+            assert [run for run, _, _ in other_runs["123456_AB"]] == ["new_run"]
+            assert "654321_AB" not in other_runs
+        SampleIndex(index_path, window_days=7).close()
+        with sqlite3.connect(index_path) as connection:
+            runs = connection.execute("SELECT run FROM run_samples").fetchall()
+        assert runs == [("new_run",)]
+
+    def test_record_run(self, tmp_path):
+        """
+        Test recording a run replaces the samples previously held for it
+        """
+        with SampleIndex(str(tmp_path / "samples.db")) as sample_index:
+            sample_index.record_run("run", {"123456_AB": "NGS432_01_123456_AB_F_X_Pan4822"})
+            sample_index.record_run("run", {"654321_AB": "NGS432_01_654321_AB_F_X_Pan4822"})
+            assert sample_index.find_other_runs("other_run", ["123456_AB"]) == {}
+            assert sample_index.find_other_runs("other_run", ["654321_AB"])
@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+# coding=utf-8
+""" samplesheet_reader.py pytest unit tests
+"""
+import io
+import pytest
+from samplesheet_validator.samplesheet_validator import ValidationResult
+
+
+class TestSamplesheetReader(object):
+    """
+    Tests for reading the samplesheet of a validation
+    """
+
+    def test_read_buffer_size_limit(self, get_validator):
+        """
+        Test a buffer is read no further than needed to find it exceeds the size limit, and
+        its contents are not kept
+        """
+        result = ValidationResult(
+            get_validator(max_bytes=100),
+            io.BytesIO(b"Sample1,Sample1\n" * 100),
+            True,
+            "",
+            samplesheet_name="buffer_SampleSheet.csv",
+        )
+        result.close_logger()
+        assert result.reader.ss_size == 101
+        assert result.reader.ss_contents == []
+
+    @pytest.mark.parametrize(
+        "line, line_index, error",
+        [
+            ("Sample1,Sample1\n", 0, None),
+            ("Sample1,Sample1\n", 5, "maximum number of lines (5)"),
+            ("Sample1" * 10 + "\n", 0, "Line 0 of samplesheet is longer"),
+            (b"a,b,c,d\r\n", 0, "maximum number of columns (3)"),
+        ],
+    )
+    def test_check_line_limits(self, valid_samplesheet, get_validator, line, line_index, error):
+        """
+        Test lines (as read from file or from a memory map) are checked against the line
+        count, line length and column limits
+        """
+        result = ValidationResult(
+            get_validator(max_lines=5, max_line_length=20, max_columns=3),
+            valid_samplesheet,
+            True,
+            "",
+        )
+        result.close_logger()
+        assert result.reader.check_line_limits(line, line_index) == (error is None)
+        assert result.limit_exceeded == (error is not None)
+        if error:
+            assert error in result.errors_dict["Resource limit exceeded"][0]
+
+    def test_open_lines_memory_map(self, valid_samplesheet, get_validator):
+        """
+        Test the lines before the data section are read from the file when parsing from a
+        memory map, rather than reading the whole samplesheet into a list of lines
+        """
+        result = ValidationResult(get_validator(), valid_samplesheet, True, "", memory_map=True)
+        result.close_logger()
+        with result.reader.open_lines() as lines:
+            first_line = next(iter(lines))
+        with open(valid_samplesheet, "r") as samplesheet_stream:
+            assert first_line == samplesheet_stream.readline()
+        assert result.reader.ss_contents is None
@@ -2,12 +2,19 @@
 # coding=utf-8
 """ samplesheet_validator.py pytest unit tests
 """
+import io
+import re
+import json
+import pickle
 import itertools
 import os
+import concurrent.futures
 import argparse
 import pytest
+from samplesheet_validator import config
 from samplesheet_validator import samplesheet_validator
-from samplesheet_validator.__main__ import is_valid_dir, is_valid_file
+from samplesheet_validator.__main__ import get_arguments, is_valid_dir, is_valid_file
+from seglh_naming.sample import Sample
 
 
 # TODO add second dev pan number in
@@ -834,6 +841,35 @@ def test_is_valid_file_invalid(invalid_paths):
             assert pytest_wrapped_e.value.code == 1
 
 
+@pytest.mark.parametrize("config_key_args", [[], ["-SI", "NB551068"], ["-D", "Pan4822"]])
+def test_get_arguments_config(
+    config_key_args, valid_custompanels_samplesheet, tmp_path, monkeypatch
+):
+    """
+    Test the configuration lists cannot be supplied as arguments alongside --config, as they
+    would be ignored
+    """
+    config_path = tmp_path / "config.json"
+    config_path.write_text("{}")
+    argv = [
+        "samplesheet_validator",
+        "-S",
+        valid_custompanels_samplesheet[0],
+        "-C",
+        str(config_path),
+        "-L",
+        str(tmp_path),
+        "-R",
+        "runname",
+    ]
+    monkeypatch.setattr("sys.argv", argv + config_key_args)
+    if config_key_args:
+        with pytest.raises(SystemExit):
+            get_arguments()
+    else:
+        assert get_arguments().config == str(config_path)
+
+
 def test_is_valid_dir_valid(valid_dirs):
     """
     Test that is_valid_dir correctly determines that directory exists
@@ -988,6 +1024,88 @@ class TestSamplesheetCheck(object):
             assert "WARNING" in caplog.text
             shutdown_logs(sscheck_obj.logger)
 
+    def test_read_run_parameters(self, valid_aviti_samplesheet):
+        """
+        Test only the leading [RunParameters] section is read, and the rest of the file is
+        read from the same stream
+        """
+        for samplesheet in valid_aviti_samplesheet:
+            sscheck_obj = samplesheet_validator.SamplesheetCheck(
+                samplesheet,
+                os.getenv("sequencer_ids").split(","),
+                os.getenv("panels").split(","),
+                os.getenv("tso_panels").split(","),
+                os.getenv("okd_panels").split(","),
+                os.getenv("dev_pannos").split(","),
+                os.getenv("temp_dir"),
+                False,
+                os.getenv("runname"),
+            )
+            run_parameters = sscheck_obj.reader.read_run_parameters()
+            assert run_parameters["RunName"] == "NGS658FFV08Pool2AV"
+            assert len(sscheck_obj.reader.header_lines) == 4  # Up to and including [SETTINGS]
+            with open(samplesheet, "r") as samplesheet_stream:
+                assert sscheck_obj.reader.read_samplesheet() == samplesheet_stream.readlines()
+            assert sscheck_obj.reader.samplesheet_stream is None
+            shutdown_logs(sscheck_obj.logger)
+
+    def test_read_run_parameters_by_key(self, valid_aviti_samplesheet, tmp_path):
+        """
+        Test RunName is found by key rather than by line position
+        """
+        for samplesheet in valid_aviti_samplesheet:
+            with open(samplesheet, "r") as samplesheet_stream:
+                lines = samplesheet_stream.readlines()
+            lines.insert(2, "Operator,NGS,,\n")
+            moved_samplesheet = tmp_path / os.path.basename(samplesheet)
+            moved_samplesheet.write_text("".join(lines))
+            sscheck_obj = get_sscheck_aviti_obj(str(moved_samplesheet))
+            assert sscheck_obj.ss_runname == "NGS658FFV08Pool2AV"
+            assert "Aviti not match" not in sscheck_obj.errors_dict
+            shutdown_logs(sscheck_obj.logger)
+
+    def test_parse_aviti_samples(self, valid_aviti_samplesheet):
+        """
+        Test the Aviti [SAMPLES] section is parsed from its header line, with control lines
+        kept separately from the samples and indexed by lane
+        """
+        for samplesheet in valid_aviti_samplesheet:
+            sscheck_obj = get_sscheck_aviti_obj(samplesheet)
+            assert not sscheck_obj.errors
+            assert sscheck_obj.data_headers == ["SampleName", "Index1", "Index2", "Lane"]
+            assert [control for _, control, _ in sscheck_obj.control_rows] == ["PhiX"] * 4
+            assert "PhiX" not in sscheck_obj.samples["Sample_ID"]
+            assert len(sscheck_obj.sample_rows) == 5
+            # 4 controls and 5 samples, each in lanes 1+2
+            assert {
+                lane: len(barcodes) for lane, barcodes in sscheck_obj.lane_indexes.items()
+            } == {"1": 9, "2": 9}
+            shutdown_logs(sscheck_obj.logger)
+
+    def test_parse_aviti_samples_lanes(self, valid_aviti_samplesheet, tmp_path):
+        """
+        Test commented out sample lines and later sections are not parsed as samples, and that
+        samples sharing a barcode in different lanes do not collide
+        """
+        for samplesheet in valid_aviti_samplesheet:
+            with open(samplesheet, "r") as samplesheet_stream:
+                lines = samplesheet_stream.readlines()
+            first_sample = lines[-2].split(",")
+            last_sample = lines[-1].rstrip("\n").split(",")
+            first_sample[3] = "1\n"
+            last_sample[1:] = first_sample[1:3] + ["2\n"]
+            lines[-2:] = [",".join(first_sample), ",".join(last_sample)]
+            lines += [f"#{lines[-1]}", "[Extra],,,\n", "NotASample,AAAAAAAAAA,,\n"]
+            lanes_samplesheet = tmp_path / os.path.basename(samplesheet)
+            lanes_samplesheet.write_text("".join(lines))
+            sscheck_obj = get_sscheck_aviti_obj(str(lanes_samplesheet))
+            assert not sscheck_obj.errors
+            assert len(sscheck_obj.sample_rows) == 5
+            assert {
+                lane: len(barcodes) for lane, barcodes in sscheck_obj.lane_indexes.items()
+            } == {"1": 8, "2": 8}
+            shutdown_logs(sscheck_obj.logger)
+
     
     def test_check_aviti_sequencer_id_valid(self, valid_aviti_samplesheet, caplog):
         """
@@ -1033,6 +1151,27 @@ class TestSamplesheetCheck(object):
             assert "WARNING" in caplog.text
             shutdown_logs(sscheck_obj.logger)
 
+    @pytest.mark.parametrize("contents", ["\u00e9" * 5, "\u00e9" * 4 + "\n"])
+    def test_check_ss_contents_size_in_bytes(self, contents, tmp_path, get_validator):
+        """
+        Test the samplesheet size is in bytes, whether or not the samplesheet has already been
+        read when it is checked
+        """
+        samplesheet = tmp_path / "210917_NB551068_0409_AH3YNFAFX3_SampleSheet.csv"
+        samplesheet.write_bytes(contents.encode("utf-8"))
+        results = [
+            get_validator().validate(str(samplesheet)),
+            samplesheet_validator.ValidationResult(get_validator(), str(samplesheet), True, ""),
+        ]
+        assert results[1].reader.read_samplesheet()
+        results[1].ss_checks()
+        for result in results:
+            result.close_logger()
+        assert results[1].reader.ss_size == len(contents.encode("utf-8"))
+        assert ("File is empty" in results[0].errors_dict) == (
+            "File is empty" in results[1].errors_dict
+        )
+
     def test_get_data_section_pass(self, valid_samplesheets_with_dev, caplog):
         """ """
         for samplesheet in valid_samplesheets_with_dev:
@@ -1062,6 +1201,63 @@ class TestSamplesheetCheck(object):
             assert "Exception raised while attempting to extract" in caplog.text
             shutdown_logs(sscheck_obj.logger)
 
+    def test_get_data_section_quoted_fields(self, valid_adx_samplesheet, tmp_path, get_validator):
+        """
+        Test quoted fields (including fields containing commas) in the data section are parsed
+        by the csv reader to the same samples as the unquoted samplesheet, in both parse modes
+        """
+        for samplesheet in valid_adx_samplesheet:
+            with open(samplesheet, "r") as samplesheet_stream:
+                lines = samplesheet_stream.read().splitlines()
+            header_index = next(
+                i for i, line in enumerate(lines) if line.startswith("Sample_ID")
+            )
+            for i in range(header_index + 1, len(lines)):
+                if lines[i]:
+                    fields = lines[i].split(",")
+                    fields[:2] = [f'"{field}"' for field in fields[:2]]
+                    fields[-1] = f'"{fields[-1]}, quoted"'
+                    lines[i] = ",".join(fields)
+            quoted_samplesheet = tmp_path / os.path.basename(samplesheet)
+            quoted_samplesheet.write_text("\n".join(lines) + "\n")
+            result = get_validator().validate(samplesheet)
+            for memory_map in (False, True):
+                quoted_result = get_validator().validate(
+                    str(quoted_samplesheet), memory_map=memory_map
+                )
+                assert quoted_result.sample_rows == result.sample_rows
+                assert quoted_result.errors_dict == result.errors_dict
+                quoted_result.close_logger()
+            result.close_logger()
+
+    def test_get_data_section_column_order(self, valid_adx_samplesheet, tmp_path, get_validator):
+        """
+        Test sample and index columns are located from the data section headers, so reordered
+        columns are parsed to the same samples
+        """
+        for samplesheet in valid_adx_samplesheet:
+            with open(samplesheet, "r") as samplesheet_stream:
+                lines = samplesheet_stream.read().splitlines()
+            header_index = next(
+                i for i, line in enumerate(lines) if line.startswith("Sample_ID")
+            )
+            for i in range(header_index, len(lines)):
+                if lines[i]:
+                    fields = lines[i].split(",")
+                    lines[i] = ",".join(fields[2:] + fields[:2])
+            reordered_samplesheet = tmp_path / os.path.basename(samplesheet)
+            reordered_samplesheet.write_text("\n".join(lines) + "\n")
+            result = get_validator().validate(samplesheet)
+            for memory_map in (False, True):
+                reordered_result = get_validator().validate(
+                    str(reordered_samplesheet), memory_map=memory_map
+                )
+                assert reordered_result.sample_rows == result.sample_rows
+                assert reordered_result.sample_indexes == result.sample_indexes
+                assert not reordered_result.errors
+                reordered_result.close_logger()
+            result.close_logger()
+
     def test_check_expected_headers_valid(self, valid_samplesheets_with_dev, caplog):
         """
         Test function is able to correctly identify that samplesheet headers are valid
@@ -1108,6 +1304,63 @@ class TestSamplesheetCheck(object):
                 in caplog.text
             )
             assert "WARNING" in caplog.text
+            assert "All sample names and sample IDS match" not in caplog.text
+            shutdown_logs(sscheck_obj.logger)
+
+    def test_comp_samplenameid_line_numbers(self, non_matching_samplenames):
+        """
+        Test each mismatching line is reported with its line number and both values
+        """
+        for samplesheet in non_matching_samplenames:
+            sscheck_obj = get_sscheck_obj(samplesheet)
+            assert sscheck_obj.errors_dict["Sample names do not match"] == [
+                "The following Sample IDs do not match the corresponding Sample Name: "
+                "(line 25: Sample_ID NGS544_02_123456_AB_F_R39IKBKGVia_Pan5016, "
+                "Sample_Name NGS544_02_123456_AB_F_R239IKBKGVia_Pan5016)"
+            ]
+            shutdown_logs(sscheck_obj.logger)
+
+    def test_comp_samplenameid_parse(self, non_matching_samplenames, get_validator):
+        """
+        Test mismatching lines are found as the data section is parsed, before the sample
+        level checks run
+        """
+        for samplesheet in non_matching_samplenames:
+            result = samplesheet_validator.ValidationResult(get_validator(), samplesheet, True, "")
+            result.reader.read_samplesheet()
+            result.get_data_section()
+            assert result.mismatched_samples == {
+                25: (
+                    "NGS544_02_123456_AB_F_R39IKBKGVia_Pan5016",
+                    "NGS544_02_123456_AB_F_R239IKBKGVia_Pan5016",
+                )
+            }
+            assert "Sample names do not match" not in result.errors_dict
+            result.close_logger()
+
+    def test_comp_samplenameid_swapped(self, valid_adx_samplesheet, tmp_path):
+        """
+        Test swapped sample names, which hold the same set of names as the sample IDs, are
+        reported for both lines
+        """
+        for samplesheet in valid_adx_samplesheet:
+            with open(samplesheet, "r") as samplesheet_stream:
+                lines = samplesheet_stream.readlines()
+            header_index = next(
+                i for i, line in enumerate(lines) if line.startswith("Sample_ID")
+            )
+            first_sample = lines[header_index + 1].split(",")
+            second_sample = lines[header_index + 2].split(",")
+            first_sample[1], second_sample[1] = second_sample[1], first_sample[1]
+            lines[header_index + 1] = ",".join(first_sample)
+            lines[header_index + 2] = ",".join(second_sample)
+            swapped_samplesheet = tmp_path / os.path.basename(samplesheet)
+            swapped_samplesheet.write_text("".join(lines))
+            sscheck_obj = get_sscheck_obj(str(swapped_samplesheet))
+            messages = sscheck_obj.errors_dict["Sample names do not match"]
+            assert len(messages) == 2
+            assert f"(line {header_index + 1}:" in messages[0]
+            assert f"(line {header_index + 2}:" in messages[1]
             shutdown_logs(sscheck_obj.logger)
 
     def test_check_illegal_chars_valid(self, valid_samplesheets_with_dev, caplog):
@@ -1156,6 +1409,213 @@ class TestSamplesheetCheck(object):
             assert "WARNING" in caplog.text
             shutdown_logs(sscheck_obj.logger)
 
+    def test_check_sample_prefilter_valid(
+        self, valid_samplesheets_with_dev, valid_aviti_samplesheet
+    ):
+        """
+        Test the structural prefilter passes all valid sample names to the parser
+        """
+        for samplesheet in valid_samplesheets_with_dev:
+            sscheck_obj = get_sscheck_obj(samplesheet)
+            prefilter = sscheck_obj.validator.sample_name_prefilter
+            assert all(
+                prefilter.match(sample)
+                for sample in sscheck_obj.samples["Sample_ID"] + sscheck_obj.samples["Sample_Name"]
+            )
+            shutdown_logs(sscheck_obj.logger)
+        for samplesheet in valid_aviti_samplesheet:
+            sscheck_obj = get_sscheck_aviti_obj(samplesheet)
+            prefilter = sscheck_obj.validator.sample_name_prefilter
+            assert all(prefilter.match(sample) for sample in sscheck_obj.samples["Sample_ID"])
+            shutdown_logs(sscheck_obj.logger)
+
+    def test_check_sample_prefilter_invalid(
+        self, valid_samplesheet, tmp_path, get_validator, write_samplesheet
+    ):
+        """
+        Test sample names without the seglh-naming structure (exported without the Pan number
+        field) do not match the prefilter, and are reported with the parser's exception, as
+        without the prefilter
+        """
+        samplesheet = write_samplesheet(
+            valid_samplesheet, str(tmp_path), lambda contents: contents.replace("_Pan4822", "")
+        )
+        no_prefilter = get_validator()
+        object.__setattr__(no_prefilter, "sample_name_prefilter", re.compile(""))
+        result = get_validator().validate(samplesheet)
+        no_prefilter_result = no_prefilter.validate(samplesheet)
+        for validation_result in (result, no_prefilter_result):
+            validation_result.close_logger()
+        assert not all(
+            result.validator.sample_name_prefilter.match(sample)
+            for sample in result.samples["Sample_Name"]
+        )
+        assert "Sample name invalid" in result.errors_dict
+        assert result.errors_dict == no_prefilter_result.errors_dict
+
+    def test_sample_prefilter_accepts_parsed_names(self):
+        """
+        Test every sample name in the test samplesheets that seglh-naming parses also matches
+        the prefilter, so the prefilter never changes the outcome of the sample name check
+        """
+        prefilter = re.compile(config.SAMPLE_NAME_PREFILTER)
+        parsed_names = 0
+        for samplesheet_dir in (
+            os.path.join(os.getenv("samplesheet_dir"), "valid"),
+            os.path.join(os.getenv("samplesheet_dir"), "invalid"),
+        ):
+            for samplesheet in os.listdir(samplesheet_dir):
+                with open(
+                    os.path.join(samplesheet_dir, samplesheet), "r", errors="replace"
+                ) as samplesheet_stream:
+                    lines = samplesheet_stream.read().splitlines()
+                data_lines = itertools.dropwhile(
+                    lambda line: not line.startswith(("[Data]", "[SAMPLES]")), lines
+                )
+                for line in itertools.islice(data_lines, 2, None):
+                    for sample in line.split(",")[:2]:
+                        try:
+                            Sample.from_string(sample)
+                        except Exception:
+                            continue
+                        parsed_names += 1
+                        assert prefilter.match(sample), sample
+        assert parsed_names
+
+    def test_check_index_collisions_valid(self, valid_samplesheets_no_dev, caplog):
+        """
+        Test function identifies no index collisions in valid samplesheets
+        """
+        for samplesheet in valid_samplesheets_no_dev:
+            sscheck_obj = get_sscheck_obj(samplesheet)
+            assert sscheck_obj.sample_indexes
+            assert "Index collision" not in sscheck_obj.errors_dict
+            assert "No index collisions identified" in caplog.text
+            shutdown_logs(sscheck_obj.logger)
+
+    def test_check_index_collisions_invalid(self, valid_adx_samplesheet, tmp_path, caplog):
+        """
+        Test function identifies samples sharing a barcode, attributing the collision to
+        their lines
+        """
+        for samplesheet in valid_adx_samplesheet:
+            with open(samplesheet, "r") as samplesheet_stream:
+                lines = samplesheet_stream.readlines()
+            header_index = next(
+                i for i, line in enumerate(lines) if line.startswith("Sample_ID")
+            )
+            # Give the last sample the indexes of the first sample, with one base changed
+            first_sample = lines[header_index + 1].split(",")
+            last_sample = lines[-1].split(",")
+            last_sample[5] = first_sample[5]
+            last_sample[7] = first_sample[7][:-1] + (
+                "C" if first_sample[7].endswith("A") else "A"
+            )
+            lines[-1] = ",".join(last_sample)
+            collision_samplesheet = tmp_path / os.path.basename(samplesheet)
+            collision_samplesheet.write_text("".join(lines))
+            sscheck_obj = get_sscheck_obj(str(collision_samplesheet))
+            assert sscheck_obj.errors
+            assert len(sscheck_obj.errors_dict["Index collision"]) == 1
+            assert (
+                f"lines {header_index + 1} and {len(lines) - 1}"
+                in sscheck_obj.errors_dict["Index collision"][0]
+            )
+            assert "differ at 1 position(s)" in caplog.text
+            shutdown_logs(sscheck_obj.logger)
+
+    def test_check_index_collisions_invalid_index(self, valid_adx_samplesheet, tmp_path, caplog):
+        """
+        Test function reports indexes containing characters other than ACGTN, rather than
+        comparing them
+        """
+        for samplesheet in valid_adx_samplesheet:
+            with open(samplesheet, "r") as samplesheet_stream:
+                lines = samplesheet_stream.readlines()
+            last_sample = lines[-1].split(",")
+            last_sample[5] = last_sample[5][:-1] + "1"
+            lines[-1] = ",".join(last_sample)
+            invalid_samplesheet = tmp_path / os.path.basename(samplesheet)
+            invalid_samplesheet.write_text("".join(lines))
+            sscheck_obj = get_sscheck_obj(str(invalid_samplesheet))
+            assert sscheck_obj.errors
+            assert len(sscheck_obj.errors_dict["Index invalid"]) == 1
+            assert f"line {len(lines) - 1}:" in sscheck_obj.errors_dict["Index invalid"][0]
+            assert "Index collision" not in sscheck_obj.errors_dict
+            shutdown_logs(sscheck_obj.logger)
+
+    def test_check_duplicates_valid(self, valid_samplesheets_no_dev, caplog):
+        """
+        Test function identifies no duplicates in valid samplesheets
+        """
+        for samplesheet in valid_samplesheets_no_dev:
+            sscheck_obj = get_sscheck_obj(samplesheet)
+            assert "Duplicate samples" not in sscheck_obj.errors_dict
+            assert "Duplicate indexes" not in sscheck_obj.errors_dict
+            assert "No duplicate sample IDs" in caplog.text
+            shutdown_logs(sscheck_obj.logger)
+
+    def test_check_duplicates_invalid(self, valid_adx_samplesheet, tmp_path):
+        """
+        Test function reports a duplicated sample line with the line numbers of both copies,
+        and does not also report its indexes as an index collision
+        """
+        for samplesheet in valid_adx_samplesheet:
+            with open(samplesheet, "r") as samplesheet_stream:
+                lines = samplesheet_stream.read().splitlines(keepends=True)
+            header_index = next(
+                i for i, line in enumerate(lines) if line.startswith("Sample_ID")
+            )
+            if not lines[-1].endswith("\n"):
+                lines[-1] += "\n"
+            lines.append(lines[header_index + 1])  # Duplicate the first sample line
+            duplicate_samplesheet = tmp_path / os.path.basename(samplesheet)
+            duplicate_samplesheet.write_text("".join(lines))
+            sscheck_obj = get_sscheck_obj(str(duplicate_samplesheet))
+            line_numbers = f"on lines {header_index + 1}, {len(lines) - 1}"
+            assert sscheck_obj.errors
+            assert len(sscheck_obj.errors_dict["Duplicate samples"]) == 2
+            assert all(
+                line_numbers in message
+                for message in sscheck_obj.errors_dict["Duplicate samples"]
+                + sscheck_obj.errors_dict["Duplicate indexes"]
+            )
+            assert "Index collision" not in sscheck_obj.errors_dict
+            shutdown_logs(sscheck_obj.logger)
+
+    @pytest.mark.parametrize("copy_lane, duplicate_lanes", [("2", None), ("1+2", "1")])
+    def test_check_duplicates_lanes(self, tmp_path, copy_lane, duplicate_lanes):
+        """
+        Test a sample listed in more than one lane is only reported as a duplicate if it is
+        listed twice in the same lane
+        """
+        samplesheet_name = "210917_NB551068_0409_AH3YNFAFX3_SampleSheet.csv"
+        with open(
+            os.path.join(os.getenv("samplesheet_dir"), "valid", samplesheet_name), "r"
+        ) as samplesheet_stream:
+            lines = samplesheet_stream.read().splitlines()
+        header_index = next(i for i, line in enumerate(lines) if line.startswith("Sample_ID"))
+        lines[header_index] += ",Lane"
+        for i in range(header_index + 1, len(lines)):
+            if lines[i].strip(","):
+                lines[i] += ",1"
+        lines.append(lines[header_index + 1][: -len("1")] + copy_lane)
+        laned_samplesheet = tmp_path / samplesheet_name
+        laned_samplesheet.write_text("\n".join(lines) + "\n")
+        sscheck_obj = get_sscheck_obj(str(laned_samplesheet))
+        shutdown_logs(sscheck_obj.logger)
+        assert "Duplicate indexes" not in sscheck_obj.errors_dict
+        if duplicate_lanes:
+            messages = sscheck_obj.errors_dict["Duplicate samples"]
+            assert len(messages) == 2
+            assert all(
+                f"on lines {header_index + 1}, {len(lines) - 1} in lanes {duplicate_lanes}"
+                in message
+                for message in messages
+            )
+        else:
+            assert "Duplicate samples" not in sscheck_obj.errors_dict
+
     def test_check_pannos_valid(self, valid_samplesheets_with_dev, caplog):
         """
         Test function is able to correctly identify that panel numbers are valid
@@ -1178,6 +1638,43 @@ class TestSamplesheetCheck(object):
             assert "WARNING" in caplog.text
             shutdown_logs(sscheck_obj.logger)
 
+    def test_check_samples_distinct(self, valid_samplesheets_no_dev, valid_aviti_samplesheet):
+        """
+        Test each distinct sample string is only checked once, and each pan number is only
+        recorded once
+        """
+        for samplesheet in valid_samplesheets_no_dev:
+            sscheck_obj = get_sscheck_obj(samplesheet)
+            distinct_samples = set(
+                sscheck_obj.samples["Sample_ID"] + sscheck_obj.samples["Sample_Name"]
+            )
+            assert set(sscheck_obj.sample_objs) == distinct_samples
+            assert len(sscheck_obj.pannumbers) == len(set(sscheck_obj.pannumbers))
+            shutdown_logs(sscheck_obj.logger)
+        for samplesheet in valid_aviti_samplesheet:
+            sscheck_obj = get_sscheck_aviti_obj(samplesheet)
+            assert len(sscheck_obj.sample_objs) == len(set(sscheck_obj.samples["Sample_ID"]))
+            shutdown_logs(sscheck_obj.logger)
+
+    def test_check_samples_errors_attributed(self, invalid_panel_number):
+        """
+        Test errors for a sample string are attributed to every column and line holding it
+        """
+        for samplesheet in invalid_panel_number:
+            sscheck_obj = get_sscheck_obj(samplesheet)
+            messages = sscheck_obj.errors_dict["Pan number invalid"]
+            for line_index, sample_row in sscheck_obj.sample_rows:
+                for column, sample in sample_row.items():
+                    sample_obj = sscheck_obj.sample_objs[sample]
+                    if isinstance(sample_obj, Exception):
+                        continue
+                    if sample_obj.panelnumber not in sscheck_obj.panels:
+                        assert any(
+                            f"({column}, line {line_index}: {sample})" in message
+                            for message in messages
+                        )
+            shutdown_logs(sscheck_obj.logger)
+
     def test_check_tso_true(self, valid_tso_samplesheet, caplog):
         """
         Test function is able to correctly identify that samples are TSO
@@ -1257,3 +1754,528 @@ class TestSamplesheetCheck(object):
             assert all(msg in caplog.text for msg in msgs)
             assert "WARNING" in caplog.text
             shutdown_logs(sscheck_obj.logger)
+
+
+class TestValidator(object):
+    """
+    Tests for the Validator class
+    """
+
+    def test_validator_immutable(self, get_validator):
+        """
+        Test Validator configuration cannot be modified after construction
+        """
+        validator = get_validator()
+        with pytest.raises(AttributeError):
+            validator.panels = frozenset()
+        with pytest.raises(AttributeError):
+            validator.new_attribute = True
+
+    def test_validate_options_keyword_only(self, valid_custompanels_samplesheet, get_validator):
+        """
+        Test options after the run name cannot be passed by position, so they cannot be passed
+        to the wrong parameter
+        """
+        validator = get_validator()
+        with pytest.raises(TypeError):
+            validator.validate(valid_custompanels_samplesheet[0], True, "", None, True)
+        with pytest.raises(TypeError):
+            validator.stream(valid_custompanels_samplesheet[0], True, "", True)
+
+    def test_validate_returns_fresh_result(
+        self, valid_custompanels_samplesheet, samplesheets_multiple_errors, get_validator
+    ):
+        """
+        Test each validation returns its own result, and results do not share state
+        """
+        validator = get_validator()
+        valid_result = validator.validate(valid_custompanels_samplesheet[0])
+        invalid_result = validator.validate(samplesheets_multiple_errors[0])
+        assert not valid_result.errors
+        assert not valid_result.errors_dict
+        assert invalid_result.errors
+        assert valid_result.samples is not invalid_result.samples
+        assert valid_result.validator is invalid_result.validator
+        shutdown_logs(valid_result.logger)
+        shutdown_logs(invalid_result.logger)
+
+    def test_validate_same_run_logging(
+        self, valid_custompanels_samplesheet, tmp_path, caplog, get_validator
+    ):
+        """
+        Test validations of the same run open at the same time each log through their own
+        logger, so records are written to the logfile once, and that queued records reach the
+        root logger handlers through the queue listener rather than by propagation
+        """
+        validator = get_validator(logdir=str(tmp_path))
+        results = [
+            validator.validate(valid_custompanels_samplesheet[0], queue_logging=True)
+            for _ in range(2)
+        ]
+        assert results[0].logger is not results[1].logger
+        assert not any(result.logger.propagate for result in results)
+        for result in results:
+            result.close_logger()
+        with open(results[0].logfile_path, "r") as logfile:
+            logfile_text = logfile.read()
+        assert logfile_text.count("Samplesheet passed all checks") == 2
+        assert caplog.text.count("Samplesheet passed all checks") == 2
+
+    def test_validate_buffer(self, valid_samplesheets_no_dev, get_validator):
+        """
+        Test samplesheets supplied as file objects give the same outcome as paths
+        """
+        validator = get_validator()
+        for samplesheet in valid_samplesheets_no_dev:
+            with open(samplesheet, "rb") as samplesheet_stream:
+                result = validator.validate(
+                    io.BytesIO(samplesheet_stream.read()),
+                    samplesheet_name=os.path.basename(samplesheet),
+                )
+            assert not result.errors
+            shutdown_logs(result.logger)
+
+    def test_validate_buffer_no_name(self, get_validator):
+        """
+        Test a buffer without a samplesheet name raises an error
+        """
+        with pytest.raises(ValueError):
+            get_validator().validate(io.StringIO("[Data]\n"))
+
+    def test_validate_memory_map(
+        self, valid_samplesheets_no_dev, ss_with_disallowed_sserrs, get_validator
+    ):
+        """
+        Test parsing samplesheets from a memory map gives the same outcomes as parsing them
+        as lists of lines
+        """
+        validator = get_validator()
+        for samplesheet in valid_samplesheets_no_dev + ss_with_disallowed_sserrs:
+            result = validator.validate(samplesheet)
+            mapped_result = validator.validate(samplesheet, memory_map=True)
+            assert mapped_result.errors == result.errors
+            assert mapped_result.errors_dict.keys() == result.errors_dict.keys()
+            assert mapped_result.data_headers == result.data_headers
+            assert mapped_result.sample_rows == result.sample_rows
+            assert mapped_result.sample_indexes == result.sample_indexes
+            shutdown_logs(result.logger)
+
+    def test_validate_memory_map_aviti(self, valid_aviti_samplesheet, get_validator):
+        """
+        Test parsing Aviti samplesheets from a memory map gives the same outcomes as parsing
+        them as lists of lines
+        """
+        validator = get_validator()
+        for samplesheet in valid_aviti_samplesheet:
+            result = validator.validate(samplesheet, False, os.getenv("runname"))
+            mapped_result = validator.validate(
+                samplesheet, False, os.getenv("runname"), memory_map=True
+            )
+            assert mapped_result.ss_runname == result.ss_runname
+            assert mapped_result.errors_dict.keys() == result.errors_dict.keys()
+            assert mapped_result.sample_rows == result.sample_rows
+            shutdown_logs(result.logger)
+
+    def test_validate_memory_map_crlf(self, valid_adx_samplesheet, tmp_path, get_validator):
+        """
+        Test line endings are normalised when parsing from a memory map
+        """
+        validator = get_validator()
+        for samplesheet in valid_adx_samplesheet:
+            with open(samplesheet, "r") as samplesheet_stream:
+                contents = samplesheet_stream.read()
+            crlf_samplesheet = tmp_path / os.path.basename(samplesheet)
+            crlf_samplesheet.write_bytes(contents.replace("\n", "\r\n").encode())
+            result = validator.validate(samplesheet)
+            mapped_result = validator.validate(str(crlf_samplesheet), memory_map=True)
+            assert not mapped_result.errors
+            assert mapped_result.sample_rows == result.sample_rows
+            shutdown_logs(result.logger)
+
+    def test_iter_sample_verdicts(
+        self, samplesheets_multiple_errors, valid_aviti_samplesheet, get_validator
+    ):
+        """
+        Test a verdict is yielded for each sample row in file order, holding the errors raised
+        for that row, and that the verdicts account for every sample level error in errors_dict
+        """
+        sample_level_errors = [
+            "Sample names do not match",
+            "Illegal characters",
+            "Sample name invalid",
+            "Pan number invalid",
+        ]
+        for samplesheet, illumina in [(samplesheets_multiple_errors[0], True)] + [
+            (samplesheet, False) for samplesheet in valid_aviti_samplesheet
+        ]:
+            result = samplesheet_validator.ValidationResult(
+                get_validator(), samplesheet, illumina, os.path.basename(samplesheet)
+            )
+            verdicts = []
+            for verdict in result.iter_sample_verdicts():
+                verdicts.append(verdict)
+                # Rows are validated as the verdicts are consumed
+                assert result.row_errors is None
+                assert len(result.sample_objs) <= len(verdicts) * 2
+            assert [verdict["line_index"] for verdict in verdicts] == [
+                line_index for line_index, _ in result.sample_rows
+            ]
+            assert [verdict["columns"] for verdict in verdicts] == [
+                sample_row for _, sample_row in result.sample_rows
+            ]
+            for error_type in sample_level_errors:
+                assert [
+                    message
+                    for verdict in verdicts
+                    for message in verdict["errors"].get(error_type, [])
+                ] == result.errors_dict.get(error_type, [])
+            assert all(
+                verdict["pannumber"] in result.pannumbers
+                for verdict in verdicts
+                if verdict["pannumber"]
+            )
+            if illumina:
+                assert any(verdict["errors"] for verdict in verdicts)
+            shutdown_logs(result.logger)
+
+    def test_iter_sample_verdicts_matches_ss_checks(self, ss_with_disallowed_sserrs, get_validator):
+        """
+        Test consuming the verdicts gives the same outcome as ss_checks()
+        """
+        for samplesheet in ss_with_disallowed_sserrs:
+            result = get_validator().validate(samplesheet)
+            streamed_result = samplesheet_validator.ValidationResult(
+                get_validator(), samplesheet, True, ""
+            )
+            verdicts = list(streamed_result.iter_sample_verdicts())
+            assert len(verdicts) == len(streamed_result.sample_rows)
+            assert streamed_result.errors == result.errors
+            assert streamed_result.errors_dict == result.errors_dict
+            shutdown_logs(result.logger)
+            shutdown_logs(streamed_result.logger)
+
+    def test_validate_incremental(
+        self, samplesheets_multiple_errors, tmp_path, get_validator, write_samplesheet
+    ):
+        """
+        Test incremental re-validation reuses the cached verdicts of unchanged rows, only
+        re-validates edited rows, and gives the same outcome as a full validation
+        """
+        validator = get_validator(logdir=str(tmp_path))
+        samplesheet = tmp_path / os.path.basename(samplesheets_multiple_errors[0])
+        write_samplesheet(samplesheets_multiple_errors[0], str(tmp_path))
+        first_result = validator.validate(str(samplesheet), incremental=True)
+        assert first_result.verdict_cache.reused_verdicts == 0
+        assert os.path.isfile(first_result.verdict_cache.cache_path)
+        repeat_result = validator.validate(str(samplesheet), incremental=True)
+        assert repeat_result.verdict_cache.reused_verdicts == len(repeat_result.sample_rows)
+        assert repeat_result.errors_dict == first_result.errors_dict
+        assert repeat_result.pannumbers == first_result.pannumbers
+        # Edit the sample names of one row
+        lines = samplesheet.read_text().splitlines(keepends=True)
+        line_index, sample_row = repeat_result.sample_rows[0]
+        lines[line_index] = lines[line_index].replace(
+            sample_row["Sample_ID"], f"{sample_row['Sample_ID']}X"
+        )
+        samplesheet.write_text("".join(lines))
+        edited_result = validator.validate(str(samplesheet), incremental=True)
+        full_result = validator.validate(str(samplesheet))
+        assert edited_result.verdict_cache.reused_verdicts == len(edited_result.sample_rows) - 1
+        assert edited_result.errors_dict == full_result.errors_dict
+        assert edited_result.pannumbers == full_result.pannumbers
+        # Verdicts made with a different configuration are not reused
+        changed_validator = get_validator(os.getenv("panels").split(",")[1:], str(tmp_path))
+        assert changed_validator.config_digest != validator.config_digest
+        changed_result = changed_validator.validate(str(samplesheet), incremental=True)
+        assert changed_result.verdict_cache.reused_verdicts == 0
+        for result in (first_result, repeat_result, edited_result, full_result, changed_result):
+            result.close_logger()
+
+    def test_validate_incremental_moved_rows(
+        self,
+        samplesheets_multiple_errors,
+        non_matching_samplenames,
+        tmp_path,
+        caplog,
+        get_validator,
+        write_samplesheet,
+    ):
+        """
+        Test rows moved by removing another row keep their cached verdicts, reported with their
+        new line numbers, and that reused verdicts of mismatching sample names are reported as
+        mismatches
+        """
+        validator = get_validator()
+        for source_samplesheet in samplesheets_multiple_errors + non_matching_samplenames:
+            samplesheet = tmp_path / os.path.basename(source_samplesheet)
+            write_samplesheet(source_samplesheet, str(tmp_path))
+            first_result = validator.validate(str(samplesheet), incremental=True)
+            # Remove the first sample row, moving every later row up a line
+            lines = samplesheet.read_text().splitlines(keepends=True)
+            del lines[first_result.sample_rows[0][0]]
+            samplesheet.write_text("".join(lines))
+            caplog.clear()
+            moved_result = validator.validate(str(samplesheet), incremental=True)
+            moved_log = caplog.text
+            full_result = validator.validate(str(samplesheet))
+            assert moved_result.verdict_cache.reused_verdicts == len(moved_result.sample_rows)
+            assert moved_result.errors_dict == full_result.errors_dict
+            assert moved_result.mismatched_samples == full_result.mismatched_samples
+            if full_result.mismatched_samples:
+                assert "All sample names and sample IDS match" not in moved_log
+            for result in (first_result, moved_result, full_result):
+                result.close_logger()
+            os.remove(first_result.verdict_cache.cache_path)
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+    def test_stream(
+        self,
+        chunk_size,
+        valid_samplesheets_with_dev,
+        samplesheets_multiple_errors,
+        samplesheets_fail_parsing, get_validator,
+    ):
+        """
+        Test samplesheets fed in chunks (split part way through lines) give the same outcomes
+        as validating the complete samplesheet, including development runs and samplesheets
+        without a data section
+        """
+        validator = get_validator()
+        for samplesheet in (
+            valid_samplesheets_with_dev + samplesheets_multiple_errors + samplesheets_fail_parsing
+        ):
+            result = validator.validate(samplesheet)
+            streamed_result = validator.stream(samplesheet)
+            with open(samplesheet, "rb") as samplesheet_stream:
+                for chunk in iter(lambda: samplesheet_stream.read(chunk_size), b""):
+                    streamed_result.feed(chunk)
+            assert streamed_result.close() is streamed_result
+            assert streamed_result.errors == result.errors
+            assert streamed_result.errors_dict == result.errors_dict
+            assert streamed_result.sample_rows == result.sample_rows
+            assert streamed_result.pannumbers == result.pannumbers
+            assert getattr(streamed_result, "dev_run", False) == getattr(result, "dev_run", False)
+            shutdown_logs(result.logger)
+            shutdown_logs(streamed_result.logger)
+
+    def test_stream_aviti_crlf(self, valid_aviti_samplesheet, tmp_path, get_validator):
+        """
+        Test Aviti samplesheets with Windows line endings fed in chunks give the same outcomes
+        as validating the complete samplesheet
+        """
+        validator = get_validator()
+        for samplesheet in valid_aviti_samplesheet:
+            with open(samplesheet, "r") as samplesheet_stream:
+                contents = samplesheet_stream.read().replace("\n", "\r\n").encode()
+            crlf_samplesheet = tmp_path / os.path.basename(samplesheet)
+            crlf_samplesheet.write_bytes(contents)
+            result = validator.validate(str(crlf_samplesheet), False, os.getenv("runname"))
+            streamed_result = validator.stream(
+                str(crlf_samplesheet), False, os.getenv("runname")
+            )
+            for start in range(0, len(contents), 5):  # Splits \r\n pairs between chunks
+                streamed_result.feed(contents[start : start + 5])
+            streamed_result.close()
+            assert streamed_result.ss_runname == result.ss_runname
+            assert streamed_result.errors_dict == result.errors_dict
+            assert streamed_result.sample_rows == result.sample_rows
+            assert streamed_result.control_rows == result.control_rows
+            shutdown_logs(result.logger)
+            shutdown_logs(streamed_result.logger)
+
+    def test_stream_progressive(self, samplesheets_multiple_errors, get_validator):
+        """
+        Test the samplesheet checks run once the preamble has been fed, and each sample row is
+        validated as soon as its line is complete
+        """
+        samplesheet = samplesheets_multiple_errors[0]
+        with open(samplesheet, "r") as samplesheet_stream:
+            lines = samplesheet_stream.read().splitlines(keepends=True)
+        if not lines[-1].endswith("\n"):
+            lines[-1] += "\n"
+        streamed_result = get_validator().stream(samplesheet)
+        header_index = next(i for i, line in enumerate(lines) if line.startswith("[Data]"))
+        assert streamed_result.feed("".join(lines[:header_index])) == []
+        assert "Sequencer ID invalid" not in streamed_result.errors_dict
+        streamed_result.feed(lines[header_index])
+        assert "Sequencer ID invalid" in streamed_result.errors_dict
+        verdicts = streamed_result.feed("".join(lines[header_index + 1 :]) + "incomplete,line")
+        assert [verdict["line_index"] for verdict in verdicts] == [
+            line_index for line_index, _ in streamed_result.sample_rows
+        ]
+        assert any(verdict["errors"] for verdict in verdicts)
+        assert streamed_result.partial_line == "incomplete,line"
+        streamed_result.close()
+        with pytest.raises(ValueError):
+            streamed_result.feed(b"")
+        shutdown_logs(streamed_result.logger)
+
+    @pytest.mark.parametrize(
+        "limit, log_msg, pathological_input",
+        [
+            # Over a megabyte of a single character, appended to the samplesheet
+            ("max_bytes", "max_bytes_exceeded", lambda contents: contents + "A" * 2**20),
+            # A hundred thousand empty lines
+            ("max_lines", "max_lines_exceeded", lambda contents: contents + "\n" * 100000),
+            # A megabyte line without a line ending
+            ("max_line_length", "max_line_length_exceeded", lambda contents: contents + "A" * 2**20),
+            # A line of ten thousand empty columns
+            ("max_columns", "max_columns_exceeded", lambda contents: contents + "," * 10000 + "\n"),
+        ],
+    )
+    def test_resource_limits(
+        self,
+        valid_custompanels_samplesheet,
+        tmp_path,
+        limit,
+        log_msg,
+        pathological_input,
+        get_validator,
+    ):
+        """
+        Test a samplesheet exceeding each resource limit is rejected, whether validated from a
+        file, a memory map, a buffer or a stream, and that reading stops at the exceeded limit
+        """
+        samplesheet = valid_custompanels_samplesheet[0]
+        with open(samplesheet, "r") as samplesheet_stream:
+            contents = samplesheet_stream.read()
+        if not contents.endswith("\n"):
+            contents += "\n"
+        lines = contents.splitlines(keepends=True)
+        # Limit just above the size of the valid samplesheet
+        limits = {
+            "max_bytes": len(contents.encode()) + 100,
+            "max_lines": len(lines) + 10,
+            "max_line_length": max(len(line) for line in lines) + 10,
+            "max_columns": max(line.count(",") for line in lines) + 2,
+        }
+        validator = get_validator(**{limit: limits[limit]})
+        valid_result = validator.validate(samplesheet)
+        assert "Resource limit exceeded" not in valid_result.errors_dict
+        shutdown_logs(valid_result.logger)
+        pathological_path = tmp_path / os.path.basename(samplesheet)
+        pathological_path.write_text(pathological_input(contents))
+        limit_msg = samplesheet_validator.config.LOG_MSGS[log_msg].split("%s")[-2]
+        with open(pathological_path, "rb") as samplesheet_stream:
+            buffer = samplesheet_stream.read()
+        stream_result = validator.stream(str(pathological_path))
+        for start in range(0, len(buffer), 4096):
+            stream_result.feed(buffer[start : start + 4096])
+        results = [
+            validator.validate(str(pathological_path)),
+            validator.validate(str(pathological_path), memory_map=True),
+            validator.validate(io.BytesIO(buffer), samplesheet_name=str(pathological_path)),
+            stream_result.close(),
+        ]
+        for result in results:
+            assert result.errors
+            assert result.limit_exceeded
+            assert len(result.errors_dict["Resource limit exceeded"]) == 1
+            assert limit_msg in result.errors_dict["Resource limit exceeded"][0]
+            assert str(getattr(validator, limit)) in result.errors_dict["Resource limit exceeded"][0]
+            # The pathological input is not held in memory
+            assert sum(map(len, result.reader.ss_contents or [])) < len(contents) + 1000
+            shutdown_logs(result.logger)
+
+    @pytest.mark.parametrize(
+        "encode",
+        [
+            # Excel export, with a byte order mark and Windows line endings
+            lambda contents: contents.replace("\n", "\r\n").encode("utf-8-sig"),
+            # Windows LIMS export, with a Latin-1 character in the header section
+            lambda contents: contents.replace("\n", ",£\r\n", 1).encode("latin-1"),
+        ],
+    )
+    def test_encodings(self, valid_custompanels_samplesheet, tmp_path, encode, get_validator):
+        """
+        Test samplesheets with byte order marks, Windows line endings and Latin-1 characters
+        are parsed as the original, whether validated from a file, a memory map, a buffer or a
+        stream
+        """
+        samplesheet = valid_custompanels_samplesheet[0]
+        with open(samplesheet, "r") as samplesheet_stream:
+            contents = samplesheet_stream.read()
+        expected_result = get_validator().validate(samplesheet)
+        shutdown_logs(expected_result.logger)
+        encoded_path = tmp_path / os.path.basename(samplesheet)
+        encoded_path.write_bytes(encode(contents))
+        buffer = encoded_path.read_bytes()
+        stream_result = get_validator().stream(str(encoded_path))
+        for start in range(0, len(buffer), 7):  # Chunks split line endings and characters
+            stream_result.feed(buffer[start : start + 7])
+        results = [
+            get_validator().validate(str(encoded_path)),
+            get_validator().validate(str(encoded_path), memory_map=True),
+            get_validator().validate(io.BytesIO(buffer), samplesheet_name=str(encoded_path)),
+            stream_result.close(),
+        ]
+        for result in results:
+            assert result.errors_dict == expected_result.errors_dict
+            assert result.sample_rows == expected_result.sample_rows
+            assert result.data_headers == expected_result.data_headers
+            for line in result.reader.ss_contents or []:
+                assert "\r" not in line and "\ufeff" not in line
+            if result.reader.ss_contents and b"\xa3" in buffer:
+                assert result.reader.ss_contents[0].endswith(",£\n")
+            shutdown_logs(result.logger)
+
+    def test_validate_thread_pool(
+        self, valid_samplesheets_no_dev, ss_with_disallowed_sserrs, get_validator
+    ):
+        """
+        Test a single Validator shared across a thread pool gives the same outcomes as
+        SamplesheetCheck
+        """
+        validator = get_validator()
+        samplesheets = valid_samplesheets_no_dev + ss_with_disallowed_sserrs
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(validator.validate, samplesheets))
+        for samplesheet, result in zip(samplesheets, results):
+            sscheck_obj = get_sscheck_obj(samplesheet)
+            assert result.errors == sscheck_obj.errors
+            assert result.errors_dict.keys() == sscheck_obj.errors_dict.keys()
+            shutdown_logs(sscheck_obj.logger)
+            shutdown_logs(result.logger)
+
+    def test_from_config_file(self, valid_samplesheets_no_dev, get_validator):
+        """
+        Test a Validator built from a JSON configuration file matches one built from lists
+        """
+        config_path = os.path.join(os.getenv("temp_dir"), "validator_config.json")
+        # Lists may be given as JSON lists or as comma separated strings
+        validator_config = {
+            key: os.getenv(key)
+            for key in ["sequencer_ids", "panels", "tso_panels", "okd_panels"]
+        }
+        validator_config["dev_pannos"] = os.getenv("dev_pannos").split(",")
+        with open(config_path, "w") as config_file:
+            json.dump(validator_config, config_file)
+        validator = samplesheet_validator.Validator.from_config_file(
+            config_path, os.getenv("temp_dir")
+        )
+        assert validator.__getstate__() == get_validator().__getstate__()
+        for samplesheet in valid_samplesheets_no_dev:
+            result = validator.validate(samplesheet)
+            assert not result.errors
+            shutdown_logs(result.logger)
+
+    def test_from_config_missing_keys(self):
+        """
+        Test configuration missing required lists is rejected
+        """
+        with pytest.raises(ValueError):
+            samplesheet_validator.Validator.from_config(
+                {"sequencer_ids": ["A01229"]}, os.getenv("temp_dir")
+            )
+
+    def test_validator_pickle(self, valid_dev_samplesheet, get_validator):
+        """
+        Test a pickled Validator keeps its prebuilt lookups and patterns
+        """
+        validator = get_validator()
+        unpickled = pickle.loads(pickle.dumps(validator))
+        assert unpickled.__getstate__() == validator.__getstate__()
+        for samplesheet in valid_dev_samplesheet:
+            result = unpickled.validate(samplesheet)
+            assert result.dev_run
+            shutdown_logs(result.logger)
@@ -0,0 +1,112 @@
+#!/usr/bin/python3
+# coding=utf-8
+""" scanner.py pytest unit tests
+"""
+import os
+import shutil
+import pytest
+from samplesheet_validator import scanner
+
+
+@pytest.fixture(scope="function")
+def data_root(tmp_path):
+    """
+    Sequencer data root containing an Illumina and an Aviti runfolder, and samplesheets that
+    should not be found (in a runfolder subdirectory, a hidden directory, a pruned directory
+    and below the maximum depth). Returns the data root and the samplesheets that should be found
+    """
+    illumina_samplesheet = os.path.join(
+        os.getenv("samplesheet_dir"), "valid", "210917_NB551068_0409_AH3YNFAFX3_SampleSheet.csv"
+    )
+    aviti_samplesheet = os.path.join(
+        os.getenv("samplesheet_dir"), "valid", "250123_AV241501_A2434485185_SampleSheet.csv"
+    )
+    found = [
+        tmp_path / "210917_NB551068_0409_AH3YNFAFX3" / os.path.basename(illumina_samplesheet),
+        tmp_path / "aviti" / os.getenv("runname") / os.path.basename(aviti_samplesheet),
+    ]
+    not_found = [
+        found[0].parent / "Data" / "Intensities" / found[0].name,
+        found[0].parent / "Analysis" / found[0].name,
+        tmp_path / ".hidden" / found[0].parent.name / found[0].name,
+        tmp_path / "Logs" / found[0].name,
+        tmp_path / "a" / "b" / "c" / "d" / found[0].name,
+    ]
+    for destination, source in zip(
+        found + not_found, [illumina_samplesheet, aviti_samplesheet] + [illumina_samplesheet] * 5
+    ):
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(source, destination)
+    return str(tmp_path), sorted(str(path) for path in found)
+
+
+class TestRunScanner(object):
+    """
+    Tests for finding and validating the samplesheets under sequencer data roots
+    """
+
+    def test_scan(self, data_root):
+        """
+        Test only the runfolder samplesheets are found, pruning runfolder subdirectories, hidden
+        and pruned directories, and directories below the maximum depth
+        """
+        root, found = data_root
+        assert sorted(path for path, _ in scanner.RunScanner().scan([root])) == found
+
+    def test_get_run(self, data_root):
+        """
+        Test Aviti samplesheets are identified from their contents, and the run name is the
+        name of the runfolder
+        """
+        _, (illumina_samplesheet, aviti_samplesheet) = data_root
+        run_scanner = scanner.RunScanner()
+        assert run_scanner.get_run(illumina_samplesheet) == (
+            True,
+            "210917_NB551068_0409_AH3YNFAFX3",
+        )
+        assert run_scanner.get_run(aviti_samplesheet) == (False, os.getenv("runname"))
+
+    def test_validate_index(self, data_root, tmp_path, get_validator):
+        """
+        Test the samplesheets found are validated across the pool, and later scans only validate
+        samplesheets that have changed since
+        """
+        root, found = data_root
+        index_path = str(tmp_path / "index.json")
+        validator = get_validator()
+        summaries = scanner.RunScanner(index_path).validate(validator, [root], processes=2)
+        assert sorted(summaries) == found
+        assert not summaries[found[1]]["errors"]  # Aviti run name matches the runfolder
+        # The index is kept between scanners, so unchanged samplesheets are skipped
+        assert scanner.RunScanner(index_path).validate(validator, [root], processes=2) == {}
+        with open(found[0], "a") as samplesheet:
+            samplesheet.write("\n")
+        summaries = scanner.RunScanner(index_path).validate(validator, [root], processes=2)
+        assert list(summaries) == [found[0]]
+
+    def test_validate_exception(self, data_root, tmp_path, monkeypatch, get_validator):
+        """
+        Test a samplesheet whose validation raises an exception is reported as failed without
+        stopping the scan, and is not indexed, while the other samplesheets are
+        """
+        root, found = data_root
+        validate_in_worker = scanner.validate_in_worker
+
+        def validate_or_raise(samplesheet_path, illumina, runname):
+            if samplesheet_path == found[0]:
+                raise OSError("Samplesheet could not be read")
+            return validate_in_worker(samplesheet_path, illumina, runname)
+
+        # Worker processes are forked from the test, so use the patched function
+        monkeypatch.setattr(scanner, "validate_in_worker", validate_or_raise)
+        index_path = str(tmp_path / "index.json")
+        summaries = scanner.RunScanner(index_path).validate(get_validator(), [root], processes=2)
+        assert sorted(summaries) == found
+        assert summaries[found[0]]["errors_dict"] == {
+            scanner.config.SCAN_EXCEPTION_ERROR: ["OSError('Samplesheet could not be read')"]
+        }
+        assert not summaries[found[1]]["errors"]
+        assert list(scanner.RunScanner(index_path).index) == [found[1]]
+        monkeypatch.setattr(scanner, "validate_in_worker", validate_in_worker)
+        summaries = scanner.RunScanner(index_path).validate(get_validator(), [root], processes=2)
+        assert list(summaries) == [found[0]]
@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+# coding=utf-8
+""" verdict_cache.py pytest unit tests
+"""
+import logging
+import pytest
+from samplesheet_validator import config
+from samplesheet_validator.verdict_cache import VerdictCache
+
+
+@pytest.fixture(scope="function")
+def logger():
+    """
+    Logger holding the log messages, as returned by SSLogger
+    """
+    logger = logging.getLogger("test_verdict_cache")
+    logger.log_msgs = config.LOG_MSGS
+    return logger
+
+
+@pytest.fixture(scope="function")
+def cached_verdict():
+    """
+    Cached verdict and pan numbers of a sample row on line 5 with an invalid sample name
+    """
+    message = config.LOG_MSGS["illegal_chars"] % ("Sample_ID", 5, "line 5 sample!")
+    return {
+        "verdict": {
+            "line_index": 5,
+            "columns": {"Sample_ID": "line 5 sample!"},
+            "pannumber": None,
+            "errors": {"Illegal characters": [message]},
+        },
+        "pannumbers": [],
+    }
+
+
+class TestVerdictCache(object):
+    """
+    Tests for the cache of the row verdicts of the previous validation of a runfolder
+    """
+
+    def test_relocate_cached_verdict(self, cached_verdict):
+        """
+        Test the line number of a moved row is updated in its verdict and error messages, and
+        sample values are unchanged
+        """
+        assert VerdictCache.relocate_cached_verdict(cached_verdict, 5) is cached_verdict
+        relocated = VerdictCache.relocate_cached_verdict(cached_verdict, 7)
+        assert relocated["verdict"]["line_index"] == 7
+        assert relocated["verdict"]["errors"]["Illegal characters"] == [
+            config.LOG_MSGS["illegal_chars"] % ("Sample_ID", 7, "line 5 sample!")
+        ]
+        assert cached_verdict["verdict"]["line_index"] == 5
+
+    def test_save_load(self, cached_verdict, tmp_path, logger):
+        """
+        Test the saved row verdicts are reused by the next validation, for unchanged rows
+        """
+        cache_path = str(tmp_path / "verdicts.json")
+        sample_row = cached_verdict["verdict"]["columns"]
+        first_cache = VerdictCache(cache_path, "digest", True)
+        first_cache.add_verdict(sample_row, cached_verdict["verdict"], [])
+        first_cache.save(logger, 1)
+        next_cache = VerdictCache(cache_path, "digest", True)
+        next_cache.load(logger)
+        assert next_cache.get_cached_verdict({"Sample_ID": "edited"}, 5) is None
+        assert next_cache.get_cached_verdict(sample_row, 6)["verdict"]["line_index"] == 6
+        assert next_cache.reused_verdicts == 1
+
+    @pytest.mark.parametrize("config_digest, illumina", [("changed", True), ("digest", False)])
+    def test_load_changed(self, cached_verdict, tmp_path, logger, config_digest, illumina):
+        """
+        Test row verdicts are not reused if the configuration or instrument type has changed
+        """
+        cache_path = str(tmp_path / "verdicts.json")
+        first_cache = VerdictCache(cache_path, "digest", True)
+        first_cache.add_verdict(
+            cached_verdict["verdict"]["columns"], cached_verdict["verdict"], []
+        )
+        first_cache.save(logger, 1)
+        next_cache = VerdictCache(cache_path, config_digest, illumina)
+        next_cache.load(logger)
+        assert next_cache.cached_verdicts == {}